@@ -0,0 +1,313 @@
+"""
+Batch translation of page directories, bypassing the HTTP API
+
+For back-catalog runs: walks an input directory, runs every page through
+TranslationPipeline in a pool of processes that share the loaded models,
+and mirrors the directory tree under the output directory. Each finished
+page is appended to manifest.jsonl in the output directory, so an
+interrupted run picks up where it stopped: pages recorded as done (with an
+unchanged input file and their output in place) are skipped, failed pages
+are tried again.
+
+    python -m app.cli batch ./chapters ./translated --processes 4
+    python -m app.cli batch ./chapters ./translated --target-lang de --mode no_inpaint
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sys
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+import torch
+from app.config import settings
+from app.models.schemas import TranslationRequest
+from app.services.pipeline import RENDER_MODES, TranslationPipeline
+from app.utils.logging_utils import get_logger, setup_logging
+from app.utils.prefork import freeze_for_fork
+
+logger = get_logger(__name__)
+
+PAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+MANIFEST_NAME = "manifest.jsonl"
+
+# Pipeline of this process; pool workers inherit the parent's through fork
+_pipeline: Optional[TranslationPipeline] = None
+
+
+def find_pages(input_dir: str, exclude_dir: Optional[str] = None) -> List[str]:
+    """
+    Page images under a directory, as sorted paths relative to it
+    
+    Args:
+        input_dir: Directory to walk recursively
+        exclude_dir: Directory to leave out (the output, when it is inside the input)
+    """
+    exclude = os.path.realpath(exclude_dir) if exclude_dir else None
+    pages = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs[:] = [d for d in dirs if os.path.realpath(os.path.join(root, d)) != exclude]
+        for name in files:
+            if name.lower().endswith(PAGE_EXTENSIONS):
+                pages.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(pages)
+
+
+def output_path_for(page: str) -> str:
+    """Output path of a page, relative to the output directory"""
+    return os.path.splitext(page)[0] + ".png"
+
+
+def input_signature(path: str) -> Dict[str, int]:
+    """Size and mtime of an input file, to notice pages changed since they were processed"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_manifest(path: str) -> Dict[str, Dict]:
+    """
+    Latest manifest entry per page
+    
+    A line cut short by an interruption is ignored (that page runs again).
+    """
+    entries: Dict[str, Dict] = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            entries[entry["page"]] = entry
+    return entries
+
+
+def is_complete(entry: Optional[Dict], input_dir: str, output_dir: str) -> bool:
+    """Whether a manifest entry means the page can be skipped"""
+    if not entry or entry.get("status") != "done":
+        return False
+    page_path = os.path.join(input_dir, entry["page"])
+    if entry.get("input") != input_signature(page_path):
+        return False
+    output = entry.get("output")
+    return output is None or os.path.exists(os.path.join(output_dir, output))
+
+
+def process_page(task: Tuple[str, str, str, Dict]) -> Dict:
+    """
+    Run one page through the pipeline (in a pool worker)
+    
+    Args:
+        task: (input_dir, output_dir, relative page path, options)
+    
+    Returns:
+        Manifest entry of the page
+    """
+    input_dir, output_dir, page, options = task
+    page_path = os.path.join(input_dir, page)
+    entry = {"page": page, "input": input_signature(page_path), "output": None}
+    start = time.perf_counter()
+    try:
+        result = _pipeline.process_image_sync(
+            image_path=page_path,
+            file_id=uuid.uuid4().hex,
+            use_gpu=options["use_gpu"],
+            languages=TranslationRequest(source_lang=options["source_lang"], target_lang=options["target_lang"]),
+            mode=options["mode"],
+            keep_plate=False,
+        )
+        if result.get("translated_filename"):
+            entry["output"] = output_path_for(page)
+            destination = os.path.join(output_dir, entry["output"])
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(os.path.join(settings.temp_dir, result["translated_filename"]), destination)
+        detected_texts = result["detected_texts"]
+        entry.update({
+            "status": "done",
+            "regions": len(detected_texts),
+            "texts": [[text, translated] for text, translated in
+                      zip(detected_texts.texts.tolist(), detected_texts.translations.tolist())],
+        })
+    except Exception as e:
+        entry.update({"status": "error", "error": str(e)})
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def _init_worker(threads: int, load_models: bool):
+    """Pool worker setup: Ctrl-C is handled by the parent, which terminates the pool"""
+    global _pipeline
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    torch.set_num_threads(threads)
+    if load_models:
+        _pipeline = TranslationPipeline()
+
+
+def _run_pool(tasks: List[Tuple], processes: int, use_gpu: bool) -> Iterator[Dict]:
+    """
+    Process tasks, yielding manifest entries in completion order
+    
+    Without CUDA the models are loaded once here and the pool is forked
+    from this process, sharing them copy-on-write (see app.worker).
+    """
+    global _pipeline
+    threads = settings.worker_torch_threads or max(1, (os.cpu_count() or 1) // processes)
+    if processes == 1:
+        torch.set_num_threads(threads)
+        _pipeline = TranslationPipeline()
+        yield from map(process_page, tasks)
+        return
+    
+    # A forked process cannot use CUDA state initialized in its parent
+    load_in_workers = use_gpu and torch.cuda.is_available()
+    if not load_in_workers:
+        # Load single-threaded: children inheriting torch's OpenMP thread team deadlock
+        torch.set_num_threads(1)
+        _pipeline = TranslationPipeline()
+        _pipeline.preload_models(use_gpu=False)
+        freeze_for_fork()
+    
+    context = multiprocessing.get_context("fork")
+    pool = context.Pool(processes, initializer=_init_worker, initargs=(threads, load_in_workers))
+    try:
+        yield from pool.imap_unordered(process_page, tasks)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class ThroughputReporter:
+    """Prints pages/s, regions/s and an ETA every few seconds while a batch runs"""
+    
+    def __init__(self, total: int, interval: float = 10.0, stream=sys.stdout):
+        """
+        Args:
+            total: Pages to process in this run (skipped pages excluded)
+            interval: Seconds between progress lines
+            stream: Where progress lines go
+        """
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.done = 0
+        self.errors = 0
+        self.regions = 0
+    
+    def add(self, entry: Dict):
+        """Count a finished page and report if the interval has passed"""
+        self.done += 1
+        if entry["status"] == "error":
+            self.errors += 1
+        self.regions += entry.get("regions", 0)
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval or self.done == self.total:
+            self.last_report = now
+            print(self.line(), file=self.stream, flush=True)
+    
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "pages": self.done,
+            "errors": self.errors,
+            "regions": self.regions,
+            "elapsed": round(elapsed, 1),
+            "pages_per_second": round(self.done / elapsed, 3) if elapsed else 0.0,
+            "regions_per_second": round(self.regions / elapsed, 2) if elapsed else 0.0,
+        }
+    
+    def line(self) -> str:
+        stats = self.summary()
+        remaining = self.total - self.done
+        eta = remaining / stats["pages_per_second"] if stats["pages_per_second"] else 0.0
+        return (f"📚 {self.done}/{self.total} pages ({self.errors} errors) · "
+                f"{stats['pages_per_second']:.2f} pages/s · {stats['regions_per_second']:.1f} regions/s · "
+                f"ETA {_format_duration(eta)}")
+
+
+def batch(args) -> int:
+    """Run the batch command; returns the exit code (1 if any page failed)"""
+    input_dir = os.path.abspath(args.input_dir)
+    output_dir = os.path.abspath(args.output_dir)
+    if not os.path.isdir(input_dir):
+        raise SystemExit(f"Input directory not found: {input_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    
+    pages = find_pages(input_dir, exclude_dir=output_dir)
+    manifest = read_manifest(manifest_path)
+    pending = [page for page in pages if not is_complete(manifest.get(page), input_dir, output_dir)]
+    print(f"📂 {len(pages)} pages found, {len(pages) - len(pending)} already done, {len(pending)} to process",
+          flush=True)
+    if not pending:
+        return 0
+    
+    options = {
+        "use_gpu": args.gpu,
+        "source_lang": args.source_lang,
+        "target_lang": args.target_lang,
+        "mode": args.mode,
+    }
+    tasks = [(input_dir, output_dir, page, options) for page in pending]
+    processes = max(1, min(args.processes, len(tasks)))
+    reporter = ThroughputReporter(len(tasks), interval=args.report_interval)
+    
+    with open(manifest_path, "a", encoding="utf-8") as manifest_file:
+        try:
+            for entry in _run_pool(tasks, processes, args.gpu):
+                manifest_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                manifest_file.flush()
+                if entry["status"] == "error":
+                    logger.error("❌ %s: %s", entry["page"], entry["error"])
+                reporter.add(entry)
+        except KeyboardInterrupt:
+            print(f"⏹️ Interrupted; rerun the same command to resume ({reporter.line()})", flush=True)
+            return 130
+    
+    print(json.dumps(reporter.summary()), flush=True)
+    return 1 if reporter.errors else 0
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="MangaMa offline tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    batch_parser = commands.add_parser("batch", help="Translate every page under a directory (resumable)")
+    batch_parser.add_argument("input_dir", help="Directory of pages, walked recursively")
+    batch_parser.add_argument("output_dir", help="Where translated pages and manifest.jsonl are written")
+    batch_parser.add_argument("--processes", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                              help="Pages processed in parallel (forked processes sharing the models)")
+    batch_parser.add_argument("--source-lang", default=settings.translation_source_lang)
+    batch_parser.add_argument("--target-lang", default=settings.translation_target_lang)
+    batch_parser.add_argument("--mode", choices=RENDER_MODES + ("detect_translate",), default="full",
+                              help="detect_translate only records the texts in the manifest")
+    batch_parser.add_argument("--gpu", action="store_true", help="Run the models on CUDA")
+    batch_parser.add_argument("--report-interval", type=float, default=10.0,
+                              help="Seconds between throughput lines")
+    batch_parser.add_argument("--log-level", default="WARNING", help="Pipeline log level")
+    args = parser.parse_args(argv)
+    
+    try:
+        TranslationRequest(source_lang=args.source_lang, target_lang=args.target_lang)
+    except ValueError:
+        parser.error(f"unsupported language pair: {args.source_lang} → {args.target_lang}")
+    setup_logging(args.log_level, settings.log_format)
+    sys.exit(batch(args))
+
+
+if __name__ == "__main__":
+    main()
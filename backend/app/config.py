@@ -1,3 +1,4 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
 import os
@@ -17,29 +18,117 @@ class Settings(BaseSettings):
     api_port: int = 8000
     debug: bool = True
     
+    # Logging
+    log_level: str = "INFO"  # DEBUG adds per-region detail
+    log_format: str = "text"  # "text" or "json"
+    
     # CORS Settings - will be split from comma-separated string
     cors_origins: str = "http://localhost:3000,http://localhost:3001"
     
+    # Admin (empty token disables admin-only features such as profiling)
+    admin_token: str = ""
+    
     # File Storage
     temp_dir: str = "./temp"
+    profile_dir: str = "./profiles"
+    render_cache_dir: str = "./render_cache"  # Clean plates for re-rendering edits (not served)
     max_file_size: int = 10485760  # 10MB
+    max_image_pixels: int = 40_000_000  # width * height limit (decompression bomb guard)
+    
+    # Admission control (estimated memory; model weights are not included)
+    memory_budget_mb: int = 4096  # Estimated page memory admitted at once
+    page_memory_base_mb: int = 300  # Fixed per-page overhead
+    page_memory_bytes_per_pixel: int = 400  # OCR/inpainting working memory per input pixel
+    admission_queue_depth: int = 8  # Pages allowed to wait; beyond this requests get 429
+    admission_queue_timeout: float = 120.0  # Seconds a page may wait before 429
+    
+    # Job queue: "inline" runs pages in the API process; "sqlite" or "redis" share a queue
+    # between stateless API replicas and pipeline workers (python -m app.worker);
+    # "local" runs worker threads in the API process (tests)
+    job_queue_backend: str = "inline"
+    job_queue_url: str = "./jobs.sqlite3"  # SQLite path (not under temp_dir, which is served) or redis:// URL
+    job_queue_max_depth: int = 64  # Queued pages beyond which the API answers 429
+    job_timeout: float = 300.0  # Seconds an API replica waits for a worker result
+    job_lease_seconds: float = 600.0  # A job whose worker stops renewing its lease this long is re-queued (worker died)
+    job_result_ttl: float = 3600.0  # Seconds uncollected results and statuses are kept
+    worker_concurrency: int = 1  # Pages processed in parallel per worker process
+    worker_processes: int = 1  # Worker processes forked after loading the models once, sharing the weights
+    worker_torch_threads: int = 0  # Torch threads per worker process (0: CPU cores / worker processes)
+    worker_metrics_port: int = 9100  # Prometheus port of a worker process, +1 per further process (0 disables)
+    
+    # Latency deadlines: a request may carry a budget (form field "deadline", seconds);
+    # as the share of it left drops below each cutoff, quality is given up in this order
+    default_deadline: float = 0.0  # Budget of requests that set none (0: no deadline)
+    deadline_cut_retries_below: float = 0.5  # Try each translator once, no backoff sleeps
+    deadline_inpaint_fallback_below: float = 0.35  # OpenCV instead of the inpainting model
+    deadline_fast_render_below: float = 0.15  # Estimate font sizes instead of searching them
     
     # OCR Settings - will be split from comma-separated string
     ocr_languages: str = "en,tr"
     ocr_gpu: bool = False
+    ocr_quantize: bool = True  # Dynamic int8 quantization of EasyOCR models (CPU only; False runs fp32)
+    
+    # Text-presence pre-check: skip OCR on pages that are clearly textless (covers, splash art)
+    text_precheck: bool = True
+    text_precheck_min_glyphs: int = 1  # Text-like glyphs that send a page to OCR
+    text_precheck_max_ink: float = 0.03  # Pages with more ink are too busy to call textless; OCR runs
+    
+    # Text grouping (merge OCR line fragments into bubble-level blocks)
+    text_grouping: bool = True
+    grouping_line_gap_ratio: float = 0.8  # Max gap between lines of a block, relative to line height
+    reading_direction: str = "ltr"  # Order of blocks within a row: "ltr" or "rtl" (manga)
     
     # Translation Settings
     translation_source_lang: str = "en"
     translation_target_lang: str = "tr"
+    translator_pool_size: int = 32  # Cached translator clients, one per (backend, source, target)
+    translator_retry_seconds: float = 300.0  # Before retrying a backend whose client failed to initialize
+    
+    # Translator HTTP: all backends share one keep-alive connection pool per process
+    translator_max_connections: int = 20  # Open connections across all backends
+    translator_max_keepalive: int = 10  # Idle connections kept open for reuse
+    translator_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept
+    translator_connect_timeout: float = 5.0  # TCP + TLS setup
+    translator_timeout: float = 10.0  # Reading a response (and sending the request)
+    translator_pool_timeout: float = 5.0  # Waiting for a free connection when the pool is exhausted
+    google_translate_url: str = "https://translate.google.com/m"
+    mymemory_url: str = "https://api.mymemory.translated.net/get"
+    libre_translate_url: str = "https://libretranslate.com"  # Or a self-hosted server (no key needed)
+    libre_api_key: str = ""  # Required by libretranslate.com
     
     # Inpainting Settings
     inpainting_model_path: str = "./models/lama"
+    mask_refinement: bool = True  # Mask only glyph strokes instead of whole boxes
+    bubble_fill_enabled: bool = True  # Flat-fill text in uniform bubbles, skip the model
+    bubble_fill_max_std: float = 12.0  # Max background gray-level std for flat fill
+    
+    # Long-strip (webtoon) tiling
+    tiling_enabled: bool = True
+    tile_min_aspect_ratio: float = 3.0  # Tile pages at least this many times taller than wide
+    tile_height: int = 2048
+    tile_overlap: int = 256  # Must exceed the tallest text line expected across a seam
+    tile_workers: int = 2  # Tiles processed in parallel (bounds peak memory)
     
     # Text Rendering
-    default_font_path: str = "./fonts/arial.ttf"
+    default_font_path: str = "./fonts/arial.ttf"  # Edits may pick other font files from its directory
+    font_dirs: str = ""  # Extra comma-separated font directories to index (system dirs are always scanned)
+    font_index_path: str = "./font_index.json"  # Persisted glyph coverage of the installed fonts
+    keep_clean_plate: bool = True  # Keep the inpainted page so edits re-render without OCR/inpainting
+    plate_cache_size: int = 4  # Clean plates kept decoded in memory per process
+    plate_ttl: float = 86400.0  # Seconds a clean plate is kept on disk after it was saved or last edited
+    plate_max_disk_bytes: int = 2_000_000_000  # Disk budget of render_cache_dir; least recently edited plates go first
     font_size_min: int = 12
     font_size_max: int = 48
     
+    @model_validator(mode="after")
+    def check_tiling(self) -> "Settings":
+        """Tiles must advance: an overlap as tall as a tile would never reach the bottom"""
+        if self.tile_overlap >= self.tile_height:
+            raise ValueError(
+                f"TILE_OVERLAP ({self.tile_overlap}) must be smaller than TILE_HEIGHT ({self.tile_height})"
+            )
+        return self
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Get CORS origins as list"""
@@ -49,10 +138,20 @@ class Settings(BaseSettings):
     def ocr_languages_list(self) -> List[str]:
         """Get OCR languages as list"""
         return [x.strip() for x in self.ocr_languages.split(",")]
+    
+    @property
+    def font_dirs_list(self) -> List[str]:
+        """Get extra font directories as list"""
+        return [x.strip() for x in self.font_dirs.split(",") if x.strip()]
 
 
 # Global settings instance
 settings = Settings()
 
-# Ensure temp directory exists
+# Ensure temp directories exist
 os.makedirs(settings.temp_dir, exist_ok=True)
+os.makedirs(settings.profile_dir, exist_ok=True)
+os.makedirs(settings.render_cache_dir, exist_ok=True)
+
+# Apply the pixel limit to the decoders as well (OpenCV reads this at import time)
+os.environ.setdefault("OPENCV_IO_MAX_IMAGE_PIXELS", str(settings.max_image_pixels))
@@ -1,10 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from app.config import settings
-from app.routers import translation
+from app.utils.logging_utils import setup_logging, request_id_var
+from app.utils.upload_utils import BodySizeLimitMiddleware
+from app.services.admission import AdmissionGateMiddleware, admission_controller
 import os
+import uuid
+
+# Configure logging before the routers build the pipeline (it logs on init)
+setup_logging(settings.log_level, settings.log_format)
+
+from app.routers import translation  # noqa: E402
 
 
 class CachedStaticFiles(StaticFiles):
@@ -30,7 +39,21 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Configure CORS
+# Refuse uploads with 429 while the admission queue is full, before reading them
+app.add_middleware(
+    AdmissionGateMiddleware,
+    controller=admission_controller,
+    paths=("/api/translate",),
+)
+
+# Cut off oversized uploads before they are parsed (slack covers multipart framing)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.max_file_size + 64 * 1024,
+    paths=("/api/translate",),
+)
+
+# Configure CORS (added last so it also wraps early rejections)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -39,6 +62,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    """Tag logs with a request id and echo it back to the client"""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
 # Mount static files (for serving processed images)
 if os.path.exists(settings.temp_dir):
     app.mount("/static", CachedStaticFiles(directory=settings.temp_dir), name="static")
@@ -57,6 +93,12 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -0,0 +1,258 @@
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from app.models.schemas import DetectedText
+
+Rect = Tuple[int, int, int, int]  # (x1, y1, x2, y2), exclusive end
+Index = Union[np.ndarray, Sequence[int]]
+
+
+def _objects(values: Optional[Iterable[Any]], n: int, fill: Any = None) -> np.ndarray:
+    """Object array of length n from values (or filled with `fill`)"""
+    array = np.empty(n, dtype=object)
+    if values is None:
+        array[:] = [fill] * n
+    else:
+        array[:] = list(values)
+    return array
+
+
+class DetectionBatch:
+    """
+    Text regions of a page as parallel columns, one row per region
+    
+    The pipeline passes these between stages so filtering, coordinate
+    shifts and box geometry are vectorized NumPy operations rather than
+    loops over pydantic objects. DetectedText models are only built at the
+    API boundary (to_models / to_dicts).
+    
+    Columns:
+        boxes: (N, 4) int32 x, y, width, height
+        confidences: (N,) float64
+        texts, translations, languages, fonts: (N,) object arrays (None = unset)
+        font_sizes: (N,) int32, 0 = fit the text to the box
+        line_boxes: (M, 4) int32 line boxes merged into grouped blocks
+        line_owner: (M,) int32 row of the block each line box belongs to
+    """
+    
+    __slots__ = ("boxes", "confidences", "texts", "translations", "languages",
+                 "font_sizes", "fonts", "line_boxes", "line_owner")
+    
+    def __init__(self,
+                 boxes: Any,
+                 confidences: Any,
+                 texts: Iterable[str],
+                 translations: Optional[Iterable[Optional[str]]] = None,
+                 languages: Optional[Iterable[str]] = None,
+                 font_sizes: Any = None,
+                 fonts: Optional[Iterable[Optional[str]]] = None,
+                 line_boxes: Any = None,
+                 line_owner: Any = None,
+                 language: str = "en"):
+        """
+        Args:
+            boxes: (N, 4) x, y, width, height
+            confidences: (N,) detection confidences
+            texts: Recognized text per region
+            translations: Translated text per region (default: unset)
+            languages: Source language per region (default: `language`)
+            font_sizes: Fixed font size per region, 0 = fit (default: all 0)
+            fonts: Font file name per region (default: unset)
+            line_boxes: (M, 4) line boxes of grouped blocks (default: none)
+            line_owner: (M,) region row of each line box
+            language: Language of every region when `languages` is not given
+        """
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        n = len(self.boxes)
+        self.confidences = np.asarray(confidences, dtype=np.float64).reshape(n)
+        self.texts = _objects(texts, n, "")
+        self.translations = _objects(translations, n)
+        self.languages = _objects(languages, n, language)
+        self.font_sizes = (np.zeros(n, dtype=np.int32) if font_sizes is None
+                           else np.asarray(font_sizes, dtype=np.int32).reshape(n))
+        self.fonts = _objects(fonts, n)
+        self.line_boxes = (np.zeros((0, 4), dtype=np.int32) if line_boxes is None
+                           else np.asarray(line_boxes, dtype=np.int32).reshape(-1, 4))
+        self.line_owner = (np.zeros(0, dtype=np.int32) if line_owner is None
+                           else np.asarray(line_owner, dtype=np.int32).reshape(len(self.line_boxes)))
+    
+    def __len__(self) -> int:
+        return len(self.boxes)
+    
+    @classmethod
+    def empty(cls) -> "DetectionBatch":
+        return cls(np.zeros((0, 4)), np.zeros(0), [])
+    
+    # Selection and combination
+    
+    def take(self, index: Index) -> "DetectionBatch":
+        """
+        Rows selected by a boolean mask or an array of row numbers, in that order
+        
+        Line boxes follow their blocks; a row selected more than once keeps
+        its line boxes on the first copy only.
+        """
+        index = np.asarray(index)
+        rows = np.flatnonzero(index) if index.dtype == bool else index.astype(np.intp).reshape(-1)
+        
+        remap = np.full(len(self) + 1, -1, dtype=np.int64)
+        # Reversed so that the first occurrence of a repeated row wins
+        remap[rows[::-1]] = np.arange(len(rows))[::-1]
+        owners = remap[self.line_owner] if len(self.line_owner) else self.line_owner
+        keep = owners >= 0
+        
+        return DetectionBatch(
+            self.boxes[rows],
+            self.confidences[rows],
+            self.texts[rows],
+            self.translations[rows],
+            self.languages[rows],
+            self.font_sizes[rows],
+            self.fonts[rows],
+            self.line_boxes[keep],
+            owners[keep]
+        )
+    
+    def copy(self) -> "DetectionBatch":
+        return self.take(np.arange(len(self)))
+    
+    @classmethod
+    def concat(cls, batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        """Rows of all batches, one after the other"""
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls.empty()
+        offsets = np.cumsum([0] + [len(b) for b in batches[:-1]])
+        return cls(
+            np.concatenate([b.boxes for b in batches]),
+            np.concatenate([b.confidences for b in batches]),
+            np.concatenate([b.texts for b in batches]),
+            np.concatenate([b.translations for b in batches]),
+            np.concatenate([b.languages for b in batches]),
+            np.concatenate([b.font_sizes for b in batches]),
+            np.concatenate([b.fonts for b in batches]),
+            np.concatenate([b.line_boxes for b in batches]),
+            np.concatenate([b.line_owner + offset for b, offset in zip(batches, offsets)])
+        )
+    
+    # Geometry
+    
+    def corners(self) -> np.ndarray:
+        """(N, 4) x1, y1, x2, y2 of each region"""
+        corners = self.boxes.copy()
+        corners[:, 2:] += self.boxes[:, :2]
+        return corners
+    
+    def shifted(self, dx: int = 0, dy: int = 0) -> "DetectionBatch":
+        """Copy moved by (dx, dy) pixels, line boxes included"""
+        moved = self.copy()
+        offset = np.array([dx, dy, 0, 0], dtype=np.int32)
+        moved.boxes += offset
+        moved.line_boxes += offset
+        return moved
+    
+    def intersecting(self, rect: Rect) -> np.ndarray:
+        """Boolean mask of the regions overlapping rect"""
+        x1, y1, x2, y2 = rect
+        c = self.corners()
+        return (c[:, 0] < x2) & (c[:, 2] > x1) & (c[:, 1] < y2) & (c[:, 3] > y1)
+    
+    def in_rect(self, rect: Rect) -> "DetectionBatch":
+        """Regions overlapping rect, in the rectangle's coordinates"""
+        return self.take(self.intersecting(rect)).shifted(-rect[0], -rect[1])
+    
+    def in_band(self, y_start: int, y_end: int) -> "DetectionBatch":
+        """Regions intersecting rows [y_start, y_end), in band-local coordinates"""
+        top = self.boxes[:, 1]
+        bottom = top + self.boxes[:, 3]
+        return self.take((top < y_end) & (bottom > y_start)).shifted(dy=-y_start)
+    
+    def padded_rects(self, padding: int, image_shape: Tuple[int, ...]) -> np.ndarray:
+        """(N, 4) x1, y1, x2, y2 of each region grown by padding and clipped to the image"""
+        height, width = image_shape[:2]
+        rects = self.corners()
+        rects[:, :2] -= padding
+        rects[:, 2:] += padding
+        np.clip(rects[:, 0::2], 0, width, out=rects[:, 0::2])
+        np.clip(rects[:, 1::2], 0, height, out=rects[:, 1::2])
+        return rects
+    
+    def line_regions(self) -> "DetectionBatch":
+        """
+        One region per line box of grouped blocks (for tight text masks)
+        
+        Regions without line boxes are kept as they are; the result stays in
+        block order.
+        """
+        if not len(self.line_owner):
+            return self
+        has_lines = np.bincount(self.line_owner, minlength=len(self)) > 0
+        rows = np.concatenate([np.flatnonzero(~has_lines), self.line_owner])
+        boxes = np.concatenate([self.boxes[~has_lines], self.line_boxes])
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        return DetectionBatch(
+            boxes[order],
+            self.confidences[rows],
+            self.texts[rows],
+            self.translations[rows],
+            self.languages[rows]
+        )
+    
+    def lines_of(self, row: int) -> np.ndarray:
+        """(K, 4) line boxes of one block (empty if it was not grouped)"""
+        return self.line_boxes[self.line_owner == row]
+    
+    # Conversion at the API boundary
+    
+    def to_dicts(self) -> List[Dict]:
+        """Plain JSON-serializable dicts in the DetectedText layout"""
+        lines: List[List[Dict]] = [[] for _ in range(len(self))]
+        order = np.lexsort((self.line_boxes[:, 1], self.line_owner)) if len(self.line_owner) else []
+        for i in order:
+            x, y, w, h = self.line_boxes[i].tolist()
+            lines[self.line_owner[i]].append(
+                {"x": x, "y": y, "width": w, "height": h, "confidence": 1.0}
+            )
+        
+        records = []
+        for i, (x, y, w, h) in enumerate(self.boxes.tolist()):
+            records.append({
+                "text": self.texts[i],
+                "bbox": {"x": x, "y": y, "width": w, "height": h,
+                         "confidence": round(float(self.confidences[i]), 3)},
+                "language": self.languages[i],
+                "translated_text": self.translations[i],
+                "lines": lines[i] or None,
+                "font_size": int(self.font_sizes[i]) or None,
+                "font": self.fonts[i],
+            })
+        return records
+    
+    def to_models(self) -> List[DetectedText]:
+        """DetectedText models for API responses"""
+        return [DetectedText.model_validate(record) for record in self.to_dicts()]
+    
+    @classmethod
+    def from_dicts(cls, records: Sequence[Dict]) -> "DetectionBatch":
+        """Build from dicts in the DetectedText layout (e.g. read back from JSON)"""
+        line_boxes, line_owner = [], []
+        for row, record in enumerate(records):
+            for line in record.get("lines") or ():
+                line_boxes.append((line["x"], line["y"], line["width"], line["height"]))
+                line_owner.append(row)
+        return cls(
+            [(r["bbox"]["x"], r["bbox"]["y"], r["bbox"]["width"], r["bbox"]["height"]) for r in records],
+            [r["bbox"]["confidence"] for r in records],
+            [r["text"] for r in records],
+            [r.get("translated_text") for r in records],
+            [r.get("language", "en") for r in records],
+            [r.get("font_size") or 0 for r in records],
+            [r.get("font") for r in records],
+            line_boxes or None,
+            line_owner or None
+        )
+    
+    @classmethod
+    def from_models(cls, detected_texts: Sequence[DetectedText]) -> "DetectionBatch":
+        """Build from DetectedText models (e.g. request payloads or ground truth)"""
+        return cls.from_dicts([det.model_dump() for det in detected_texts])
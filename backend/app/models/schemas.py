@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 
 
@@ -18,26 +18,96 @@ class DetectedText(BaseModel):
     bbox: BoundingBox
     language: str = "en"
     translated_text: Optional[str] = None
+    lines: Optional[List[BoundingBox]] = None  # Line boxes merged into this block, top to bottom
+    font_size: Optional[int] = None  # Fixed size set by an edit (None = fit to the box)
+    font: Optional[str] = None  # Font file in the fonts directory set by an edit
+
+
+# ISO 639 code with optional region/script, e.g. "en", "zh-CN", "pt-BR"
+LANGUAGE_CODE = r"[a-z]{2,3}(-[A-Za-z]{2,4})?"
 
 
 class TranslationRequest(BaseModel):
     """Request model for translation"""
-    source_lang: str = "en"
-    target_lang: str = "tr"
+    source_lang: str = Field("en", pattern=rf"^(auto|{LANGUAGE_CODE})$")  # "auto" = detect
+    target_lang: str = Field("tr", pattern=rf"^{LANGUAGE_CODE}$")
+
+
+class TextTranslationRequest(TranslationRequest):
+    """Request model for translating already extracted text (no image)"""
+    texts: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class TextTranslationResponse(BaseModel):
+    """Translations in request order"""
+    translations: List[str]
+    source_lang: str
+    target_lang: str
+    processing_time: float
+
+
+class TextEdit(BaseModel):
+    """Change to one text region of an already processed page"""
+    index: int = Field(ge=0)  # Position in the job's detected_texts
+    translated_text: Optional[str] = None
+    font_size: Optional[int] = Field(None, ge=6, le=200)
+    font: Optional[str] = Field(None, pattern=r"^[\w.-]+\.(ttf|otf|ttc)$")
+
+
+class RerenderRequest(BaseModel):
+    """Request model for redrawing edited regions on the cached clean plate"""
+    edits: List[TextEdit] = Field(..., min_length=1)
+    output_mode: str = Field("patches", pattern="^(page|patches|sprite)$")
+
+
+class ProfileReport(BaseModel):
+    """Profiling results for a single request (admin only)"""
+    profile_url: str
+    format: str = "speedscope"
+    stage_timings: Dict[str, float]
+    # Both cover only this request's run but are process-wide: they include
+    # allocations of other requests running at the same time
+    peak_traced_memory_bytes: int
+    # Highest resident size sampled during the run minus the size at its start
+    # (None where /proc is unavailable)
+    peak_rss_growth_bytes: Optional[int] = None
+
+
+class ImagePatch(BaseModel):
+    """Changed region of the page, to be drawn over the original image at (x, y)"""
+    x: int
+    y: int
+    width: int
+    height: int
+    url: Optional[str] = None  # "patches" mode: image of this region
+    sprite_x: Optional[int] = None  # "sprite" mode: position of this region in the sprite
+    sprite_y: Optional[int] = None
 
 
 class TranslationResponse(BaseModel):
     """Response model after processing"""
+    file_id: str  # Server-generated id for /api/rerender, /api/cleanup and /api/profiles
     original_image_url: str
-    translated_image_url: str
+    translated_image_url: Optional[str] = None  # Full page ("page" output mode only)
+    mode: str = "full"  # Pipeline stages run; "detect" and "detect_translate" return no image
+    output_mode: str = "page"
+    image_width: Optional[int] = None
+    image_height: Optional[int] = None
+    patches: Optional[List[ImagePatch]] = None
+    sprite_url: Optional[str] = None
     detected_texts: List[DetectedText]
     processing_time: float
     timestamp: datetime = Field(default_factory=datetime.now)
     total_text_regions: int
+    source_lang: Optional[str] = None
+    target_lang: Optional[str] = None
+    degradations: Optional[List[str]] = None  # Quality given up to meet the request's deadline, in order applied
+    profile: Optional[ProfileReport] = None
 
 
 class ProcessingStatus(BaseModel):
     """Processing status for real-time updates"""
-    stage: str  # "uploading", "ocr", "translating", "inpainting", "rendering", "complete"
+    job_id: Optional[str] = None
+    stage: str  # "uploading", "ocr", "translating", "inpainting", "rendering", "complete", "error"
     progress: int = Field(ge=0, le=100)
     message: str
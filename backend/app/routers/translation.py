@@ -1,80 +1,314 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form
-from fastapi.responses import JSONResponse
-from app.models.schemas import TranslationResponse, DetectedText
-from app.services.pipeline import TranslationPipeline
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Form, Query, Header, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from app.models.schemas import (
+    TranslationResponse,
+    TranslationRequest,
+    TextTranslationRequest,
+    TextTranslationResponse,
+    RerenderRequest,
+    DetectedText,
+    ImagePatch,
+    ProfileReport,
+)
+from pydantic import ValidationError
+from app.models.detection_batch import DetectionBatch
+from app.services.pipeline import TranslationPipeline, PIPELINE_MODES
+from app.services.translation_service import TranslationService, UnsupportedLanguagePair
+from app.services.rerender_service import RerenderService, RenderNotFound
+from app.services.text_renderer import TextRenderer
+from app.services.progress import progress_broker
+from app.services.deadline import Deadline
+from app.services.admission import admission_controller, estimate_page_memory, AdmissionRejected
+from app.services.job_queue import job_queue, JobTimeout
 from app.config import settings
+from app.utils.metrics import REQUESTS_IN_FLIGHT, BYTES_PROCESSED, ADMISSION_REJECTED
+from app.utils.upload_utils import save_upload, UploadRejected
+from typing import Dict, List, Optional, Union
+import asyncio
+import hmac
 import os
 import uuid
 import time
-import aiofiles
 
 router = APIRouter()
 
-# Initialize the translation pipeline
-pipeline = TranslationPipeline()
+# Initialize the translation pipeline (API replicas feeding a shared job queue
+# leave the models to the workers)
+pipeline = TranslationPipeline() if job_queue is None or job_queue.in_process else None
+
+if job_queue is not None and job_queue.in_process:
+    from app.worker import JobWorker
+    JobWorker(job_queue, pipeline, concurrency=settings.worker_concurrency).start()
+
+# Text-only translation and re-rendering run in the API process (they need no models)
+if pipeline is not None:
+    translation_service = pipeline.translation_service
+    rerender_service = pipeline.rerender_service
+else:
+    translation_service = TranslationService()
+    rerender_service = RerenderService(
+        TextRenderer(settings.default_font_path),
+        cache_size=settings.plate_cache_size,
+        ttl=settings.plate_ttl,
+        max_disk_bytes=settings.plate_max_disk_bytes
+    )
+
+
+def _parse_job_id(job_id: str) -> str:
+    """Normalize a client-supplied job id (must be a UUID)"""
+    try:
+        return str(uuid.UUID(job_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid job id")
+
+
+def _require_admin(admin_token: Optional[str]):
+    """Reject the request unless it carries the configured admin token"""
+    if not settings.admin_token or not admin_token or not hmac.compare_digest(admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def _check_language_pair(source_lang: str, target_lang: str):
+    """422 unless some translation backend supports the pair (texts would come back untranslated)"""
+    try:
+        translation_service.check_language_pair(source_lang, target_lang)
+    except UnsupportedLanguagePair as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _static_url(filename: Optional[str]) -> Optional[str]:
+    """Public URL of a file in the temp directory"""
+    return f"/static/{filename}" if filename else None
+
+
+def _queue_reporter(job_id: str):
+    """Progress callback for the event loop that publishes through the shared job queue"""
+    loop = asyncio.get_running_loop()
+    publish = job_queue.reporter(job_id)
+    
+    def report(stage: str, fraction: float = 0.0, message: str = ""):
+        loop.run_in_executor(None, publish, stage, fraction, message)
+    
+    return report
+
+
+async def _run_on_worker(job: Dict) -> Dict:
+    """
+    Hand a page to the shared job queue and wait for a worker's result
+    
+    Raises:
+        AdmissionRejected: If too many pages are already waiting
+        HTTPException: 504 if no worker finished in time, 500 if the job failed
+    """
+    depth = await asyncio.to_thread(job_queue.depth)
+    if depth >= settings.job_queue_max_depth:
+        ADMISSION_REJECTED.labels(reason="queue_full").inc()
+        raise AdmissionRejected("queue_full", "Server is busy, please retry later", retry_after=min(300, 5 + depth))
+    
+    try:
+        outcome = await job_queue.submit(job, timeout=settings.job_timeout)
+    except JobTimeout:
+        raise HTTPException(status_code=504, detail="Timed out waiting for a worker")
+    if not outcome["ok"]:
+        raise HTTPException(status_code=500, detail=f"Processing error: {outcome['error']}")
+    return outcome["result"]
+
+
+def _response_texts(detected_texts: Union[DetectionBatch, List[Dict]]) -> List[DetectedText]:
+    """DetectedText models of a result (a DetectionBatch, or plain dicts from a queue worker)"""
+    if isinstance(detected_texts, DetectionBatch):
+        return detected_texts.to_models()
+    return [DetectedText.model_validate(det) for det in detected_texts]
+
+
+def _attach_patches(response: TranslationResponse, result: Dict):
+    """Fill the patch list and sprite URL of a "patches"/"sprite" mode response"""
+    response.patches = [
+        ImagePatch(
+            x=patch['x'],
+            y=patch['y'],
+            width=patch['width'],
+            height=patch['height'],
+            url=_static_url(patch.get('filename')),
+            sprite_x=patch.get('sprite_x'),
+            sprite_y=patch.get('sprite_y')
+        )
+        for patch in result['patches']
+    ]
+    response.sprite_url = _static_url(result['sprite_filename'])
+
+
+def _too_busy(error: AdmissionRejected) -> HTTPException:
+    """429 response telling the client when to retry"""
+    return HTTPException(
+        status_code=429,
+        detail=error.detail,
+        headers={"Retry-After": str(error.retry_after)}
+    )
 
 
 @router.post("/translate", response_model=TranslationResponse)
 async def translate_manga(
     file: UploadFile = File(..., description="Manga page image (JPG/PNG)"),
-    use_gpu: bool = Form(False, description="Use GPU for processing")
+    use_gpu: bool = Form(False, description="Use GPU for processing"),
+    job_id: Optional[str] = Form(None, description="Client-generated UUID to follow progress at /api/progress/{job_id}"),
+    source_lang: Optional[str] = Form(None, description="Source language code or 'auto' (default: server setting)"),
+    target_lang: Optional[str] = Form(None, description="Target language code, e.g. 'tr', 'de', 'zh-CN' (default: server setting)"),
+    output_mode: str = Form(
+        "page",
+        pattern="^(page|patches|sprite)$",
+        description="'page' returns the full translated PNG; 'patches' or 'sprite' return only the changed regions to draw over the original"
+    ),
+    mode: str = Form(
+        "full",
+        pattern=f"^({'|'.join(PIPELINE_MODES)})$",
+        description="Stages to run: 'detect' (OCR boxes only), 'detect_translate' (text only, no image), "
+                    "'no_inpaint' (render without the inpainting model) or 'full'"
+    ),
+    deadline: Optional[float] = Form(
+        None,
+        gt=0,
+        description="Latency budget in seconds; as it runs out, translation retries, the inpainting model "
+                    "and the font size search are given up in that order (default: server setting)"
+    ),
+    profile: bool = Query(False, description="Profile this request (admin only)"),
+    x_profile: Optional[str] = Header(None, description="Set to 1 to profile this request (admin only)"),
+    x_admin_token: Optional[str] = Header(None)
 ):
     """
     Main endpoint to process manga translation
     
     Workflow:
-    1. Upload and validate image
+    1. Stream upload to disk, validating format, size and dimensions
     2. Detect text regions (OCR)
-    3. Translate detected text
-    4. Inpaint (remove) original text
-    5. Render translated text
+    3. Translate detected text (skipped in "detect" mode)
+    4. Inpaint (remove) original text ("no_inpaint" and "full" modes)
+    5. Render translated text ("no_inpaint" and "full" modes)
     6. Return processed image
+    
+    With a deadline, the response lists the degradations applied to meet it.
     """
     start_time = time.time()
+    request_deadline = Deadline.from_request(deadline, started_at=start_time)
     
-    # Validate file type
-    if not file.content_type in ["image/jpeg", "image/png", "image/jpg"]:
-        raise HTTPException(status_code=400, detail="Only JPG/PNG images are supported")
-    
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.max_file_size:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File size exceeds maximum allowed size ({settings.max_file_size} bytes)"
+    try:
+        languages = TranslationRequest(
+            source_lang=source_lang or settings.translation_source_lang,
+            target_lang=target_lang or settings.translation_target_lang
         )
+    except ValidationError:
+        raise HTTPException(status_code=400, detail="Invalid language code")
+    if mode != "detect":
+        _check_language_pair(languages.source_lang, languages.target_lang)
     
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    original_filename = f"{file_id}_original{file_extension}"
-    original_path = os.path.join(settings.temp_dir, original_filename)
+    profile = profile or (x_profile or "").lower() in ("1", "true")
+    if profile:
+        _require_admin(x_admin_token)
     
-    # Save uploaded file
-    async with aiofiles.open(original_path, 'wb') as f:
-        await f.write(file_content)
+    # Outputs are always named by a server-generated id; the client's job id
+    # only keys the progress stream, so it can never address another job's files
+    file_id = str(uuid.uuid4())
+    progress_id = _parse_job_id(job_id) if job_id else file_id
+    report = _queue_reporter(progress_id) if job_queue is not None else progress_broker.reporter(progress_id)
     
     try:
-        # Process the image through the pipeline
-        result = await pipeline.process_image(
-            image_path=original_path,
-            file_id=file_id,
-            use_gpu=use_gpu
+        # Stream to disk, sniffing the format and dimensions from the header
+        original_filename, _, (width, height), size = await save_upload(
+            file,
+            settings.temp_dir,
+            file_id,
+            max_bytes=settings.max_file_size,
+            max_pixels=settings.max_image_pixels
         )
+    except UploadRejected as e:
+        report("error", 1.0, e.detail)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except HTTPException as e:
+        report("error", 1.0, e.detail)
+        raise
+    
+    original_path = os.path.join(settings.temp_dir, original_filename)
+    BYTES_PROCESSED.labels(direction="in").inc(size)
+    report("uploading", 1.0, "Upload received")
+    
+    try:
+        if job_queue is not None:
+            # Any worker may pick the page up; the file is on the shared temp volume
+            with REQUESTS_IN_FLIGHT.track_inprogress():
+                result = await _run_on_worker({
+                    "job_id": file_id,
+                    "progress_id": progress_id,
+                    "image_filename": original_filename,
+                    "use_gpu": use_gpu,
+                    "profile": profile,
+                    "source_lang": languages.source_lang,
+                    "target_lang": languages.target_lang,
+                    "output_mode": output_mode,
+                    "mode": mode,
+                    "deadline": request_deadline.budget if request_deadline else None,
+                    "deadline_started_at": start_time
+                })
+        else:
+            # Process the image through the pipeline once its estimated memory fits the budget
+            async with admission_controller.admit(
+                estimate_page_memory(width, height),
+                on_queued=lambda position: report("uploading", 1.0, f"Waiting for capacity (position {position})")
+            ):
+                with REQUESTS_IN_FLIGHT.track_inprogress():
+                    result = await pipeline.process_image(
+                        image_path=original_path,
+                        file_id=file_id,
+                        use_gpu=use_gpu,
+                        profile=profile,
+                        progress=report,
+                        languages=languages,
+                        output_mode=output_mode,
+                        mode=mode,
+                        deadline=request_deadline
+                    )
         
         processing_time = time.time() - start_time
         
         # Construct response
         response = TranslationResponse(
+            file_id=file_id,
             original_image_url=f"/static/{original_filename}",
-            translated_image_url=f"/static/{result['translated_filename']}",
-            detected_texts=result['detected_texts'],
+            translated_image_url=_static_url(result['translated_filename']),
+            mode=mode,
+            output_mode=output_mode,
+            image_width=width,
+            image_height=height,
+            detected_texts=_response_texts(result['detected_texts']),
             processing_time=round(processing_time, 2),
-            total_text_regions=len(result['detected_texts'])
+            total_text_regions=len(result['detected_texts']),
+            source_lang=languages.source_lang,
+            target_lang=languages.target_lang,
+            degradations=result.get('degradations') if request_deadline else None
         )
         
+        if output_mode != "page" and 'patches' in result:
+            _attach_patches(response, result)
+        
+        if 'profile' in result:
+            response.profile = ProfileReport(
+                profile_url=f"/api/profiles/{file_id}",
+                stage_timings=result['timings'],
+                peak_traced_memory_bytes=result['profile']['peak_traced_memory_bytes'],
+                peak_rss_growth_bytes=result['profile']['peak_rss_growth_bytes']
+            )
+        
         return response
         
+    except AdmissionRejected as e:
+        if os.path.exists(original_path):
+            os.remove(original_path)
+        report("error", 1.0, e.detail)
+        raise _too_busy(e)
+    except HTTPException as e:
+        # After a 504 a worker may still pick the upload up
+        if e.status_code != 504 and os.path.exists(original_path):
+            os.remove(original_path)
+        raise
     except Exception as e:
         # Clean up uploaded file on error
         if os.path.exists(original_path):
@@ -82,17 +316,136 @@ async def translate_manga(
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
 
 
+@router.post("/translate-text", response_model=TextTranslationResponse)
+async def translate_text(request: TextTranslationRequest):
+    """
+    Translate text the caller already extracted, without any image stages
+    
+    Languages left out default to the server settings, as in /translate.
+    """
+    start_time = time.time()
+    source_lang = request.source_lang if "source_lang" in request.model_fields_set else settings.translation_source_lang
+    target_lang = request.target_lang if "target_lang" in request.model_fields_set else settings.translation_target_lang
+    _check_language_pair(source_lang, target_lang)
+    translations = await asyncio.to_thread(
+        translation_service.batch_translate,
+        request.texts,
+        source_lang=source_lang,
+        target_lang=target_lang
+    )
+    return TextTranslationResponse(
+        translations=translations,
+        source_lang=source_lang,
+        target_lang=target_lang,
+        processing_time=round(time.time() - start_time, 2)
+    )
+
+
+@router.post("/rerender/{file_id}", response_model=TranslationResponse)
+async def rerender_page(file_id: str, request: RerenderRequest):
+    """
+    Apply edited translations, fonts or sizes to a processed page
+    
+    Redraws only the edited regions on the job's cached clean plate (no OCR
+    or inpainting). In "patches"/"sprite" output mode the patches cover the
+    changed areas and are drawn over the page currently shown.
+    """
+    start_time = time.time()
+    file_id = _parse_job_id(file_id)
+    
+    try:
+        result = await asyncio.to_thread(
+            rerender_service.rerender, file_id, request.edits, request.output_mode
+        )
+    except RenderNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    response = TranslationResponse(
+        file_id=file_id,
+        original_image_url=f"/static/{result['original_filename']}",
+        translated_image_url=_static_url(result['translated_filename']),
+        output_mode=request.output_mode,
+        detected_texts=_response_texts(result['detected_texts']),
+        processing_time=round(time.time() - start_time, 3),
+        total_text_regions=len(result['detected_texts'])
+    )
+    if request.output_mode != "page":
+        _attach_patches(response, result)
+    return response
+
+
+@router.get("/progress/{job_id}")
+async def stream_progress(job_id: str, request: Request):
+    """
+    Server-sent events stream of ProcessingStatus updates for one job
+    
+    Open it with the job_id you are about to send to /api/translate; the
+    stream ends after the "complete" or "error" event.
+    """
+    job_id = _parse_job_id(job_id)
+    
+    # With a shared job queue the page may run on any worker, so read its shared status
+    statuses = job_queue.watch_progress(job_id) if job_queue is not None else progress_broker.subscribe(job_id)
+    
+    async def events():
+        async for status in statuses:
+            if await request.is_disconnected():
+                break
+            if status is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: progress\ndata: {status.model_dump_json()}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.delete("/cleanup/{file_id}")
 async def cleanup_files(file_id: str):
-    """Clean up temporary files for a given file_id"""
+    """Clean up temporary files and the clean plate for a given file_id"""
+    file_id = _parse_job_id(file_id)
     try:
-        deleted_files = []
+        deleted_files = rerender_service.discard(file_id)
         for filename in os.listdir(settings.temp_dir):
             if filename.startswith(file_id):
-                file_path = os.path.join(settings.temp_dir, filename)
-                os.remove(file_path)
+                os.remove(os.path.join(settings.temp_dir, filename))
                 deleted_files.append(filename)
         
         return {"message": f"Cleaned up {len(deleted_files)} files", "files": deleted_files}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Cleanup error: {str(e)}")
+
+
+@router.get("/profiles/{file_id}")
+async def get_profile(file_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Download the speedscope profile of a profiled request (admin only)"""
+    _require_admin(x_admin_token)
+    
+    try:
+        file_id = str(uuid.UUID(file_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid file id")
+    
+    profile_path = os.path.join(settings.profile_dir, f"{file_id}.speedscope.json")
+    if not os.path.exists(profile_path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return FileResponse(profile_path, media_type="application/json", filename=f"{file_id}.speedscope.json")
+
+
+@router.delete("/profiles/{file_id}")
+async def delete_profile(file_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Delete the profile of a profiled request (admin only)"""
+    _require_admin(x_admin_token)
+    file_id = _parse_job_id(file_id)
+    
+    profile_path = os.path.join(settings.profile_dir, f"{file_id}.speedscope.json")
+    if not os.path.exists(profile_path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    os.remove(profile_path)
+    return {"message": "Profile deleted", "files": [os.path.basename(profile_path)]}
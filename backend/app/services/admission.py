@@ -0,0 +1,214 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Deque, Optional, Tuple
+from fastapi.responses import JSONResponse
+from app.config import settings
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import ADMITTED_MEMORY_BYTES, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+logger = get_logger(__name__)
+
+MB = 1024 * 1024
+
+
+class AdmissionRejected(Exception):
+    """Raised when a page cannot be admitted; the client should retry after retry_after seconds"""
+    
+    def __init__(self, reason: str, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.reason = reason
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def estimate_page_memory(width: int, height: int) -> int:
+    """
+    Estimate peak memory (bytes) needed to process one page
+    
+    The models' working tensors scale with pixel count, plus a fixed
+    per-page overhead. Long strips that will be tiled only hold
+    tile_workers tiles at once, so they are charged for those.
+    
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+    
+    Returns:
+        Estimated bytes
+    """
+    pixels = width * height
+    if (settings.tiling_enabled and height > settings.tile_height
+            and height >= width * settings.tile_min_aspect_ratio):
+        pixels = min(pixels, width * settings.tile_height * settings.tile_workers)
+    return int(settings.page_memory_base_mb * MB + pixels * settings.page_memory_bytes_per_pixel)
+
+
+class AdmissionController:
+    """
+    Memory-budget gate in front of the pipeline
+    
+    Pages are admitted while their estimated memory fits in the budget. Others
+    wait in a FIFO queue (so large pages are not starved by small ones) up to
+    max_queue_depth; beyond that, or after waiting queue_timeout seconds,
+    they are refused with a suggested retry delay. Must be used from the
+    event loop.
+    """
+    
+    def __init__(self, budget_bytes: int, max_queue_depth: int = 8,
+                 queue_timeout: float = 120.0, default_page_seconds: float = 10.0):
+        """
+        Args:
+            budget_bytes: Total estimated memory that may be admitted at once
+            max_queue_depth: Pages allowed to wait for budget
+            queue_timeout: Seconds a page may wait before being refused
+            default_page_seconds: Page processing time assumed until one is measured
+        """
+        self.budget_bytes = budget_bytes
+        self.max_queue_depth = max_queue_depth
+        self.queue_timeout = queue_timeout
+        self._in_use = 0
+        self._active = 0
+        self._waiters: Deque[Tuple[asyncio.Future, int]] = deque()
+        self._page_seconds = default_page_seconds
+    
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+    
+    def retry_after(self) -> int:
+        """Seconds until capacity is likely free, from the average page time and queue length"""
+        estimate = self._page_seconds * (len(self._waiters) + 1) / max(1, self._active)
+        return max(1, min(300, math.ceil(estimate)))
+    
+    def check_capacity(self):
+        """
+        Refuse early (before the upload is read) when the queue is already full
+        
+        Raises:
+            AdmissionRejected: If no more pages can wait
+        """
+        if len(self._waiters) >= self.max_queue_depth:
+            self._reject("queue_full", "Server is busy, please retry later")
+    
+    @asynccontextmanager
+    async def admit(self, cost: int,
+                    on_queued: Optional[Callable[[int], None]] = None) -> AsyncIterator[None]:
+        """
+        Hold `cost` bytes of the budget for the duration of the block
+        
+        Args:
+            cost: Estimated memory of the page (clamped to the budget, so an
+                  oversized page still runs, alone)
+            on_queued: Called with the queue position if the page has to wait
+        
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        cost = min(cost, self.budget_bytes)
+        if not self._waiters and self._in_use + cost <= self.budget_bytes:
+            self._acquire(cost)
+        else:
+            await self._wait(cost, on_queued)
+        
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._page_seconds = 0.8 * self._page_seconds + 0.2 * elapsed
+            self._release(cost)
+    
+    async def _wait(self, cost: int, on_queued: Optional[Callable[[int], None]]):
+        """Queue for budget; returns once _release has granted it"""
+        self.check_capacity()
+        
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, cost)
+        self._waiters.append(entry)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+        logger.info("⏳ Page queued for memory budget (position %d)", len(self._waiters))
+        if on_queued is not None:
+            on_queued(len(self._waiters))
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted at the same moment: hand the budget back
+                self._release(cost)
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+                # Our slot may have been blocking smaller pages behind us
+                self._grant_waiters()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout", "Timed out waiting for processing capacity, please retry later")
+            raise
+    
+    def _acquire(self, cost: int):
+        self._in_use += cost
+        self._active += 1
+        ADMITTED_MEMORY_BYTES.set(self._in_use)
+    
+    def _release(self, cost: int):
+        self._in_use -= cost
+        self._active -= 1
+        ADMITTED_MEMORY_BYTES.set(self._in_use)
+        self._grant_waiters()
+    
+    def _grant_waiters(self):
+        """Admit queued pages in order while the head of the queue fits"""
+        while self._waiters:
+            future, cost = self._waiters[0]
+            if self._in_use + cost > self.budget_bytes:
+                break
+            self._waiters.popleft()
+            self._acquire(cost)
+            future.set_result(None)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters))
+    
+    def _reject(self, reason: str, detail: str):
+        ADMISSION_REJECTED.labels(reason=reason).inc()
+        retry_after = self.retry_after()
+        logger.warning("🚦 Refusing page (%s), retry after %ds", reason, retry_after)
+        raise AdmissionRejected(reason, detail, retry_after)
+
+
+class AdmissionGateMiddleware:
+    """
+    Answer 429 before the upload body is read when the admission queue is full
+    
+    FastAPI parses multipart bodies before the endpoint runs, so this check
+    has to happen at the ASGI layer to save the transfer.
+    """
+    
+    def __init__(self, app, controller: "AdmissionController", paths: Tuple[str, ...]):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"].startswith(self.paths):
+            try:
+                self.controller.check_capacity()
+            except AdmissionRejected as e:
+                response = JSONResponse(
+                    {"detail": e.detail},
+                    status_code=429,
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+# Shared instance used by the API
+admission_controller = AdmissionController(
+    budget_bytes=settings.memory_budget_mb * MB,
+    max_queue_depth=settings.admission_queue_depth,
+    queue_timeout=settings.admission_queue_timeout
+)
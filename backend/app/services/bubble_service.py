@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+from app.models.detection_batch import DetectionBatch
+
+
+class BubbleService:
+    """Service for filling text inside flat speech bubbles without a neural model"""
+    
+    def __init__(self, max_std: float = 12.0, margin_ratio: float = 0.5, min_background_pixels: int = 50):
+        """
+        Initialize bubble segmentation parameters
+        
+        Args:
+            max_std: Maximum gray-level standard deviation of a flat background
+            margin_ratio: Search window margin relative to the text box height
+            min_background_pixels: Minimum background samples needed to trust the estimate
+        """
+        self.max_std = max_std
+        self.margin_ratio = margin_ratio
+        self.min_background_pixels = min_background_pixels
+    
+    def fill_flat_regions(self,
+                          image: np.ndarray,
+                          mask: np.ndarray,
+                          detected_texts: DetectionBatch,
+                          padding: int = 5) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Fill masked text on near-uniform backgrounds with the estimated flat color
+        
+        Args:
+            image: Input image (BGR format)
+            mask: Binary text mask (255 = text)
+            detected_texts: Detected text regions
+            padding: Padding used when the mask was built (pixels)
+            
+        Returns:
+            Tuple of (filled image, mask of pixels still needing inpainting, regions filled)
+        """
+        result = image.copy()
+        remaining_mask = mask.copy()
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        filled = 0
+        
+        for bbox in detected_texts.boxes.tolist():
+            x, y, w, h = bbox
+            margin = max(10, int(h * self.margin_ratio)) + padding
+            wx1 = max(0, x - margin)
+            wy1 = max(0, y - margin)
+            wx2 = min(width, x + w + margin)
+            wy2 = min(height, y + h + margin)
+            
+            # Only the mask pixels belonging to this text region
+            region_mask = np.zeros((wy2 - wy1, wx2 - wx1), dtype=np.uint8)
+            rx1 = max(0, x - padding) - wx1
+            ry1 = max(0, y - padding) - wy1
+            rx2 = min(width, x + w + padding) - wx1
+            ry2 = min(height, y + h + padding) - wy1
+            region_mask[ry1:ry2, rx1:rx2] = remaining_mask[wy1:wy2, wx1:wx2][ry1:ry2, rx1:rx2]
+            if not region_mask.any():
+                continue
+            
+            window_gray = gray[wy1:wy2, wx1:wx2]
+            bubble = self.segment_bubble(window_gray, region_mask, bbox, (wx1, wy1))
+            if bubble is None:
+                continue
+            
+            color = self._flat_color(result[wy1:wy2, wx1:wx2], window_gray, bubble, region_mask)
+            if color is None:
+                continue
+            
+            # Fill the text pixels that lie inside the bubble
+            fill = cv2.bitwise_and(region_mask, bubble) > 0
+            result[wy1:wy2, wx1:wx2][fill] = color
+            remaining_mask[wy1:wy2, wx1:wx2][fill] = 0
+            filled += 1
+        
+        return result, remaining_mask, filled
+    
+    def segment_bubble(self,
+                       window_gray: np.ndarray,
+                       region_mask: np.ndarray,
+                       bbox: Tuple[int, int, int, int],
+                       offset: Tuple[int, int]) -> Optional[np.ndarray]:
+        """
+        Find the bubble contour enclosing a text box
+        
+        The window is binarized with Otsu, text pixels are merged into the
+        bubble body, and the outer contour containing the box center is kept.
+        
+        Args:
+            window_gray: Grayscale search window around the text box
+            region_mask: Text mask of this region within the window
+            bbox: Text box (x, y, width, height) in page coordinates
+            offset: (x, y) of the window in page coordinates
+            
+        Returns:
+            Filled bubble mask (0/255) within the window or None if not found
+        """
+        _, body = cv2.threshold(window_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        
+        # Dark bubbles (white text) get the opposite polarity
+        if cv2.countNonZero(cv2.bitwise_and(body, cv2.bitwise_not(region_mask))) < body.size // 4:
+            body = cv2.bitwise_not(body)
+        body = cv2.bitwise_or(body, region_mask)
+        
+        contours, _ = cv2.findContours(body, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        x, y, w, h = bbox
+        center = (
+            float(x + w / 2 - offset[0]),
+            float(y + h / 2 - offset[1])
+        )
+        for contour in contours:
+            if cv2.pointPolygonTest(contour, center, False) >= 0:
+                bubble = np.zeros_like(window_gray)
+                cv2.drawContours(bubble, [contour], -1, 255, thickness=cv2.FILLED)
+                return bubble
+        
+        return None
+    
+    def _flat_color(self,
+                    window: np.ndarray,
+                    window_gray: np.ndarray,
+                    bubble: np.ndarray,
+                    region_mask: np.ndarray) -> Optional[Tuple[int, int, int]]:
+        """
+        Estimate the bubble fill color if its background is near-uniform
+        
+        Returns:
+            BGR color or None if the background is textured
+        """
+        # Erode so anti-aliased outline pixels do not count as background
+        interior = cv2.erode(bubble, np.ones((3, 3), np.uint8), iterations=1)
+        background = (interior > 0) & (region_mask == 0)
+        
+        if np.count_nonzero(background) < self.min_background_pixels:
+            return None
+        if float(window_gray[background].std()) > self.max_std:
+            return None
+        
+        color = np.median(window[background], axis=0)
+        return tuple(int(c) for c in color)
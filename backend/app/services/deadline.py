@@ -0,0 +1,86 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from app.config import settings
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import DEADLINE_DEGRADATIONS
+
+logger = get_logger(__name__)
+
+# Degradations in the order they kick in as the budget runs out
+CUT_RETRIES = "translation_retries_cut"  # Translators are tried once each, without backoff sleeps
+INPAINT_FALLBACK = "inpainting_fallback"  # OpenCV (after bubble flat fill) instead of the inpainting model
+FAST_RENDERING = "fast_rendering"  # Font sizes estimated instead of searched
+DEGRADATION_ORDER = (CUT_RETRIES, INPAINT_FALLBACK, FAST_RENDERING)
+
+
+def degradation_cutoffs() -> Dict[str, float]:
+    """Share of the budget left below which each degradation applies"""
+    return {
+        CUT_RETRIES: settings.deadline_cut_retries_below,
+        INPAINT_FALLBACK: settings.deadline_inpaint_fallback_below,
+        FAST_RENDERING: settings.deadline_fast_render_below,
+    }
+
+
+class Deadline:
+    """
+    Latency budget of one request, tracked across pipeline stages
+    
+    The clock starts when the request arrives (upload and queueing count
+    against the budget) and uses wall time, so the deadline can travel to a
+    worker process inside a queued job. Each stage asks whether its
+    degradation applies before doing expensive work; a degradation applies
+    once the remaining share of the budget drops below its cutoff, and the
+    cutoffs shrink along DEGRADATION_ORDER, so quality is given up in that
+    order. Nothing is ever aborted: a late page is still finished, just as
+    cheaply as possible.
+    """
+    
+    def __init__(self, budget: float, started_at: Optional[float] = None,
+                 cutoffs: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            budget: Seconds the whole request may take
+            started_at: time.time() when the request arrived (default: now)
+            cutoffs: Remaining budget share per degradation (default: settings)
+        """
+        self.budget = budget
+        self.started_at = started_at if started_at is not None else time.time()
+        self.cutoffs = cutoffs or degradation_cutoffs()
+        self.degradations: List[str] = []
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_request(cls, seconds: Optional[float], started_at: Optional[float] = None) -> Optional["Deadline"]:
+        """Deadline for a request's budget (falling back to settings.default_deadline); None if there is none"""
+        budget = seconds or settings.default_deadline
+        return cls(budget, started_at) if budget and budget > 0 else None
+    
+    def remaining(self) -> float:
+        """Seconds left (negative once the deadline has passed)"""
+        return self.started_at + self.budget - time.time()
+    
+    def remaining_share(self) -> float:
+        """Share of the budget left, 0-1"""
+        return min(max(self.remaining() / self.budget, 0.0), 1.0)
+    
+    def degrade(self, step: str) -> bool:
+        """
+        Whether a degradation applies now; the first time it does, it is recorded
+        
+        Args:
+            step: One of DEGRADATION_ORDER
+        
+        Returns:
+            True if the caller should take its cheaper path
+        """
+        with self._lock:
+            if step in self.degradations:
+                return True
+            if self.remaining_share() >= self.cutoffs[step]:
+                return False
+            self.degradations.append(step)
+        DEADLINE_DEGRADATIONS.labels(step=step).inc()
+        logger.info("⏱️ %.1fs of %.1fs budget left, degrading: %s", max(self.remaining(), 0.0), self.budget, step)
+        return True
@@ -0,0 +1,207 @@
+import numpy as np
+from typing import Dict, List, Sequence
+from app.models.detection_batch import DetectionBatch
+from app.utils.spatial_index import GridIndex
+
+
+class TextGroupingService:
+    """
+    Service for merging OCR line fragments into bubble-level text blocks
+    
+    EasyOCR returns one box per line (sometimes per word). Fragments that sit
+    on the same row with a word-sized gap, or are stacked with a line-sized
+    gap and overlap horizontally, are joined into one region whose text reads
+    top to bottom, so translation sees whole sentences and rendering gets the
+    whole bubble to lay out.
+    """
+    
+    def __init__(self,
+                 line_gap_ratio: float = 0.8,
+                 word_gap_ratio: float = 1.0,
+                 min_overlap_ratio: float = 0.3,
+                 max_height_ratio: float = 1.8,
+                 reading_direction: str = "ltr"):
+        """
+        Initialize grouping parameters
+        
+        Args:
+            line_gap_ratio: Max vertical gap between stacked lines, relative to line height
+            word_gap_ratio: Max horizontal gap between fragments on one row, relative to line height
+            min_overlap_ratio: Min horizontal overlap of stacked lines, relative to the narrower one
+            max_height_ratio: Max height ratio of fragments in one block (keeps titles apart)
+            reading_direction: "ltr" or "rtl" order of blocks within a row of the page
+        """
+        self.line_gap_ratio = line_gap_ratio
+        self.word_gap_ratio = word_gap_ratio
+        self.min_overlap_ratio = min_overlap_ratio
+        self.max_height_ratio = max_height_ratio
+        self.reading_direction = reading_direction
+    
+    def group(self, detected_texts: DetectionBatch) -> DetectionBatch:
+        """
+        Cluster fragments into blocks and return them in reading order
+        
+        A grid index limits each fragment's neighbour search to nearby cells,
+        so grouping is O(n) on average plus the O(n log n) ordering. Block
+        boxes and confidences are computed per cluster with NumPy reductions;
+        only the text of multi-fragment blocks is joined in Python.
+        
+        Args:
+            detected_texts: Line-level detections
+            
+        Returns:
+            Block-level detections; merged blocks keep their line boxes
+        """
+        n = len(detected_texts)
+        if n < 2:
+            return detected_texts
+        
+        boxes = detected_texts.boxes.tolist()
+        cell_size = int(np.median(detected_texts.boxes[:, 3]) * 4)
+        index = GridIndex(cell_size)
+        for i, (x, y, w, h) in enumerate(boxes):
+            index.insert(i, x, y, x + w, y + h)
+        
+        parent = list(range(n))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        for i, b in enumerate(boxes):
+            x, y, w, h = b
+            reach_x = h * self.word_gap_ratio
+            reach_y = h * self.line_gap_ratio
+            for j in index.query(x - reach_x, y - reach_y, x + w + reach_x, y + h + reach_y):
+                if j > i and self._belongs_together(b, boxes[j]):
+                    parent[find(j)] = find(i)
+        
+        # Blocks numbered in order of their first fragment
+        _, first, labels = np.unique([find(i) for i in range(n)], return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        labels = rank[labels.reshape(-1)]
+        blocks = self._merge(detected_texts, labels, len(order))
+        return blocks.take(self.reading_order(blocks, self.reading_direction))
+    
+    def _belongs_together(self, a: Sequence[int], b: Sequence[int]) -> bool:
+        """Whether two fragments (x, y, width, height) are parts of the same text block"""
+        ax, ay, aw, ah = a
+        bx, by, bw, bh = b
+        min_height = min(ah, bh)
+        if min_height <= 0 or max(ah, bh) / min_height > self.max_height_ratio:
+            return False
+        
+        # Words of the same line
+        vertical_overlap = min(ay + ah, by + bh) - max(ay, by)
+        if vertical_overlap >= 0.5 * min_height:
+            horizontal_gap = max(ax, bx) - min(ax + aw, bx + bw)
+            return horizontal_gap <= self.word_gap_ratio * min_height
+        
+        # Stacked lines
+        vertical_gap = -vertical_overlap
+        if vertical_gap > self.line_gap_ratio * min_height:
+            return False
+        horizontal_overlap = min(ax + aw, bx + bw) - max(ax, bx)
+        return horizontal_overlap >= self.min_overlap_ratio * min(aw, bw)
+    
+    def _merge(self, detected_texts: DetectionBatch, labels: np.ndarray, count: int) -> DetectionBatch:
+        """
+        Build one region per block from the fragments' block labels
+        
+        Multi-fragment blocks get the union box, the mean confidence, the text
+        read rows top to bottom and words left to right, and the fragments'
+        boxes (or their own line boxes) as line boxes.
+        """
+        corners = detected_texts.corners()
+        x1 = np.full(count, np.iinfo(np.int32).max, dtype=np.int32)
+        y1 = x1.copy()
+        x2 = np.full(count, np.iinfo(np.int32).min, dtype=np.int32)
+        y2 = x2.copy()
+        np.minimum.at(x1, labels, corners[:, 0])
+        np.minimum.at(y1, labels, corners[:, 1])
+        np.maximum.at(x2, labels, corners[:, 2])
+        np.maximum.at(y2, labels, corners[:, 3])
+        sizes = np.bincount(labels, minlength=count)
+        confidences = np.bincount(labels, weights=detected_texts.confidences, minlength=count) / sizes
+        
+        # Singleton blocks keep their fragment's columns as they are
+        first = np.full(count, -1, dtype=np.intp)
+        first[labels[::-1]] = np.arange(len(labels))[::-1]
+        blocks = detected_texts.take(first)
+        blocks.boxes = np.stack([x1, y1, x2 - x1, y2 - y1], axis=1)
+        
+        merged = sizes[labels] > 1
+        members = np.flatnonzero(merged)
+        boxes = detected_texts.boxes.tolist()
+        for label, rows in self._split_by(labels[members], members).items():
+            blocks.texts[label] = self._join_text(detected_texts.texts, boxes, rows)
+            blocks.confidences[label] = round(float(confidences[label]), 3)
+        
+        # Line boxes: existing ones are carried over, unsplit fragments of merged blocks become lines
+        has_lines = np.bincount(detected_texts.line_owner, minlength=len(labels)) > 0
+        as_lines = merged & ~has_lines
+        line_boxes = np.concatenate([detected_texts.line_boxes, detected_texts.boxes[as_lines]])
+        line_owner = np.concatenate([labels[detected_texts.line_owner], labels[as_lines]])
+        order = np.lexsort((line_boxes[:, 1], line_owner))
+        blocks.line_boxes = line_boxes[order]
+        blocks.line_owner = line_owner[order].astype(np.int32)
+        return blocks
+    
+    @staticmethod
+    def _split_by(labels: np.ndarray, rows: np.ndarray) -> Dict[int, List[int]]:
+        """Group row numbers by label"""
+        groups: Dict[int, List[int]] = {}
+        for label, row in zip(labels.tolist(), rows.tolist()):
+            groups.setdefault(label, []).append(row)
+        return groups
+    
+    def _join_text(self, texts: np.ndarray, boxes: List[List[int]], indices: List[int]) -> str:
+        """Join the fragments of one block, reading rows top to bottom and words left to right"""
+        text = ""
+        for row in self._rows(boxes, indices):
+            line = " ".join(texts[i] for i in sorted(row, key=lambda i: boxes[i][0]))
+            if text.endswith("-") and line[:1].isalpha():
+                # Word hyphenated across the line break
+                text = text[:-1] + line
+            else:
+                text = f"{text} {line}" if text else line
+        return text
+    
+    @staticmethod
+    def _rows(boxes: List[List[int]], indices: Sequence[int]) -> List[List[int]]:
+        """Split regions into rows: a region starts a new row when its center is below the current row"""
+        rows: List[List[int]] = []
+        row_bottom = None
+        for i in sorted(indices, key=lambda i: boxes[i][1]):
+            _, y, _, height = boxes[i]
+            center = y + height / 2
+            if row_bottom is None or center > row_bottom:
+                rows.append([i])
+                row_bottom = y + height
+            else:
+                rows[-1].append(i)
+                row_bottom = max(row_bottom, y + height)
+        return rows
+    
+    @classmethod
+    def reading_order(cls, detected_texts: DetectionBatch, direction: str = "ltr") -> List[int]:
+        """
+        Sort regions into page reading order
+        
+        Args:
+            detected_texts: Regions to sort
+            direction: "ltr" (western comics) or "rtl" (manga) within a row
+            
+        Returns:
+            Row numbers of the regions row by row, top to bottom
+            (use with DetectionBatch.take)
+        """
+        boxes = detected_texts.boxes.tolist()
+        ordered = []
+        for row in cls._rows(boxes, range(len(boxes))):
+            ordered.extend(sorted(row, key=lambda i: boxes[i][0], reverse=(direction == "rtl")))
+        return ordered
@@ -3,6 +3,11 @@ import numpy as np
 from typing import Optional
 from simple_lama_inpainting import SimpleLama
 import time
+from app.utils.metrics import INPAINTING_BACKEND
+from app.utils.logging_utils import get_logger
+from app.utils.prefork import prepare_for_inference
+
+logger = get_logger(__name__)
 
 
 class InpaintingService:
@@ -18,40 +23,46 @@ class InpaintingService:
         last_error = None
         for attempt in range(max_retries):
             try:
-                print(f"📥 Loading LaMa inpainting model (attempt {attempt + 1}/{max_retries})...")
+                logger.info("📥 Loading LaMa inpainting model (attempt %d/%d)...", attempt + 1, max_retries)
                 self.lama_model = SimpleLama()
-                print("✅ LaMa inpainting model initialized")
+                logger.info("✅ LaMa inpainting model initialized")
                 return
             except Exception as e:
                 last_error = e
                 if "urlopen error" in str(e) or "name resolution" in str(e) or "Connection" in str(e):
-                    print(f"⚠️ Network error during LaMa model download (attempt {attempt + 1}/{max_retries})")
+                    logger.warning("⚠️ Network error during LaMa model download (attempt %d/%d)", attempt + 1, max_retries)
                     if attempt < max_retries - 1:
                         wait_time = (attempt + 1) * 2
-                        print(f"⏳ Retrying in {wait_time} seconds...")
+                        logger.info("⏳ Retrying in %s seconds...", wait_time)
                         time.sleep(wait_time)
                     else:
-                        print(f"❌ Failed to download LaMa model after {max_retries} attempts")
-                        print("📝 Falling back to OpenCV inpainting")
+                        logger.error("❌ Failed to download LaMa model after %d attempts", max_retries)
+                        logger.warning("📝 Falling back to OpenCV inpainting")
                 else:
-                    print(f"⚠️ Failed to initialize LaMa model: {e}")
-                    print("📝 Falling back to OpenCV inpainting")
+                    logger.warning("⚠️ Failed to initialize LaMa model: %s", e)
+                    logger.warning("📝 Falling back to OpenCV inpainting")
                     break
         
         self.lama_model = None
     
-    def inpaint(self, image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    def preload(self):
+        """Ready the loaded LaMa model for inference (shared by worker processes forked afterwards)"""
+        if self.lama_model is not None:
+            prepare_for_inference(self.lama_model.model)
+    
+    def inpaint(self, image: np.ndarray, mask: np.ndarray, use_model: bool = True) -> np.ndarray:
         """
         Remove text from image using inpainting
         
         Args:
             image: Input image (BGR format)
             mask: Binary mask where white (255) indicates areas to inpaint
+            use_model: Use LaMa when available (False: OpenCV only)
             
         Returns:
             Inpainted image with text removed
         """
-        if self.lama_model is not None:
+        if use_model and self.lama_model is not None:
             return self._inpaint_with_lama(image, mask)
         else:
             return self._inpaint_with_opencv(image, mask)
@@ -81,21 +92,24 @@ class InpaintingService:
             # Convert back to BGR
             result_bgr = cv2.cvtColor(result_rgb, cv2.COLOR_RGB2BGR)
             
-            print("✅ Inpainting completed with LaMa model")
+            logger.debug("✅ Inpainting completed with LaMa model")
+            INPAINTING_BACKEND.labels(backend="lama").inc()
             return result_bgr
             
         except Exception as e:
-            print(f"⚠️ LaMa inpainting failed: {e}")
-            print("📝 Falling back to OpenCV inpainting")
-            return self._inpaint_with_opencv(image, mask)
+            logger.warning("⚠️ LaMa inpainting failed: %s", e)
+            logger.warning("📝 Falling back to OpenCV inpainting")
+            INPAINTING_BACKEND.labels(backend="lama_fallback_opencv").inc()
+            return self._inpaint_with_opencv(image, mask, record=False)
     
-    def _inpaint_with_opencv(self, image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    def _inpaint_with_opencv(self, image: np.ndarray, mask: np.ndarray, record: bool = True) -> np.ndarray:
         """
         Inpaint using OpenCV (fallback method)
         
         Args:
             image: Input image (BGR format)
             mask: Binary mask
+            record: Count this run in the inpainting backend metric
             
         Returns:
             Inpainted image
@@ -107,7 +121,9 @@ class InpaintingService:
         # Use Telea algorithm for inpainting
         result = cv2.inpaint(image, mask, inpaintRadius=3, flags=cv2.INPAINT_TELEA)
         
-        print("✅ Inpainting completed with OpenCV")
+        logger.debug("✅ Inpainting completed with OpenCV")
+        if record:
+            INPAINTING_BACKEND.labels(backend="opencv").inc()
         return result
     
     def enhance_mask(self, mask: np.ndarray, dilation_size: int = 3) -> np.ndarray:
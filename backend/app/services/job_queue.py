@@ -0,0 +1,497 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional
+from app.config import settings
+from app.models.schemas import ProcessingStatus
+from app.services.progress import ProgressCallback, TERMINAL_STAGES, build_status
+from app.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobTimeout(Exception):
+    """Raised when no worker finished a job within the wait timeout"""
+
+
+class JobQueue(ABC):
+    """
+    Shared queue of page jobs plus a store for their progress and results
+    
+    API replicas enqueue jobs and wait for the result; pipeline workers
+    (python -m app.worker) take jobs, process them and store the outcome.
+    Jobs, statuses and results are JSON-serializable dicts. The images
+    themselves stay in temp_dir, which all replicas and workers must share
+    (one volume), so any replica can serve any result under /static.
+    
+    A taken job is leased to its worker, which renews the lease while it
+    works on the page (see JobWorker); a job whose worker dies is handed out
+    again once its lease expires.
+    """
+    
+    # True when workers run as threads of the API process (no separate worker containers)
+    in_process = False
+    
+    def __init__(self, lease_seconds: float = 600.0, result_ttl: float = 3600.0,
+                 poll_interval: float = 0.25):
+        """
+        Args:
+            lease_seconds: Time a worker may hold a job without renewing its lease
+                           before the job is re-queued
+            result_ttl: Seconds results and statuses are kept after a job finishes
+            poll_interval: Seconds between checks while waiting for work or results
+        """
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+    
+    # Backend operations (blocking; call from worker threads or via asyncio.to_thread)
+    
+    @abstractmethod
+    def enqueue(self, job: Dict):
+        """Add a job (a dict with a unique "job_id") to the end of the queue"""
+    
+    @abstractmethod
+    def dequeue(self, timeout: float) -> Optional[Dict]:
+        """Take and lease the oldest queued job, waiting up to timeout seconds; None if there is none"""
+    
+    @abstractmethod
+    def renew(self, job_id: str):
+        """Extend the lease of a job taken by this worker (call well within lease_seconds)"""
+    
+    @abstractmethod
+    def complete(self, job_id: str, outcome: Dict):
+        """Store a job's outcome ({"ok": True, "result": ...} or {"ok": False, "error": ...})"""
+    
+    @abstractmethod
+    def take_result(self, job_id: str) -> Optional[Dict]:
+        """Remove and return a job's outcome, or None while it is not finished"""
+    
+    @abstractmethod
+    def set_status(self, job_id: str, status: str):
+        """Store the latest ProcessingStatus (JSON) of a job"""
+    
+    @abstractmethod
+    def get_status(self, job_id: str) -> Optional[str]:
+        """Latest ProcessingStatus (JSON) of a job, if any"""
+    
+    @abstractmethod
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+    
+    # Helpers built on the operations above
+    
+    def reporter(self, job_id: str) -> ProgressCallback:
+        """
+        Progress callback that publishes updates through the shared store
+        
+        Writes block briefly, so call it from worker threads. Progress is
+        best-effort: a failed write is logged and the job carries on.
+        """
+        def report(stage: str, fraction: float = 0.0, message: str = ""):
+            try:
+                self.set_status(job_id, build_status(job_id, stage, fraction, message).model_dump_json())
+            except Exception as e:
+                logger.warning("⚠️ Failed to publish progress: %s", e)
+        
+        return report
+    
+    async def submit(self, job: Dict, timeout: float) -> Dict:
+        """
+        Enqueue a job and wait for a worker to finish it
+        
+        Args:
+            job: Job dict with a unique "job_id"
+            timeout: Seconds to wait for the outcome
+        
+        Returns:
+            The job's outcome dict
+        
+        Raises:
+            JobTimeout: If no outcome arrived in time
+        """
+        await asyncio.to_thread(self.enqueue, job)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            outcome = await asyncio.to_thread(self.take_result, job["job_id"])
+            if outcome is not None:
+                return outcome
+            await asyncio.sleep(self.poll_interval)
+        raise JobTimeout(f"No worker finished job {job['job_id']} within {timeout:.0f}s")
+    
+    async def watch_progress(self, job_id: str,
+                             keepalive_seconds: float = 15.0) -> AsyncIterator[Optional[ProcessingStatus]]:
+        """
+        Yield status updates for a job until it completes or fails
+        
+        Same contract as ProgressBroker.subscribe, but served from the shared
+        store so the stream can be opened on any API replica.
+        """
+        last = None
+        idle_since = time.monotonic()
+        while True:
+            raw = await asyncio.to_thread(self.get_status, job_id)
+            now = time.monotonic()
+            if raw is not None and raw != last:
+                last = raw
+                idle_since = now
+                status = ProcessingStatus.model_validate_json(raw)
+                yield status
+                if status.stage in TERMINAL_STAGES:
+                    return
+            elif now - idle_since >= keepalive_seconds:
+                idle_since = now
+                yield None
+            await asyncio.sleep(self.poll_interval)
+
+
+class LocalJobQueue(JobQueue):
+    """
+    In-memory queue with workers running as threads of the API process
+    
+    Stand-in for the shared backends in tests and single-container setups;
+    nothing is shared between processes.
+    """
+    
+    in_process = True
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Condition()
+        self._queue: Deque[Dict] = deque()
+        self._results: Dict[str, Dict] = {}
+        self._statuses: Dict[str, str] = {}
+        self._finished_at: Dict[str, float] = {}
+    
+    def enqueue(self, job: Dict):
+        with self._lock:
+            self._queue.append(job)
+            self._lock.notify()
+    
+    def dequeue(self, timeout: float) -> Optional[Dict]:
+        with self._lock:
+            if not self._lock.wait_for(lambda: self._queue, timeout=timeout):
+                return None
+            return self._queue.popleft()
+    
+    def renew(self, job_id: str):
+        pass  # Jobs are never re-queued: workers die with the process that holds the queue
+    
+    def complete(self, job_id: str, outcome: Dict):
+        now = time.monotonic()
+        with self._lock:
+            self._results[job_id] = outcome
+            self._finished_at[job_id] = now
+            # Forget jobs finished long ago (results nobody collected, old statuses)
+            for finished_id, finished_at in list(self._finished_at.items()):
+                if now - finished_at > self.result_ttl:
+                    self._results.pop(finished_id, None)
+                    self._statuses.pop(finished_id, None)
+                    self._finished_at.pop(finished_id, None)
+    
+    def take_result(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._results.pop(job_id, None)
+    
+    def set_status(self, job_id: str, status: str):
+        with self._lock:
+            self._statuses[job_id] = status
+    
+    def get_status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            return self._statuses.get(job_id)
+    
+    def depth(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Queue and result store in one SQLite database on a shared volume
+    
+    Needs no extra service; suitable for replicas and workers on one host
+    (SQLite locking is unreliable over network filesystems).
+    """
+    
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: Database file (created if missing)
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    result TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at);
+                CREATE TABLE IF NOT EXISTS statuses (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Connection of the calling thread (sqlite3 connections are not shared across threads)"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit; transactions are opened explicitly where needed
+            connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+    
+    def enqueue(self, job: Dict):
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, payload, state, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+            (job["job_id"], json.dumps(job), now, now)
+        )
+    
+    def dequeue(self, timeout: float) -> Optional[Dict]:
+        deadline = time.monotonic() + timeout
+        connection = self._connect()
+        while True:
+            now = time.time()
+            # Claim the oldest job atomically; expired leases go back to the queue first
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "UPDATE jobs SET state = 'queued' WHERE state = 'running' AND updated_at < ?",
+                    (now - self.lease_seconds,)
+                )
+                row = connection.execute(
+                    "SELECT id, payload FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE jobs SET state = 'running', updated_at = ? WHERE id = ?", (now, row[0])
+                    )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            
+            if row is not None:
+                return json.loads(row[1])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+    
+    def renew(self, job_id: str):
+        self._connect().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND state = 'running'", (time.time(), job_id)
+        )
+    
+    def complete(self, job_id: str, outcome: Dict):
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "UPDATE jobs SET state = 'done', result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(outcome), now, job_id)
+        )
+        connection.execute("DELETE FROM jobs WHERE state = 'done' AND updated_at < ?", (now - self.result_ttl,))
+        connection.execute("DELETE FROM statuses WHERE updated_at < ?", (now - self.result_ttl,))
+    
+    def take_result(self, job_id: str) -> Optional[Dict]:
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT result FROM jobs WHERE id = ? AND state = 'done'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(row[0])
+    
+    def set_status(self, job_id: str, status: str):
+        self._connect().execute(
+            "INSERT INTO statuses (id, status, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+            (job_id, status, time.time())
+        )
+    
+    def get_status(self, job_id: str) -> Optional[str]:
+        row = self._connect().execute("SELECT status FROM statuses WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+    
+    def depth(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+
+class RedisJobQueue(JobQueue):
+    """
+    Queue and result store in Redis (6.2+), for replicas and workers on several hosts
+    
+    Job ids move from the queue list to a processing list when taken, and
+    each taken job gets a lease key in the same script, so no reclaim can
+    see a taken job without a lease. The lease expires if its worker dies
+    (stops renewing it), after which the job is pushed back to the front of
+    the queue.
+    """
+    
+    # Move the oldest job to the processing list and lease it, atomically
+    _CLAIM = """
+        local job_id = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+        if job_id then
+            redis.call('SET', ARGV[1] .. job_id, '1', 'EX', ARGV[2])
+        end
+        return job_id
+    """
+    
+    # Extend a lease, unless the job was already re-queued
+    _RENEW = """
+        if redis.call('LPOS', KEYS[1], ARGV[2]) then
+            return redis.call('SET', ARGV[1] .. ARGV[2], '1', 'EX', ARGV[3])
+        end
+        return false
+    """
+    
+    # Push processing jobs without a lease back to the front of the queue
+    _RECLAIM = """
+        local requeued = {}
+        for _, job_id in ipairs(redis.call('LRANGE', KEYS[2], 0, -1)) do
+            if redis.call('EXISTS', ARGV[1] .. job_id) == 0 then
+                redis.call('LREM', KEYS[2], 1, job_id)
+                redis.call('RPUSH', KEYS[1], job_id)
+                table.insert(requeued, job_id)
+            end
+        end
+        return requeued
+    """
+    
+    def __init__(self, url: str, prefix: str = "mangama", **kwargs):
+        """
+        Args:
+            url: Redis URL, e.g. redis://redis:6379/0
+            prefix: Key namespace
+        """
+        super().__init__(**kwargs)
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("JOB_QUEUE_BACKEND=redis requires the 'redis' package (pip install redis)")
+        
+        # The client's connection pool is thread-safe
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._queue_key = f"{prefix}:queue"
+        self._processing_key = f"{prefix}:processing"
+        self._prefix = prefix
+        self._lease_prefix = self._key("lease", "")
+        self._lease_ex = max(1, int(self.lease_seconds))
+        self._claim = self._redis.register_script(self._CLAIM)
+        self._renew = self._redis.register_script(self._RENEW)
+        self._reclaim = self._redis.register_script(self._RECLAIM)
+        self._last_reclaim = 0.0
+    
+    def _key(self, kind: str, job_id: str) -> str:
+        return f"{self._prefix}:{kind}:{job_id}"
+    
+    def enqueue(self, job: Dict):
+        job_id = job["job_id"]
+        pipe = self._redis.pipeline()
+        pipe.set(self._key("job", job_id), json.dumps(job), ex=int(self.result_ttl))
+        pipe.lpush(self._queue_key, job_id)
+        pipe.execute()
+    
+    def dequeue(self, timeout: float) -> Optional[Dict]:
+        deadline = time.monotonic() + timeout
+        while True:
+            self._reclaim_expired()
+            # Scripts cannot block, so poll like SQLiteJobQueue instead of BLMOVE
+            job_id = self._claim(keys=[self._queue_key, self._processing_key],
+                                 args=[self._lease_prefix, self._lease_ex])
+            if job_id is not None:
+                break
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+        
+        payload = self._redis.get(self._key("job", job_id))
+        if payload is None:
+            # Expired while waiting; nobody is waiting for it anymore
+            pipe = self._redis.pipeline()
+            pipe.lrem(self._processing_key, 1, job_id)
+            pipe.delete(self._key("lease", job_id))
+            pipe.execute()
+            return None
+        return json.loads(payload)
+    
+    def renew(self, job_id: str):
+        if not self._renew(keys=[self._processing_key], args=[self._lease_prefix, job_id, self._lease_ex]):
+            logger.warning("⚠️ Lease of job %s already expired; it may run twice", job_id)
+    
+    def _reclaim_expired(self):
+        """Push jobs whose lease expired (worker died) back to the front of the queue"""
+        now = time.monotonic()
+        if now - self._last_reclaim < self.lease_seconds / 10:
+            return
+        self._last_reclaim = now
+        for job_id in self._reclaim(keys=[self._queue_key, self._processing_key], args=[self._lease_prefix]):
+            logger.warning("♻️ Re-queueing job %s (worker lease expired)", job_id)
+    
+    def complete(self, job_id: str, outcome: Dict):
+        pipe = self._redis.pipeline()
+        pipe.set(self._key("result", job_id), json.dumps(outcome), ex=int(self.result_ttl))
+        pipe.lrem(self._processing_key, 1, job_id)
+        pipe.delete(self._key("job", job_id), self._key("lease", job_id))
+        pipe.execute()
+    
+    def take_result(self, job_id: str) -> Optional[Dict]:
+        payload = self._redis.getdel(self._key("result", job_id))
+        return json.loads(payload) if payload is not None else None
+    
+    def set_status(self, job_id: str, status: str):
+        self._redis.set(self._key("status", job_id), status, ex=int(self.result_ttl))
+    
+    def get_status(self, job_id: str) -> Optional[str]:
+        return self._redis.get(self._key("status", job_id))
+    
+    def depth(self) -> int:
+        return self._redis.llen(self._queue_key)
+
+
+def create_job_queue(backend: str, url: str = "", **kwargs) -> Optional[JobQueue]:
+    """
+    Build the configured job queue
+    
+    Args:
+        backend: "inline" (no queue, the API runs pages itself), "local",
+                 "sqlite" or "redis"
+        url: SQLite database path or Redis URL
+        **kwargs: lease_seconds, result_ttl, poll_interval
+    
+    Returns:
+        The queue, or None for inline processing
+    """
+    backend = backend.lower()
+    if backend == "inline":
+        return None
+    if backend == "local":
+        return LocalJobQueue(**kwargs)
+    if backend == "sqlite":
+        return SQLiteJobQueue(url, **kwargs)
+    if backend == "redis":
+        return RedisJobQueue(url, **kwargs)
+    raise ValueError(f"Unknown job queue backend: {backend}")
+
+
+# Shared instance (None when pages are processed inline by the API)
+job_queue = create_job_queue(
+    settings.job_queue_backend,
+    settings.job_queue_url,
+    lease_seconds=settings.job_lease_seconds,
+    result_ttl=settings.job_result_ttl
+)
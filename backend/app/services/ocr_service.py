@@ -1,11 +1,17 @@
 import easyocr
 import cv2
 import numpy as np
-from typing import List, Tuple
-from app.models.schemas import DetectedText, BoundingBox
+from typing import Tuple, Optional
+from app.models.detection_batch import DetectionBatch
 from app.config import settings
+from app.utils.image_utils import extract_ink_mask
+from app.utils.logging_utils import get_logger
+from app.utils.prefork import prepare_for_inference
+import threading
 import time
 
+logger = get_logger(__name__)
+
 
 class OCRService:
     """Service for text detection and recognition using EasyOCR"""
@@ -14,122 +20,138 @@ class OCRService:
         """Initialize EasyOCR reader"""
         self.reader = None
         self.current_gpu_mode = None
-        print("⏳ OCR Service created, will initialize on first use")
+        self.current_quantized = None
+        self._init_lock = threading.Lock()
+        logger.info("⏳ OCR Service created, will initialize on first use")
     
-    def _initialize_reader(self, use_gpu: bool = False, max_retries: int = 3):
+    def _initialize_reader(self, use_gpu: bool = False, max_retries: int = 3,
+                           quantize: Optional[bool] = None):
         """Lazy initialization of EasyOCR reader with retry"""
-        # Check if we need to reinitialize (GPU mode changed)
-        if self.reader is not None and self.current_gpu_mode == use_gpu:
+        # Quantization only applies to CPU inference
+        if quantize is None:
+            quantize = settings.ocr_quantize
+        quantize = quantize and not use_gpu
+        
+        # Check if we need to reinitialize (GPU or quantization mode changed)
+        if (self.reader is not None and self.current_gpu_mode == use_gpu
+                and self.current_quantized == quantize):
             return
         
-        # If GPU mode changed, reinitialize
-        if self.reader is not None and self.current_gpu_mode != use_gpu:
-            print(f"🔄 GPU mode changed from {self.current_gpu_mode} to {use_gpu}, reinitializing...")
+        # If GPU or quantization mode changed, reinitialize
+        if self.reader is not None:
+            logger.info("🔄 OCR mode changed (gpu=%s, quantized=%s), reinitializing...", use_gpu, quantize)
             self.reader = None
         
         last_error = None
         for attempt in range(max_retries):
             try:
                 device = 'GPU (Ekran Kartı)' if use_gpu else 'CPU (İşlemci)'
-                print(f"📥 Downloading EasyOCR models with {device} (attempt {attempt + 1}/{max_retries})...")
+                logger.info("📥 Downloading EasyOCR models with %s (attempt %d/%d)...", device, attempt + 1, max_retries)
+                # EasyOCR applies dynamic int8 quantization itself when loading
+                # on CPU, and does so unless told not to; only the recognizer's
+                # LSTM and linear layers change (the detector is all conv)
                 self.reader = easyocr.Reader(
                     settings.ocr_languages_list,
                     gpu=use_gpu,
                     verbose=True,
-                    download_enabled=True
+                    download_enabled=True,
+                    quantize=quantize
                 )
                 self.current_gpu_mode = use_gpu
-                print(f"✅ EasyOCR initialized successfully with {device}")
+                self.current_quantized = quantize
+                logger.info("✅ EasyOCR initialized successfully with %s", device)
                 return
             except Exception as e:
                 last_error = e
                 if "urlopen error" in str(e) or "name resolution" in str(e) or "Connection" in str(e):
                     wait_time = (attempt + 1) * 2  # Progressive backoff: 2s, 4s, 6s
-                    print(f"⚠️ Network error during EasyOCR initialization (attempt {attempt + 1}/{max_retries})")
+                    logger.warning("⚠️ Network error during EasyOCR initialization (attempt %d/%d)", attempt + 1, max_retries)
                     if attempt < max_retries - 1:
-                        print(f"⏳ Retrying in {wait_time} seconds...")
+                        logger.info("⏳ Retrying in %s seconds...", wait_time)
                         time.sleep(wait_time)
                     else:
-                        print(f"❌ Failed to initialize EasyOCR after {max_retries} attempts due to network issues")
-                        print(f"💡 Please check your internet connection or DNS settings")
+                        logger.error("❌ Failed to initialize EasyOCR after %d attempts due to network issues", max_retries)
+                        logger.error("💡 Please check your internet connection or DNS settings")
                 else:
-                    print(f"❌ Failed to initialize EasyOCR: {e}")
+                    logger.error("❌ Failed to initialize EasyOCR: %s", e)
                     break
         
         raise RuntimeError(f"Failed to initialize EasyOCR: {last_error}")
     
-    def detect_text(self, image_path: str, use_gpu: bool = False) -> List[DetectedText]:
+    def preload(self, use_gpu: bool = False):
+        """
+        Load the reader now instead of on the first page, ready for inference
+        
+        Worker processes forked afterwards share the loaded networks.
+        """
+        with self._init_lock:
+            self._initialize_reader(use_gpu=use_gpu)
+        prepare_for_inference(self.reader.detector)
+        prepare_for_inference(self.reader.recognizer)
+    
+    def detect_text(self, image_path: str, use_gpu: bool = False,
+                    image: Optional[np.ndarray] = None, y_offset: int = 0) -> DetectionBatch:
         """
         Detect and extract text from image
         
         Args:
             image_path: Path to the manga page image
             use_gpu: Whether to use GPU for detection (default: False)
+            image: Already decoded pixels to scan instead of reading image_path
+                   (e.g. one tile of a long strip)
+            y_offset: Page row of the first row of `image`; boxes are returned
+                      in page coordinates
             
         Returns:
-            List of DetectedText objects with bounding boxes and extracted text
+            DetectionBatch with the bounding boxes and extracted text
         """
-        # Initialize reader on first use
-        self._initialize_reader(use_gpu=use_gpu)
+        # Initialize reader on first use (pages may arrive on several threads)
+        with self._init_lock:
+            self._initialize_reader(use_gpu=use_gpu)
         
         # Read image
-        image = cv2.imread(image_path)
         if image is None:
-            raise ValueError(f"Failed to read image: {image_path}")
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Failed to read image: {image_path}")
         
         # Perform OCR
         results = self.reader.readtext(image)
+        if not results:
+            logger.info("📝 Detected 0 text regions")
+            return DetectionBatch.empty()
         
-        detected_texts = []
-        for detection in results:
-            bbox_coords, text, confidence = detection
-            
-            # Convert bbox coordinates to our format
-            # EasyOCR returns [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-            x_coords = [point[0] for point in bbox_coords]
-            y_coords = [point[1] for point in bbox_coords]
-            
-            x = int(min(x_coords))
-            y = int(min(y_coords))
-            width = int(max(x_coords) - min(x_coords))
-            height = int(max(y_coords) - min(y_coords))
-            
-            # Filter out low confidence detections
-            if confidence < 0.3:
-                continue
-            
-            # Filter out very small text regions (likely noise)
-            if width < 10 or height < 10:
-                continue
-            
-            bbox = BoundingBox(
-                x=x,
-                y=y,
-                width=width,
-                height=height,
-                confidence=round(confidence, 3)
-            )
-            
-            detected_text = DetectedText(
-                text=text.strip(),
-                bbox=bbox,
-                language=settings.translation_source_lang
-            )
-            
-            detected_texts.append(detected_text)
+        # EasyOCR returns [[x1,y1], [x2,y2], [x3,y3], [x4,y4]] per detection;
+        # convert all quads to x, y, width, height at once
+        quads = np.array([detection[0] for detection in results], dtype=np.float64)
+        corners_min = quads.min(axis=1)
+        sizes = (quads.max(axis=1) - corners_min).astype(np.int32)
+        boxes = np.hstack([corners_min.astype(np.int32), sizes])
+        boxes[:, 1] += y_offset
+        confidences = np.array([detection[2] for detection in results], dtype=np.float64)
+        
+        # Filter out low confidence detections and very small text regions (likely noise)
+        keep = (confidences >= 0.3) & (sizes >= 10).all(axis=1)
         
-        print(f"📝 Detected {len(detected_texts)} text regions")
+        detected_texts = DetectionBatch(
+            boxes[keep],
+            confidences[keep],
+            [results[i][1].strip() for i in np.flatnonzero(keep)],
+            language=settings.translation_source_lang
+        )
+        
+        logger.info("📝 Detected %d text regions", len(detected_texts))
         return detected_texts
     
     def get_text_mask(self, image_shape: Tuple[int, int, int], 
-                      detected_texts: List[DetectedText],
+                      detected_texts: DetectionBatch,
                       padding: int = 5) -> np.ndarray:
         """
         Create a binary mask for all detected text regions
         
         Args:
             image_shape: Shape of the original image (height, width, channels)
-            detected_texts: List of detected text objects
+            detected_texts: Detected text regions
             padding: Extra padding around text regions (pixels)
             
         Returns:
@@ -138,14 +160,48 @@ class OCRService:
         height, width = image_shape[:2]
         mask = np.zeros((height, width), dtype=np.uint8)
         
-        for det_text in detected_texts:
-            bbox = det_text.bbox
-            x1 = max(0, bbox.x - padding)
-            y1 = max(0, bbox.y - padding)
-            x2 = min(width, bbox.x + bbox.width + padding)
-            y2 = min(height, bbox.y + bbox.height + padding)
-            
-            # Mark text region in mask
+        # Mark text regions in mask
+        for x1, y1, x2, y2 in detected_texts.padded_rects(padding, image_shape).tolist():
             mask[y1:y2, x1:x2] = 255
         
         return mask
+    
+    def get_refined_text_mask(self, image: np.ndarray,
+                              detected_texts: DetectionBatch,
+                              padding: int = 5,
+                              dilation_size: int = 5) -> np.ndarray:
+        """
+        Create a binary mask covering only the glyph strokes of each text region
+        
+        Ink is thresholded inside every padded bounding box and dilated locally,
+        so inpainting only touches pixels near actual text. Regions where the
+        strokes cannot be isolated fall back to the full padded rectangle.
+        
+        Args:
+            image: Original image (BGR)
+            detected_texts: Detected text regions
+            padding: Extra padding around text regions (pixels)
+            dilation_size: Size of the local dilation kernel
+            
+        Returns:
+            Binary mask with glyph pixels marked as white (255)
+        """
+        height, width = image.shape[:2]
+        mask = np.zeros((height, width), dtype=np.uint8)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        kernel = np.ones((dilation_size, dilation_size), np.uint8)
+        
+        for x1, y1, x2, y2 in detected_texts.padded_rects(padding, image.shape).tolist():
+            if x2 <= x1 or y2 <= y1:
+                continue
+            
+            ink = extract_ink_mask(gray[y1:y2, x1:x2])
+            if ink is None:
+                mask[y1:y2, x1:x2] = 255
+                continue
+            
+            ink = cv2.dilate(ink, kernel, iterations=1)
+            region = mask[y1:y2, x1:x2]
+            np.bitwise_or(region, ink, out=region)
+        
+        return mask
@@ -1,12 +1,46 @@
+import asyncio
 import cv2
 import os
-from typing import Dict, List
+from contextlib import nullcontext
+import numpy as np
+from typing import Dict, List, Optional, Tuple
 from app.services.ocr_service import OCRService
 from app.services.translation_service import TranslationService
 from app.services.inpainting_service import InpaintingService
 from app.services.text_renderer import TextRenderer
-from app.models.schemas import DetectedText
+from app.services.bubble_service import BubbleService
+from app.services.grouping_service import TextGroupingService
+from app.services.rerender_service import RerenderService
+from app.services.text_presence import TextPresenceService, TEXTLESS, UNSURE
+from app.services.deadline import Deadline, INPAINT_FALLBACK, FAST_RENDERING
+from app.services.progress import ProgressCallback
+from app.models.detection_batch import DetectionBatch
+from app.models.schemas import TranslationRequest
 from app.config import settings
+from app.utils.logging_utils import get_logger, job_context
+from app.utils.profiling import RequestProfiler
+from app.utils.upload_utils import read_image_size
+from app.utils.patch_utils import write_image, save_patches
+from app.utils.tiling_utils import (
+    Tile,
+    plan_tiles,
+    map_in_order,
+    merge_tile_detections,
+    blend_tile,
+)
+from app.utils.metrics import (
+    StageTimer,
+    PAGES_PROCESSED,
+    INPAINTING_BACKEND,
+    BUBBLE_FILL_REGIONS,
+    TEXT_PRECHECK,
+)
+
+logger = get_logger(__name__)
+
+# Request-selectable stage sets, cheapest first
+PIPELINE_MODES = ("detect", "detect_translate", "no_inpaint", "full")
+RENDER_MODES = ("no_inpaint", "full")
 
 
 class TranslationPipeline:
@@ -20,133 +54,595 @@ class TranslationPipeline:
     4. Rendering - Draw translated text
     """
     
-    def __init__(self):
-        """Initialize all services"""
-        print("🚀 Initializing Translation Pipeline...")
-        self.ocr_service = OCRService()
-        self.translation_service = TranslationService()
-        self.inpainting_service = InpaintingService()
-        self.text_renderer = TextRenderer(settings.default_font_path)
-        print("✅ Translation Pipeline ready")
+    def __init__(self,
+                 ocr_service: Optional[OCRService] = None,
+                 translation_service: Optional[TranslationService] = None,
+                 inpainting_service: Optional[InpaintingService] = None,
+                 text_renderer: Optional[TextRenderer] = None):
+        """
+        Initialize all services
+        
+        Args:
+            ocr_service: Optional OCR service (default: EasyOCR)
+            translation_service: Optional translation service
+            inpainting_service: Optional inpainting service (default: LaMa/OpenCV)
+            text_renderer: Optional text renderer
+        """
+        logger.info("🚀 Initializing Translation Pipeline...")
+        self.ocr_service = ocr_service or OCRService()
+        self.translation_service = translation_service or TranslationService()
+        self.inpainting_service = inpainting_service or InpaintingService()
+        self.bubble_service = BubbleService(max_std=settings.bubble_fill_max_std)
+        self.text_presence = TextPresenceService(
+            min_glyphs=settings.text_precheck_min_glyphs,
+            max_ink=settings.text_precheck_max_ink
+        )
+        self.grouping_service = TextGroupingService(
+            line_gap_ratio=settings.grouping_line_gap_ratio,
+            reading_direction=settings.reading_direction
+        )
+        self.text_renderer = text_renderer or TextRenderer(settings.default_font_path)
+        self.rerender_service = RerenderService(
+            self.text_renderer,
+            cache_size=settings.plate_cache_size,
+            ttl=settings.plate_ttl,
+            max_disk_bytes=settings.plate_max_disk_bytes
+        )
+        logger.info("✅ Translation Pipeline ready")
     
-    async def process_image(self, image_path: str, file_id: str, use_gpu: bool = False) -> Dict:
+    def preload_models(self, use_gpu: bool = False):
+        """
+        Load the OCR and inpainting models now and ready them for inference
+        
+        Called in the parent of pre-forked workers (python -m app.worker with
+        WORKER_PROCESSES > 1) so all of them share one copy of the weights.
+        """
+        self.ocr_service.preload(use_gpu=use_gpu)
+        self.inpainting_service.preload()
+        logger.info("✅ Models loaded for sharing with worker processes")
+    
+    async def process_image(self, image_path: str, file_id: str, use_gpu: bool = False,
+                            profile: bool = False,
+                            progress: Optional[ProgressCallback] = None,
+                            languages: Optional[TranslationRequest] = None,
+                            output_mode: str = "page",
+                            mode: str = "full",
+                            deadline: Optional[Deadline] = None) -> Dict:
         """
         Process a manga page through the complete pipeline with error handling
         
+        The CPU-bound work runs in a worker thread so the event loop stays free
+        to serve other requests and stream progress updates.
+        
         Args:
             image_path: Path to the uploaded manga page
             file_id: Unique identifier for this processing job
             use_gpu: Whether to use GPU for processing (default: False)
+            profile: Run a sampling profiler and store a speedscope profile
+            progress: Optional callback receiving (stage, fraction, message) updates
+            languages: Source/target language pair (default: settings)
+            output_mode: "page" (full translated PNG), "patches" (one PNG per
+                         changed region) or "sprite" (changed regions packed in one PNG)
+            mode: Stages to run: "detect" (OCR only), "detect_translate" (no image
+                  output), "no_inpaint" (render over flat fill/OpenCV cleaning,
+                  skipping the inpainting model) or "full"
+            deadline: Optional latency budget; as it runs out, translation
+                      retries, the inpainting model and the font size search
+                      are given up in that order
             
         Returns:
-            Dictionary with processing results
+            Dictionary with processing results (including per-stage timings);
+            'detected_texts' is a DetectionBatch, 'degradations' lists what
+            was given up to meet the deadline
+        """
+        return await asyncio.to_thread(
+            self.process_image_sync, image_path, file_id, use_gpu, profile, progress, languages, output_mode, mode,
+            deadline
+        )
+    
+    def process_image_sync(self, image_path: str, file_id: str, use_gpu: bool = False,
+                           profile: bool = False,
+                           progress: Optional[ProgressCallback] = None,
+                           languages: Optional[TranslationRequest] = None,
+                           output_mode: str = "page",
+                           mode: str = "full",
+                           deadline: Optional[Deadline] = None,
+                           keep_plate: bool = True) -> Dict:
         """
-        print(f"\n{'='*60}")
-        print(f"📖 Processing manga page: {file_id}")
-        print(f"🖥️ Device: {'GPU (Ekran Kartı)' if use_gpu else 'CPU (İşlemci)'}")
-        print(f"{'='*60}\n")
+        Blocking version of process_image (same arguments and result)
         
-        try:
-            # Step 1: OCR - Detect text regions
-            print("🔍 Step 1: Detecting text regions...")
+        keep_plate=False skips saving the clean plate for re-rendering edits
+        (batch runs that nobody will edit through the API).
+        """
+        report = progress or (lambda stage, fraction=0.0, message="": None)
+        languages = languages or TranslationRequest(
+            source_lang=settings.translation_source_lang,
+            target_lang=settings.translation_target_lang
+        )
+        timer = StageTimer()
+        profiler = RequestProfiler() if profile else None
+        
+        with job_context(file_id):
+            logger.info(
+                "📖 Processing manga page on %s",
+                'GPU (Ekran Kartı)' if use_gpu else 'CPU (İşlemci)'
+            )
             try:
-                detected_texts = self.ocr_service.detect_text(image_path, use_gpu=use_gpu)
+                with profiler or nullcontext(), timer.stage("total"):
+                    result = self._run_stages(
+                        image_path, file_id, use_gpu, timer, report, languages, output_mode, mode, deadline,
+                        keep_plate
+                    )
             except Exception as e:
-                print(f"❌ OCR failed: {e}")
-                raise RuntimeError(f"Text detection failed: {str(e)}")
+                PAGES_PROCESSED.labels(outcome="error").inc()
+                logger.error("❌ Pipeline error: %s", e)
+                report("error", 1.0, str(e))
+                raise
+            
+            result['timings'] = timer.timings
+            result['degradations'] = list(deadline.degradations) if deadline is not None else []
+            if profiler is not None:
+                profile_path = os.path.join(settings.profile_dir, f"{file_id}.speedscope.json")
+                profiler.save_speedscope(profile_path)
+                result['profile'] = {
+                    'profile_path': profile_path,
+                    'peak_traced_memory_bytes': profiler.peak_traced_bytes,
+                    'peak_rss_growth_bytes': profiler.peak_rss_growth_bytes,
+                }
+                logger.info("🔬 Profile saved: %s", profile_path)
+        
+        report("complete", 1.0, result['message'])
+        return result
+    
+    def _run_stages(self, image_path: str, file_id: str, use_gpu: bool,
+                    timer: StageTimer, report: ProgressCallback,
+                    languages: TranslationRequest, output_mode: str = "page",
+                    mode: str = "full", deadline: Optional[Deadline] = None,
+                    keep_plate: bool = True) -> Dict:
+        """
+        Run the stages selected by mode for one page
+        
+        Args:
+            image_path: Path to the uploaded manga page
+            file_id: Unique identifier for this processing job
+            use_gpu: Whether to use GPU for processing
+            timer: Stage timer collecting per-stage wall times
+            report: Progress callback (stage, fraction, message)
+            languages: Source/target language pair
+            output_mode: "page", "patches" or "sprite" (see process_image)
+            mode: Stages to run (see PIPELINE_MODES)
+            deadline: Optional latency budget (see process_image)
+            keep_plate: Save the clean plate for re-rendering edits
             
-            if not detected_texts:
-                print("⚠️ No text detected in image")
-                # Return original image if no text detected
-                import shutil
-                translated_filename = f"{file_id}_translated.png"
-                translated_path = os.path.join(settings.temp_dir, translated_filename)
-                shutil.copy(image_path, translated_path)
+        Returns:
+            Dictionary with processing results
+        """
+        # Long webtoon strips are processed as overlapping tiles
+        tiles = self._plan_tiles(image_path)
+        
+        detected_texts, page = self._detect(image_path, tiles, use_gpu, timer, report)
+        renders = mode in RENDER_MODES
+        
+        if not len(detected_texts):
+            logger.info("⚠️ No text detected in image")
+            PAGES_PROCESSED.labels(outcome="no_text").inc()
+            if not renders or output_mode != "page":
+                # Nothing to overlay on the original
                 return {
-                    'translated_filename': translated_filename,
-                    'detected_texts': [],
-                    'message': 'No text detected, returning original image'
+                    'translated_filename': None,
+                    'patches': [],
+                    'sprite_filename': None,
+                    'detected_texts': detected_texts,
+                    'message': 'No text detected'
                 }
             
-            # Step 2: Translation
-            print(f"\n🌐 Step 2: Translating {len(detected_texts)} text regions...")
+            # Return original image if no text detected
+            import shutil
+            translated_filename = f"{file_id}_translated.png"
+            translated_path = os.path.join(settings.temp_dir, translated_filename)
+            shutil.copy(image_path, translated_path)
+            return {
+                'translated_filename': translated_filename,
+                'detected_texts': detected_texts,
+                'message': 'No text detected, returning original image'
+            }
+        
+        if mode != "detect":
+            detected_texts = self._translate(detected_texts, languages, timer, report, deadline)
+        
+        if not renders:
+            PAGES_PROCESSED.labels(outcome="success").inc()
+            logger.info("✅ Processing complete (%s mode, no image)", mode, extra={"timings": dict(timer.timings)})
+            return {
+                'translated_filename': None,
+                'detected_texts': detected_texts,
+                'message': 'Processing successful'
+            }
+        
+        use_model = mode != "no_inpaint"
+        if tiles:
+            plate, final_image = self._clean_and_render_tiled(
+                page, detected_texts, tiles, timer, report, use_model, deadline
+            )
+        else:
+            plate, final_image = self._clean_and_render(
+                image_path, detected_texts, timer, report, use_model, deadline
+            )
+        
+        # Keep the clean plate so edits can be re-rendered without OCR and inpainting
+        if plate is not None and keep_plate:
+            with timer.stage("plate"):
+                try:
+                    self.rerender_service.save_plate(
+                        file_id, plate, final_image, detected_texts, os.path.basename(image_path)
+                    )
+                except Exception as e:
+                    logger.warning("⚠️ Failed to keep clean plate: %s", e)
+        
+        # Save final image (or only the changed regions of it)
+        with timer.stage("save"):
             try:
-                detected_texts = self.translation_service.translate_detected_texts(detected_texts)
+                if output_mode == "page":
+                    translated_filename = f"{file_id}_translated.png"
+                    output = {'translated_filename': translated_filename}
+                    write_image(os.path.join(settings.temp_dir, translated_filename), final_image)
+                else:
+                    output = save_patches(final_image, detected_texts, file_id, output_mode == "sprite")
             except Exception as e:
-                print(f"⚠️ Translation service error: {e}")
-                print("📝 Continuing with original text...")
-                # If translation fails, use original text
-                for text in detected_texts:
-                    if not text.translated_text:
-                        text.translated_text = text.text
-            
-            # Step 3: Inpainting - Remove original text
-            print("\n🎨 Step 3: Removing original text (inpainting)...")
+                logger.error("❌ Failed to save final image: %s", e)
+                raise RuntimeError(f"Failed to save processed image: {str(e)}")
+        
+        PAGES_PROCESSED.labels(outcome="success").inc()
+        
+        logger.info("✅ Processing complete, output saved (%s mode)", output_mode, extra={"timings": dict(timer.timings)})
+        
+        output.update({
+            'detected_texts': detected_texts,
+            'message': 'Processing successful'
+        })
+        return output
+    
+    def _detect(self, image_path: str, tiles: Optional[List[Tile]], use_gpu: bool,
+                timer: StageTimer, report: ProgressCallback) -> Tuple[DetectionBatch, Optional[np.ndarray]]:
+        """
+        OCR stage: detect text regions and group them into bubble-level blocks
+        
+        Returns:
+            Tuple of (detections in reading order, decoded page for tiled
+            strips or None)
+        """
+        page = None
+        
+        # Step 1: OCR - Detect text regions
+        logger.info("🔍 Step 1: Detecting text regions...")
+        report("ocr", 0.0, "Detecting text regions")
+        if settings.text_precheck:
+            # Decode once: the pre-check and OCR share the pixels
+            with timer.stage("precheck"):
+                page = cv2.imread(image_path)
+                verdict = UNSURE
+                if page is not None:
+                    verdict, glyphs, ink = self.text_presence.classify(page)
+            TEXT_PRECHECK.labels(verdict=verdict).inc()
+            if verdict == TEXTLESS:
+                logger.info("🫥 Page looks textless (%d glyphs, %.1f%% ink), skipping OCR", glyphs, ink * 100)
+                return DetectionBatch.empty(), None
+        
+        with timer.stage("ocr"):
             try:
-                image = cv2.imread(image_path)
-                if image is None:
-                    raise ValueError(f"Failed to read image: {image_path}")
-                    
-                mask = self.ocr_service.get_text_mask(image.shape, detected_texts, padding=5)
-                
-                # Enhance mask for better inpainting
-                mask = self.inpainting_service.enhance_mask(mask, dilation_size=5)
-                
-                # Perform inpainting
-                cleaned_image = self.inpainting_service.inpaint(image, mask)
+                if tiles:
+                    if page is None:
+                        page = cv2.imread(image_path)
+                    if page is None:
+                        raise ValueError(f"Failed to read image: {image_path}")
+                    detected_texts = self._detect_text_tiled(image_path, page, tiles, use_gpu, report)
+                else:
+                    detected_texts = self.ocr_service.detect_text(image_path, use_gpu=use_gpu, image=page)
             except Exception as e:
-                print(f"⚠️ Inpainting failed: {e}")
-                print("📝 Using original image as base...")
-                cleaned_image = image if image is not None else cv2.imread(image_path)
-            
-            # Step 4: Rendering - Add translated text
-            print("\n✏️ Step 4: Rendering translated text...")
+                logger.error("❌ OCR failed: %s", e)
+                raise RuntimeError(f"Text detection failed: {str(e)}")
+        
+        # Merge line fragments into bubble-level blocks in reading order
+        if settings.text_grouping and len(detected_texts) > 1:
+            with timer.stage("grouping"):
+                fragments = len(detected_texts)
+                detected_texts = self.grouping_service.group(detected_texts)
+            logger.info("🧱 Grouped %d line fragments into %d text blocks", fragments, len(detected_texts))
+        
+        return detected_texts, (page if tiles else None)
+    
+    def _translate(self, detected_texts: DetectionBatch, languages: TranslationRequest,
+                   timer: StageTimer, report: ProgressCallback,
+                   deadline: Optional[Deadline] = None) -> DetectionBatch:
+        """
+        Translation stage; regions that fail to translate keep their original text
+        
+        Returns:
+            Detections with their translations filled
+        """
+        # Step 2: Translation
+        logger.info(
+            "🌐 Step 2: Translating %d text regions (%s → %s)...",
+            len(detected_texts), languages.source_lang, languages.target_lang
+        )
+        report("translating", 0.0, f"Translating {len(detected_texts)} text regions")
+        with timer.stage("translation"):
             try:
-                final_image = self.text_renderer.render_text(cleaned_image, detected_texts)
+                detected_texts = self.translation_service.translate_detected_texts(
+                    detected_texts,
+                    on_progress=lambda done, total: report("translating", done / total, f"Translated {done}/{total}"),
+                    source_lang=languages.source_lang,
+                    target_lang=languages.target_lang,
+                    deadline=deadline
+                )
             except Exception as e:
-                print(f"⚠️ Text rendering failed: {e}")
-                print("📝 Using cleaned image without new text...")
-                final_image = cleaned_image
+                logger.warning("⚠️ Translation service error: %s", e)
+                logger.warning("📝 Continuing with original text...")
+                # If translation fails, use original text
+                missing = np.array([not t for t in detected_texts.translations], dtype=bool)
+                detected_texts.translations[missing] = detected_texts.texts[missing]
+        return detected_texts
+    
+    @staticmethod
+    def _degrade(deadline: Optional[Deadline], step: str) -> bool:
+        """Whether a deadline degradation applies (never without a deadline)"""
+        return deadline is not None and deadline.degrade(step)
+    
+    def _plan_tiles(self, image_path: str) -> Optional[List[Tile]]:
+        """
+        Decide from the image header whether to process the page as tiles
+        
+        Returns:
+            Tile rows for long strips, or None to process the page whole
+        """
+        if not settings.tiling_enabled:
+            return None
+        size = read_image_size(image_path)
+        if size is None:
+            return None
+        width, height = size
+        if height <= settings.tile_height or height < width * settings.tile_min_aspect_ratio:
+            return None
+        tiles = plan_tiles(height, settings.tile_height, settings.tile_overlap)
+        logger.info("🧩 Long strip (%dx%d), processing as %d tiles", width, height, len(tiles))
+        return tiles
+    
+    def _build_mask(self, image: np.ndarray, detected_texts: DetectionBatch) -> np.ndarray:
+        """Text mask for inpainting (glyph-level when mask refinement is enabled)"""
+        # Mask grouped blocks line by line so the gaps between lines stay untouched
+        detected_texts = detected_texts.line_regions()
+        if settings.mask_refinement:
+            # Glyph-level mask, dilated locally per region
+            return self.ocr_service.get_refined_text_mask(
+                image, detected_texts, padding=5, dilation_size=5
+            )
+        
+        mask = self.ocr_service.get_text_mask(image.shape, detected_texts, padding=5)
+        
+        # Enhance mask for better inpainting
+        return self.inpainting_service.enhance_mask(mask, dilation_size=5)
+    
+    def _clean_and_render(self, image_path: str, detected_texts: DetectionBatch,
+                          timer: StageTimer, report: ProgressCallback,
+                          use_model: bool = True,
+                          deadline: Optional[Deadline] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Remove the original text from a whole page and draw the translations
+        
+        Args:
+            use_model: Use the inpainting model for text over artwork (False:
+                       OpenCV only, after the bubble flat fill)
+            deadline: Optional latency budget; when it runs low the model and
+                      then the font size search are skipped
+        
+        Returns:
+            Tuple of (clean plate if keep_clean_plate is set else None, final page image (BGR))
+        """
+        # Step 3: Inpainting - Remove original text
+        logger.info("🎨 Step 3: Removing original text (inpainting)...")
+        report("inpainting", 0.0, "Removing original text")
+        image = None
+        try:
+            image = cv2.imread(image_path)
+            if image is None:
+                raise ValueError(f"Failed to read image: {image_path}")
             
-            # Save final image
-            translated_filename = f"{file_id}_translated.png"
-            translated_path = os.path.join(settings.temp_dir, translated_filename)
+            with timer.stage("mask"):
+                mask = self._build_mask(image, detected_texts)
+            
+            # Fast path: flat-fill text sitting in plain speech bubbles
+            base_image = image
+            if settings.bubble_fill_enabled:
+                with timer.stage("bubble_fill"):
+                    base_image, mask, filled = self.bubble_service.fill_flat_regions(
+                        image, mask, detected_texts, padding=5
+                    )
+                BUBBLE_FILL_REGIONS.labels(path="flat_fill").inc(filled)
+                BUBBLE_FILL_REGIONS.labels(path="model").inc(len(detected_texts) - filled)
+                logger.info("🫧 Flat-filled %d/%d regions inside speech bubbles", filled, len(detected_texts))
+                report("inpainting", 0.5, f"Flat-filled {filled}/{len(detected_texts)} bubbles")
             
+            # Perform inpainting only where text sits over artwork
+            with timer.stage("inpainting"):
+                if cv2.countNonZero(mask) > 0:
+                    use_model = use_model and not self._degrade(deadline, INPAINT_FALLBACK)
+                    cleaned_image = self.inpainting_service.inpaint(base_image, mask, use_model=use_model)
+                else:
+                    logger.info("✅ All regions flat-filled, skipping inpainting model")
+                    INPAINTING_BACKEND.labels(backend="flat_fill_only").inc()
+                    cleaned_image = base_image
+        except Exception as e:
+            logger.warning("⚠️ Inpainting failed: %s", e)
+            logger.warning("📝 Using original image as base...")
+            cleaned_image = image if image is not None else cv2.imread(image_path)
+        
+        # Step 4: Rendering - Add translated text
+        logger.info("✏️ Step 4: Rendering translated text...")
+        report("rendering", 0.0, "Rendering translated text")
+        with timer.stage("rendering"):
             try:
-                success = cv2.imwrite(translated_path, final_image)
-                if not success:
-                    raise IOError(f"Failed to save image to {translated_path}")
+                final_image = self.text_renderer.render_text(
+                    cleaned_image,
+                    detected_texts,
+                    on_progress=lambda done, total: report("rendering", done / total, f"Rendered {done}/{total}"),
+                    precise=not self._degrade(deadline, FAST_RENDERING)
+                )
             except Exception as e:
-                print(f"❌ Failed to save final image: {e}")
-                raise RuntimeError(f"Failed to save processed image: {str(e)}")
-            
-            print(f"\n✅ Processing complete!")
-            print(f"📁 Output saved: {translated_filename}")
-            print(f"{'='*60}\n")
-            
-            return {
-                'translated_filename': translated_filename,
-                'detected_texts': detected_texts,
-                'message': 'Processing successful'
-            }
-            
+                logger.warning("⚠️ Text rendering failed: %s", e)
+                logger.warning("📝 Using cleaned image without new text...")
+                final_image = cleaned_image
+        
+        return (cleaned_image if settings.keep_clean_plate else None), final_image
+    
+    def _detect_text_tiled(self, image_path: str, page: np.ndarray, tiles: List[Tile],
+                           use_gpu: bool, report: ProgressCallback) -> DetectionBatch:
+        """
+        Run OCR on each tile in parallel and merge detections across the seams
+        
+        Returns:
+            Detections for the whole page, in page coordinates
+        """
+        def scan(tile: Tile) -> DetectionBatch:
+            y_start, y_end = tile
+            return self.ocr_service.detect_text(
+                image_path, use_gpu=use_gpu, image=page[y_start:y_end], y_offset=y_start
+            )
+        
+        tile_detections = []
+        for index, detections in enumerate(map_in_order(scan, tiles, settings.tile_workers)):
+            tile_detections.append(detections)
+            report("ocr", (index + 1) / len(tiles), f"Scanned tile {index + 1}/{len(tiles)}")
+        
+        detected_texts = merge_tile_detections(tiles, tile_detections, page.shape[0])
+        logger.info(
+            "🧩 Merged %d tile detections into %d text regions",
+            sum(len(d) for d in tile_detections), len(detected_texts)
+        )
+        return detected_texts
+    
+    def _clean_tile(self, tile_image: np.ndarray, tile_texts: DetectionBatch,
+                    use_model: bool = True) -> Tuple[np.ndarray, int]:
+        """
+        Mask, flat-fill and inpaint one tile (runs on a worker thread)
+        
+        Returns:
+            Tuple of (cleaned tile, number of regions flat-filled)
+        """
+        if not len(tile_texts):
+            return tile_image, 0
+        try:
+            mask = self._build_mask(tile_image, tile_texts)
+            base_image, filled = tile_image, 0
+            if settings.bubble_fill_enabled:
+                base_image, mask, filled = self.bubble_service.fill_flat_regions(
+                    tile_image, mask, tile_texts, padding=5
+                )
+                BUBBLE_FILL_REGIONS.labels(path="flat_fill").inc(filled)
+                BUBBLE_FILL_REGIONS.labels(path="model").inc(len(tile_texts) - filled)
+            if cv2.countNonZero(mask) == 0:
+                INPAINTING_BACKEND.labels(backend="flat_fill_only").inc()
+                return base_image, filled
+            return self.inpainting_service.inpaint(base_image, mask, use_model=use_model), filled
         except Exception as e:
-            print(f"\n❌ Pipeline error: {e}")
-            print(f"{'='*60}\n")
-            raise
+            logger.warning("⚠️ Tile inpainting failed, keeping original pixels: %s", e)
+            return tile_image, 0
+    
+    def _clean_and_render_tiled(self, page: np.ndarray, detected_texts: DetectionBatch,
+                                tiles: List[Tile], timer: StageTimer,
+                                report: ProgressCallback,
+                                use_model: bool = True,
+                                deadline: Optional[Deadline] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """
+        Inpaint and render a long strip tile by tile, stitching into `page` in place
+        
+        Only tile_workers tiles are processed at once and a new tile is cut
+        only after the oldest finished one has been blended back, so peak
+        memory follows the tile size rather than the strip length. The deadline is checked per tile
+        and per band, so a strip can switch to the cheaper paths midway.
+        
+        Returns:
+            Tuple of (clean plate if keep_clean_plate is set else None, final
+            page image (the same array as `page`))
+        """
+        logger.info("🎨 Step 3: Removing original text (inpainting) in %d tiles...", len(tiles))
+        report("inpainting", 0.0, "Removing original text")
+        
+        def tile_inputs():
+            # Cut lazily: map_in_order pulls a tile once the oldest in-flight result is stitched in
+            for y_start, y_end in tiles:
+                yield page[y_start:y_end].copy(), detected_texts.in_band(y_start, y_end)
+        
+        filled_total = 0
+        with timer.stage("inpainting"):
+            previous_end = 0
+            results = map_in_order(
+                lambda args: self._clean_tile(
+                    *args, use_model=use_model and not self._degrade(deadline, INPAINT_FALLBACK)
+                ),
+                tile_inputs(),
+                settings.tile_workers
+            )
+            for index, ((y_start, y_end), (cleaned, filled)) in enumerate(zip(tiles, results)):
+                blend_tile(page, cleaned, y_start, previous_end - y_start)
+                previous_end = y_end
+                filled_total += filled
+                report("inpainting", (index + 1) / len(tiles), f"Cleaned tile {index + 1}/{len(tiles)}")
+        logger.info("🫧 Flat-filled %d tile regions inside speech bubbles", filled_total)
+        plate = page.copy() if settings.keep_clean_plate else None
+        
+        # Render each region inside a tile that contains it whole, so text is
+        # never split across a seam; regions taller than the overlap get their own band
+        logger.info("✏️ Step 4: Rendering translated text...")
+        report("rendering", 0.0, "Rendering translated text")
+        corners = detected_texts.corners()
+        starts = np.array([y_start for y_start, _ in tiles])
+        ends = np.array([y_end for _, y_end in tiles])
+        fits = (starts[None, :] <= corners[:, 1:2]) & (corners[:, 3:4] <= ends[None, :])
+        band_of = np.where(fits.any(axis=1), fits.argmax(axis=1), len(tiles))
+        bands: List[Tuple[int, int, DetectionBatch]] = [
+            (y_start, y_end, detected_texts.take(band_of == index))
+            for index, (y_start, y_end) in enumerate(tiles)
+        ]
+        oversized = band_of == len(tiles)
+        if oversized.any():
+            bands.append((
+                max(0, int(corners[oversized, 1].min())),
+                min(page.shape[0], int(corners[oversized, 3].max())),
+                detected_texts.take(oversized)
+            ))
+        
+        total = len(detected_texts)
+        done = 0
+        with timer.stage("rendering"):
+            for y_start, y_end, band_texts in bands:
+                if not len(band_texts):
+                    continue
+                try:
+                    page[y_start:y_end] = self.text_renderer.render_text(
+                        page[y_start:y_end],
+                        band_texts.in_band(y_start, y_end),
+                        precise=not self._degrade(deadline, FAST_RENDERING)
+                    )
+                except Exception as e:
+                    logger.warning("⚠️ Text rendering failed for rows %d-%d: %s", y_start, y_end, e)
+                done += len(band_texts)
+                report("rendering", done / total, f"Rendered {done}/{total}")
+        
+        return plate, page
     
     def cleanup(self, file_id: str):
         """
-        Clean up temporary files for a given processing job
+        Clean up temporary files and the clean plate of a processing job
         
         Args:
             file_id: Unique identifier for the processing job
         """
+        self.rerender_service.discard(file_id)
         for filename in os.listdir(settings.temp_dir):
             if filename.startswith(file_id):
                 file_path = os.path.join(settings.temp_dir, filename)
                 try:
                     os.remove(file_path)
-                    print(f"🗑️ Removed: {filename}")
+                    logger.debug("🗑️ Removed: %s", filename)
                 except Exception as e:
-                    print(f"⚠️ Failed to remove {filename}: {e}")
+                    logger.warning("⚠️ Failed to remove %s: %s", filename, e)
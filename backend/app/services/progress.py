@@ -0,0 +1,122 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, List, Optional
+from app.models.schemas import ProcessingStatus
+
+
+# Overall progress range (percent) covered by each pipeline stage
+STAGE_RANGES = {
+    "uploading": (0, 5),
+    "ocr": (5, 30),
+    "translating": (30, 55),
+    "inpainting": (55, 80),
+    "rendering": (80, 98),
+    "complete": (100, 100),
+    "error": (100, 100),
+}
+
+TERMINAL_STAGES = ("complete", "error")
+
+# Callback handed to the pipeline: (stage, fraction of stage done 0-1, message)
+ProgressCallback = Callable[[str, float, str], None]
+
+
+def build_status(job_id: str, stage: str, fraction: float = 0.0, message: str = "") -> ProcessingStatus:
+    """Status update with the stage fraction mapped onto overall progress"""
+    low, high = STAGE_RANGES.get(stage, (0, 100))
+    fraction = min(max(fraction, 0.0), 1.0)
+    return ProcessingStatus(
+        job_id=job_id,
+        stage=stage,
+        progress=int(low + (high - low) * fraction),
+        message=message
+    )
+
+
+class ProgressBroker:
+    """Fan-out of ProcessingStatus updates from pipeline threads to per-job subscribers"""
+    
+    def __init__(self, retention_seconds: float = 60.0, keepalive_seconds: float = 15.0,
+                 stale_seconds: float = 3600.0):
+        """
+        Args:
+            retention_seconds: How long the final status of a finished job stays available
+            keepalive_seconds: Interval of keep-alive ticks sent to idle subscribers
+            stale_seconds: How long an unfinished job is kept after its last update
+                           (jobs abandoned before completing, e.g. while waiting for admission)
+        """
+        self.retention_seconds = retention_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.stale_seconds = stale_seconds
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._latest: Dict[str, ProcessingStatus] = {}
+        self._updated_at: Dict[str, float] = {}
+    
+    def reporter(self, job_id: str) -> ProgressCallback:
+        """
+        Create a thread-safe progress callback for one job
+        
+        Must be called from the event loop; the returned callback may then be
+        invoked from any worker thread.
+        """
+        loop = asyncio.get_running_loop()
+        
+        def report(stage: str, fraction: float = 0.0, message: str = ""):
+            status = build_status(job_id, stage, fraction, message)
+            loop.call_soon_threadsafe(self._dispatch, job_id, status)
+        
+        return report
+    
+    def _dispatch(self, job_id: str, status: ProcessingStatus):
+        """Store and fan out a status update (event loop thread only)"""
+        self._latest[job_id] = status
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(status)
+        
+        now = time.monotonic()
+        self._updated_at[job_id] = now
+        
+        # Forget jobs nobody is listening to anymore: finished ones after
+        # retention_seconds, ones that stopped reporting after stale_seconds
+        for known_id, updated_at in list(self._updated_at.items()):
+            finished = self._latest[known_id].stage in TERMINAL_STAGES
+            ttl = self.retention_seconds if finished else self.stale_seconds
+            if now - updated_at > ttl and not self._subscribers.get(known_id):
+                self._latest.pop(known_id, None)
+                self._updated_at.pop(known_id, None)
+    
+    async def subscribe(self, job_id: str) -> AsyncIterator[Optional[ProcessingStatus]]:
+        """
+        Yield status updates for a job until it completes or fails
+        
+        Yields None every keepalive interval while no update arrives, so the
+        caller can write a keep-alive and notice disconnected clients.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            latest = self._latest.get(job_id)
+            if latest is not None:
+                yield latest
+                if latest.stage in TERMINAL_STAGES:
+                    return
+            
+            while True:
+                try:
+                    status = await asyncio.wait_for(queue.get(), timeout=self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield status
+                if status.stage in TERMINAL_STAGES:
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+
+# Shared broker for the API process
+progress_broker = ProgressBroker()
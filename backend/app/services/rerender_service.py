@@ -0,0 +1,299 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import settings
+from app.models.detection_batch import DetectionBatch
+from app.models.schemas import TextEdit
+from app.services.text_renderer import TextRenderer
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.patch_utils import patch_rects, write_image, save_patches
+
+logger = get_logger(__name__)
+
+
+class RenderNotFound(Exception):
+    """Raised when no clean plate is cached for a job"""
+
+
+class _RenderState:
+    """Clean plate, current rendered page and text regions of one job"""
+    
+    def __init__(self, plate: np.ndarray, page: Optional[np.ndarray], meta: Dict, mtime: float):
+        self.plate = plate
+        self.page = page
+        self.meta = meta
+        self.mtime = mtime  # Of the state file when last written or read by this process
+        self.lock = threading.Lock()
+    
+    @property
+    def detected_texts(self) -> DetectionBatch:
+        return self.meta['detected_texts']
+
+
+class RerenderService:
+    """
+    Redraw edited text regions on a job's cached clean plate
+    
+    The pipeline keeps the inpainted page without text (the clean plate) and
+    the final text regions of each rendered job. An edit then only restores
+    the plate under the changed regions and renders the text there again,
+    with no OCR or inpainting.
+    
+    Plates live in render_cache_dir (shared by replicas and workers, not
+    served publicly); the most recently used ones are also kept decoded in
+    memory. Plates not edited for ttl seconds, and the least recently edited
+    ones beyond max_disk_bytes, are deleted as new plates are saved.
+    """
+    
+    # Seconds between scans of render_cache_dir for plates to evict
+    EVICTION_INTERVAL = 60.0
+    
+    def __init__(self, text_renderer: TextRenderer, cache_size: int = 4,
+                 ttl: float = 86400.0, max_disk_bytes: int = 2_000_000_000):
+        """
+        Args:
+            text_renderer: Renderer used for the pipeline's pages
+            cache_size: Decoded plates kept in memory
+            ttl: Seconds a plate is kept on disk after it was saved or last edited
+            max_disk_bytes: Disk budget of render_cache_dir (0: unlimited)
+        """
+        self.text_renderer = text_renderer
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self._cache: "OrderedDict[str, _RenderState]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._next_eviction = 0.0
+    
+    def _paths(self, file_id: str):
+        base = os.path.join(settings.render_cache_dir, file_id)
+        return f"{base}_clean.png", f"{base}_state.json"
+    
+    def save_plate(self, file_id: str, plate: np.ndarray, page: np.ndarray,
+                   detected_texts: DetectionBatch, original_filename: str):
+        """
+        Keep the clean plate and text regions of a freshly rendered job
+        
+        Args:
+            file_id: Job id
+            plate: Page after inpainting, before rendering (BGR)
+            page: Final rendered page (BGR)
+            detected_texts: Regions drawn on the page
+            original_filename: Uploaded image in temp_dir
+        """
+        plate_path, state_path = self._paths(file_id)
+        # Fast PNG compression; the plate is read back, not downloaded (so not counted as output bytes)
+        if not cv2.imwrite(plate_path, plate, [cv2.IMWRITE_PNG_COMPRESSION, 1]):
+            raise IOError(f"Failed to save clean plate to {plate_path}")
+        meta = {
+            'original_filename': original_filename,
+            'revision': 0,
+            'detected_texts': detected_texts.copy(),
+        }
+        mtime = self._write_meta(state_path, meta)
+        self._remember(file_id, _RenderState(plate, page.copy(), meta, mtime))
+        self._evict_if_due()
+    
+    def rerender(self, file_id: str, edits: List[TextEdit], output_mode: str = "patches") -> Dict:
+        """
+        Apply edits to a job's text regions and redraw only the affected areas
+        
+        Args:
+            file_id: Job id of a page processed in a rendering mode
+            edits: Text, font or size changes by region index
+            output_mode: "page" (full PNG), "patches" or "sprite" (changed
+                         areas, to draw over the page currently shown)
+        
+        Returns:
+            Dictionary shaped like a pipeline result, plus 'original_filename'
+            and 'revision'
+        
+        Raises:
+            RenderNotFound: If no plate is cached for the job
+            ValueError: If an edit refers to a region that does not exist
+        """
+        state = self._load(file_id)
+        with state.lock:
+            texts = state.detected_texts
+            for edit in edits:
+                if edit.index >= len(texts):
+                    raise ValueError(f"Text region {edit.index} does not exist (page has {len(texts)})")
+            
+            if state.page is None:
+                # First edit since the plate was loaded from disk: rebuild the current page once
+                state.page = self.text_renderer.render_text(state.plate, texts)
+            
+            for edit in edits:
+                update = edit.model_dump(exclude={'index'}, exclude_unset=True)
+                if 'translated_text' in update:
+                    texts.translations[edit.index] = update['translated_text']
+                if 'font_size' in update:
+                    texts.font_sizes[edit.index] = update['font_size'] or 0
+                if 'font' in update:
+                    texts.fonts[edit.index] = update['font']
+            changed = texts.take(np.unique([edit.index for edit in edits]))
+            
+            # Restore the plate under each changed area and draw every region touching it
+            # (neighbours are redrawn identically, so clipped edges match)
+            for rect in patch_rects(changed, state.plate.shape):
+                x1, y1, x2, y2 = rect
+                state.page[y1:y2, x1:x2] = self.text_renderer.render_text(
+                    state.plate[y1:y2, x1:x2],
+                    texts.in_rect(rect)
+                )
+            
+            state.meta['revision'] += 1
+            revision = state.meta['revision']
+            prefix = f"{file_id}_r{revision}"
+            if output_mode == "page":
+                translated_filename = f"{prefix}_translated.png"
+                output = {'translated_filename': translated_filename}
+                write_image(os.path.join(settings.temp_dir, translated_filename), state.page)
+            else:
+                output = save_patches(state.page, changed, prefix, output_mode == "sprite")
+            state.mtime = self._write_meta(self._paths(file_id)[1], state.meta)
+            
+            logger.info("🖌️ Re-rendered %d regions of %s (revision %d)", len(changed), file_id, revision)
+            output.update({
+                'detected_texts': texts.copy(),
+                'original_filename': state.meta['original_filename'],
+                'revision': revision,
+                'message': 'Re-render successful'
+            })
+            return output
+    
+    def _load(self, file_id: str) -> _RenderState:
+        """Cached state of a job, decoded from render_cache_dir on a miss"""
+        plate_path, state_path = self._paths(file_id)
+        try:
+            mtime = os.path.getmtime(state_path)
+        except OSError:
+            self.forget(file_id)
+            raise RenderNotFound(f"No cached render for job {file_id}")
+        
+        with self._cache_lock:
+            state = self._cache.get(file_id)
+            # A different mtime means another replica edited the job since
+            if state is not None and state.mtime == mtime:
+                self._cache.move_to_end(file_id)
+                CACHE_LOOKUPS.labels(cache="plate", result="hit").inc()
+                return state
+        CACHE_LOOKUPS.labels(cache="plate", result="miss").inc()
+        
+        plate = cv2.imread(plate_path)
+        if plate is None:
+            raise RenderNotFound(f"Clean plate of job {file_id} is missing")
+        with open(state_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        meta['detected_texts'] = DetectionBatch.from_dicts(meta['detected_texts'])
+        
+        with self._cache_lock:
+            # Another request may have loaded it meanwhile; keep the first copy
+            state = self._cache.get(file_id)
+            if state is None or state.mtime != mtime:
+                state = _RenderState(plate, None, meta, mtime)
+                self._remember_locked(file_id, state)
+            return state
+    
+    def _remember(self, file_id: str, state: _RenderState):
+        with self._cache_lock:
+            self._remember_locked(file_id, state)
+    
+    def _remember_locked(self, file_id: str, state: _RenderState):
+        self._cache[file_id] = state
+        self._cache.move_to_end(file_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def forget(self, file_id: str):
+        """Drop a job's plate from memory (discard also removes its files)"""
+        with self._cache_lock:
+            self._cache.pop(file_id, None)
+    
+    def discard(self, file_id: str) -> List[str]:
+        """
+        Drop a job's plate from memory and delete its files
+        
+        Returns:
+            Names of the files removed from render_cache_dir
+        """
+        self.forget(file_id)
+        removed = []
+        for path in self._paths(file_id):
+            try:
+                os.remove(path)
+                removed.append(os.path.basename(path))
+            except FileNotFoundError:
+                pass
+        return removed
+    
+    def _evict_if_due(self):
+        now = time.monotonic()
+        with self._cache_lock:
+            if now < self._next_eviction:
+                return
+            self._next_eviction = now + self.EVICTION_INTERVAL
+        try:
+            self.evict()
+        except OSError as e:
+            logger.warning("⚠️ Clean plate eviction failed: %s", e)
+    
+    def evict(self) -> int:
+        """
+        Delete plates past their TTL, then the least recently edited ones until
+        render_cache_dir fits max_disk_bytes
+        
+        Returns:
+            Number of jobs whose plates were deleted
+        """
+        jobs = self._disk_usage()
+        now = time.time()
+        expired = [file_id for file_id, (mtime, _) in jobs.items() if now - mtime > self.ttl]
+        total = sum(size for file_id, (_, size) in jobs.items() if file_id not in expired)
+        if self.max_disk_bytes:
+            # Oldest first, until the rest fits
+            for file_id, (_, size) in sorted(jobs.items(), key=lambda item: item[1][0]):
+                if total <= self.max_disk_bytes:
+                    break
+                if file_id not in expired:
+                    expired.append(file_id)
+                    total -= size
+        
+        for file_id in expired:
+            self.discard(file_id)
+        if expired:
+            logger.info("🧹 Evicted %d clean plates (%.1f MB left)", len(expired), total / 1e6)
+        return len(expired)
+    
+    @staticmethod
+    def _disk_usage() -> Dict[str, Tuple[float, int]]:
+        """Last write time and total size of each job's files in render_cache_dir"""
+        jobs: Dict[str, Tuple[float, int]] = {}
+        with os.scandir(settings.render_cache_dir) as entries:
+            for entry in entries:
+                file_id, _, suffix = entry.name.rpartition("_")
+                if suffix not in ("clean.png", "state.json"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                mtime, size = jobs.get(file_id, (0.0, 0))
+                jobs[file_id] = (max(mtime, stat.st_mtime), size + stat.st_size)
+        return jobs
+    
+    @staticmethod
+    def _write_meta(path: str, meta: Dict) -> float:
+        payload = dict(meta, detected_texts=meta['detected_texts'].to_dicts())
+        # Write then rename so readers on other replicas never see a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return os.path.getmtime(path)
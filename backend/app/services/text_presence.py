@@ -0,0 +1,177 @@
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+from app.utils.spatial_index import GridIndex
+
+# Verdicts of the pre-check; only TEXTLESS pages skip OCR
+TEXTLESS = "textless"
+UNSURE = "unsure"
+TEXT = "text"
+
+
+class TextPresenceService:
+    """
+    Cheap check for whether a page has any text, run before OCR
+    
+    Covers, splash pages and pure-art panels have no text but would still go
+    through full EasyOCR detection. This looks for lettering on a downscaled
+    grayscale copy in a few tens of milliseconds: high-contrast strokes are
+    split into connected components, and components of glyph height count
+    as text when they line up with neighbours of the same height (rows, or
+    columns for vertical text), when two of them sit together inside a
+    bright speech bubble, or when one is a merged word with several strokes
+    across. Random line art rarely does any of this.
+    
+    A wrong TEXTLESS verdict leaves text untranslated, so everything the
+    check cannot rule out makes a page UNSURE (full OCR as before): shapes
+    taller than the glyph band that are not thin outlines (large SFX or
+    shout lettering), lone glyph-sized marks on a bright background ("I",
+    "!?"), and pages with much ink, where lettering crossed by line art
+    merges into the art.
+    """
+    
+    def __init__(self, min_glyphs: int = 1, max_ink: float = 0.03, work_size: int = 1024,
+                 contrast: int = 70, max_candidates: int = 5000):
+        """
+        Initialize the pre-check
+        
+        Args:
+            min_glyphs: Text-like glyphs needed to call a page TEXT
+            max_ink: Largest ink share (0-1) of a page that can be called TEXTLESS
+            work_size: Longest side the page is downscaled to (strips keep 2/3 of
+                       their width at that size so their text does not vanish)
+            contrast: Gray levels by which ink must be darker (lighter, for light
+                      lettering) than its neighbourhood
+            max_candidates: Above this many glyph-sized components a page is UNSURE
+        """
+        self.min_glyphs = min_glyphs
+        self.max_ink = max_ink
+        self.work_size = work_size
+        self.contrast = contrast
+        self.max_candidates = max_candidates
+    
+    def classify(self, image: np.ndarray) -> Tuple[str, int, float]:
+        """
+        Decide whether a page needs OCR
+        
+        Args:
+            image: Page (BGR or grayscale)
+        
+        Returns:
+            Tuple of (verdict, text-like glyphs found, ink share of the page)
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        height, width = gray.shape
+        scale = min(1.0, self.work_size / max(width, min(height, 1.5 * width)))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+        
+        glyphs, ink, doubtful = 0, 0.0, False
+        # Dark lettering on light backgrounds, then light lettering on dark ones
+        for polarity in (gray, cv2.bitwise_not(gray)):
+            binary = cv2.adaptiveThreshold(
+                polarity, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, self.contrast
+            )
+            ink = max(ink, cv2.countNonZero(binary) / float(binary.size))
+            found = self._count_glyphs(binary, polarity)
+            if found is None:
+                return UNSURE, glyphs, ink
+            text, unsure = found
+            glyphs += text
+            doubtful = doubtful or unsure
+            if glyphs >= self.min_glyphs:
+                return TEXT, glyphs, ink
+        
+        return (TEXTLESS if ink <= self.max_ink and not doubtful else UNSURE), glyphs, ink
+    
+    def _count_glyphs(self, binary: np.ndarray, gray: np.ndarray) -> Optional[Tuple[int, bool]]:
+        """
+        Count text-like components of one polarity
+        
+        Returns:
+            Tuple of (glyphs that look like lettering, whether components that
+            may be text but do not look like it were found), or None if there
+            are too many candidates to judge
+        """
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        x, y, w, h, area = stats[1:].T
+        fill = area / np.maximum(w * h, 1)
+        # Lettering above the glyph band (outlines such as panel borders and
+        # bubbles are sparse, long straight lines too thin)
+        large = (h > 40) & (fill > 0.1) & (np.maximum(w, h) <= 12 * np.minimum(w, h))
+        candidates = np.flatnonzero((h >= 5) & (h <= 40) & (w <= h * 12) & (fill > 0.1))
+        if len(candidates) > self.max_candidates:
+            return None
+        if not len(candidates):
+            return 0, bool(large.any())
+        
+        boxes = stats[1:][candidates, :4].astype(np.int64)
+        in_rows = self._aligned(boxes)
+        in_columns = self._aligned(boxes[:, [1, 0, 3, 2]])
+        text = np.zeros(len(boxes), dtype=bool)
+        lone = False
+        for index, (row_neighbours, column_neighbours) in enumerate(zip(in_rows, in_columns)):
+            best = max(row_neighbours, column_neighbours, key=len)
+            if len(best) >= 2 or any(len(in_rows[n]) >= 2 or len(in_columns[n]) >= 2 for n in best):
+                # Part of a run of three or more aligned glyphs
+                text[index] = True
+            elif best and self._in_bubble(gray, boxes[[index, best[0]]]):
+                text[index] = True
+            else:
+                text[index] = self._is_word(labels, candidates[index] + 1, boxes[index])
+                # A single letter or mark in a bubble or on a blank background
+                lone = lone or (not text[index] and self._in_bubble(gray, boxes[[index]]))
+        return int(text.sum()), bool(large.any()) or lone
+    
+    @staticmethod
+    def _aligned(boxes: np.ndarray) -> List[List[int]]:
+        """
+        Neighbours of each box along a text row
+        
+        Two glyphs are neighbours when their tops and bottoms line up within a
+        quarter of their height and the gap between them is at most 1.2
+        heights (overlaps of a fifth are allowed for kerning). Passing boxes
+        with x/y swapped gives the neighbours along a column.
+        """
+        index = GridIndex(cell_size=int(np.median(boxes[:, 3])) * 2)
+        for i, (bx, by, bw, bh) in enumerate(boxes):
+            index.insert(i, bx, by, bx + bw, by + bh)
+        
+        neighbours: List[List[int]] = []
+        for i, (bx, by, bw, bh) in enumerate(boxes):
+            reach = 1.2 * bh
+            found = []
+            for j in index.query(bx - reach, by, bx + bw + reach, by + bh):
+                if j == i:
+                    continue
+                ox, oy, ow, oh = boxes[j]
+                tolerance = 0.25 * min(bh, oh) + 1
+                gap = max(bx, ox) - min(bx + bw, ox + ow)
+                if (abs(by - oy) <= tolerance and abs(by + bh - oy - oh) <= tolerance
+                        and -0.2 * min(bh, oh) < gap < 1.2 * min(bh, oh)):
+                    found.append(j)
+            neighbours.append(found)
+        return neighbours
+    
+    @staticmethod
+    def _in_bubble(gray: np.ndarray, boxes: np.ndarray, min_bright: float = 0.9) -> bool:
+        """Whether the ring around the glyphs is bright, as inside a speech bubble"""
+        x1, y1 = boxes[:, 0].min(), boxes[:, 1].min()
+        x2, y2 = (boxes[:, 0] + boxes[:, 2]).max(), (boxes[:, 1] + boxes[:, 3]).max()
+        margin = int(0.6 * boxes[:, 3].max()) + 1
+        window = gray[max(0, y1 - margin):y2 + margin, max(0, x1 - margin):x2 + margin]
+        ring = np.count_nonzero(window >= 200) - np.count_nonzero(gray[y1:y2, x1:x2] >= 200)
+        ring_area = window.size - (y2 - y1) * (x2 - x1)
+        return ring_area > 0 and ring / ring_area >= min_bright
+    
+    @staticmethod
+    def _is_word(labels: np.ndarray, label: int, box: np.ndarray) -> bool:
+        """Whether one component is several letters run together (many strokes across its middle)"""
+        bx, by, bw, bh = box
+        if bw < 1.3 * bh:
+            return False
+        component = labels[by:by + bh, bx:bx + bw] == label
+        middle = component[bh // 4:bh - bh // 4]
+        strokes = np.count_nonzero(middle[:, 1:] & ~middle[:, :-1], axis=1) + middle[:, 0]
+        return float(np.median(strokes)) >= max(3.0, 1.2 * bw / bh)
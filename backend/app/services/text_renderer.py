@@ -1,10 +1,22 @@
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-from typing import List, Tuple, Optional
-from app.models.schemas import DetectedText
+from typing import Callable, List, Tuple, Optional
+from app.models.detection_batch import DetectionBatch
+from app.config import settings
+from app.utils.metrics import CACHE_LOOKUPS
+from app.utils.font_utils import font_index
+from app.utils.logging_utils import get_logger
 import os
 
+logger = get_logger(__name__)
+
+# Keep PIL's decompression bomb guard in line with the upload limit
+Image.MAX_IMAGE_PIXELS = settings.max_image_pixels
+
+TURKISH_SAMPLE = "üşçığö ÜŞÇIĞÖİ"
+LINE_SPACING = 4  # Pixels between lines (PIL's multiline default)
+
 
 class TextRenderer:
     """Service for rendering translated text onto cleaned images"""
@@ -17,52 +29,37 @@ class TextRenderer:
             default_font_path: Path to default font file
         """
         self.default_font_path = default_font_path
+        self.font_dir = os.path.dirname(default_font_path or settings.default_font_path)
         self.font_cache = {}
         
-        # Define fallback font paths prioritizing Turkish character support
-        self.fallback_fonts = [
-            # macOS fonts with Turkish support
-            "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",  # Best Unicode support
-            "/System/Library/Fonts/Supplemental/Arial.ttf",
-            "/System/Library/Fonts/Supplemental/Verdana.ttf",
-            "/System/Library/Fonts/Helvetica.ttc",
-            "/Library/Fonts/Arial.ttf",
-            # Linux fonts with Turkish support
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",  # Excellent Unicode
-            "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-            "/usr/share/fonts/truetype/ubuntu/Ubuntu-R.ttf",
-            "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
-            # Windows fonts with Turkish support
-            "C:\\Windows\\Fonts\\arial.ttf",
-            "C:\\Windows\\Fonts\\verdana.ttf",
-            "C:\\Windows\\Fonts\\calibri.ttf",
-            "C:\\Windows\\Fonts\\segoeui.ttf",
-        ]
-        
-        # Find first available fallback font
-        self.system_font = None
-        for font_path in self.fallback_fonts:
-            if os.path.exists(font_path):
-                self.system_font = font_path
-                print(f"✅ Found system font with Turkish support: {font_path}")
-                break
+        # Glyph coverage of the installed fonts (built once, persisted to disk)
+        self.font_index = font_index.load()
         
-        if not self.system_font:
-            print("⚠️ No system fonts found, text may not display correctly")
+        # Preferred system font with Turkish support
+        self.system_font = self.font_index.font_for(TURKISH_SAMPLE) or self.font_index.default_font()
+        if self.system_font:
+            logger.info("✅ Found system font with Turkish support: %s", self.system_font)
+        else:
+            logger.warning("⚠️ No system fonts found, text may not display correctly")
         
-        print("✅ Text renderer initialized")
+        logger.info("✅ Text renderer initialized")
     
     def render_text(self, 
                    image: np.ndarray, 
-                   detected_texts: List[DetectedText],
-                   font_path: Optional[str] = None) -> np.ndarray:
+                   detected_texts: DetectionBatch,
+                   font_path: Optional[str] = None,
+                   on_progress: Optional[Callable[[int, int], None]] = None,
+                   precise: bool = True) -> np.ndarray:
         """
         Render all translated texts onto the image with Turkish character support
         
         Args:
             image: Input image (BGR format from OpenCV)
-            detected_texts: List of DetectedText objects with translations
+            detected_texts: Text regions with translations
             font_path: Optional custom font path
+            on_progress: Optional callback receiving (done, total) after each region
+            precise: Search the largest font size that fits each box (False:
+                     estimate it from the box area, for requests short on time)
             
         Returns:
             Image with rendered text (BGR format)
@@ -72,59 +69,157 @@ class TextRenderer:
         pil_image = Image.fromarray(image_rgb)
         draw = ImageDraw.Draw(pil_image)
         
-        for det_text in detected_texts:
-            if not det_text.translated_text:
-                continue
-            
-            # Ensure text is properly encoded
-            text_to_render = str(det_text.translated_text)
-            
-            # Calculate optimal font size for this text region
-            font_size = self._calculate_font_size(
-                text_to_render,
-                det_text.bbox.width,
-                det_text.bbox.height,
-                font_path
-            )
-            
-            # Load font with Turkish character support
-            font = self._get_font(font_path or self.default_font_path or self.system_font, font_size)
-            
-            # Calculate text position (centered in bounding box)
-            try:
-                text_bbox = draw.textbbox((0, 0), text_to_render, font=font)
-                text_width = text_bbox[2] - text_bbox[0]
-                text_height = text_bbox[3] - text_bbox[1]
-            except Exception as e:
-                print(f"⚠️ Error calculating text bbox: {e}")
-                # Fallback to approximate dimensions
-                text_width = len(text_to_render) * font_size // 2
-                text_height = font_size
-            
-            x = det_text.bbox.x + (det_text.bbox.width - text_width) // 2
-            y = det_text.bbox.y + (det_text.bbox.height - text_height) // 2
-            
-            # Draw text with black color (typical for manga)
-            try:
-                draw.text(
-                    (x, y),
-                    text_to_render,
-                    font=font,
-                    fill=(0, 0, 0),  # Black text
-                    stroke_width=0,
-                    encoding='utf-8'
+        total = len(detected_texts)
+        boxes = detected_texts.boxes.tolist()
+        font_sizes = detected_texts.font_sizes.tolist()
+        for index, translated in enumerate(detected_texts.translations):
+            if translated:
+                # Per-region font chosen by an editor (file name in the fonts directory)
+                font = detected_texts.fonts[index]
+                self._draw_region(
+                    draw, translated, boxes[index],
+                    os.path.join(self.font_dir, font) if font else font_path,
+                    font_sizes[index],
+                    precise
                 )
-                print(f"✏️ Rendered: '{text_to_render}' at ({x}, {y})")
-            except Exception as e:
-                print(f"⚠️ Error rendering text '{text_to_render}': {e}")
+            if on_progress is not None:
+                on_progress(index + 1, total)
         
         # Convert back to BGR for OpenCV
         result_rgb = np.array(pil_image)
         result_bgr = cv2.cvtColor(result_rgb, cv2.COLOR_RGB2BGR)
         
-        print(f"✅ Rendered {len(detected_texts)} text regions")
+        logger.info("✅ Rendered %d text regions", len(detected_texts))
         return result_bgr
     
+    def _draw_region(self,
+                     draw: ImageDraw.ImageDraw,
+                     text: str,
+                     box: Tuple[int, int, int, int],
+                     font_path: Optional[str] = None,
+                     font_size: int = 0,
+                     precise: bool = True):
+        """
+        Draw one translated text centered in its bounding box
+        
+        Args:
+            draw: PIL drawing context of the page
+            text: Translated text
+            box: (x, y, width, height) of the region
+            font_path: Optional custom font path
+            font_size: Fixed font size, 0 = fit the text to the box
+            precise: Search the fitting font size (False: estimate it)
+        """
+        # Ensure text is properly encoded
+        text_to_render = str(text)
+        box_x, box_y, box_width, box_height = box
+        
+        # Use one font with glyphs for the whole string (the requested one if
+        # possible); mix fonts glyph by glyph only when no single font has them all
+        primary = font_path or self.default_font_path or self.system_font
+        font_file = self.font_index.font_for(text_to_render, primary)
+        runs = None
+        if font_file is None and primary:
+            runs = self.font_index.fallback_runs(text_to_render, primary)
+        font_file = font_file or primary
+        
+        # Calculate optimal font size for this text region (unless fixed by an edit)
+        if not font_size:
+            font_size = (self._calculate_font_size(text_to_render, box_width, box_height, font_file)
+                         if precise else self._estimate_font_size(text_to_render, box_width, box_height))
+        
+        if runs is not None and len({path for path, _ in runs}) > 1:
+            self._draw_runs(draw, text_to_render, primary, box, font_size)
+            return
+        
+        font = self._get_font(font_file, font_size)
+        
+        # Break into lines that fit the box width (grouped bubbles hold whole sentences)
+        text_to_render = self._wrap_text(
+            text_to_render, lambda line: draw.textlength(line, font=font), box_width * 0.9
+        )
+        
+        # Calculate text position (centered in bounding box)
+        try:
+            text_bbox = draw.multiline_textbbox((0, 0), text_to_render, font=font, align="center")
+            text_width = text_bbox[2] - text_bbox[0]
+            text_height = text_bbox[3] - text_bbox[1]
+        except Exception as e:
+            logger.warning("⚠️ Error calculating text bbox: %s", e)
+            # Fallback to approximate dimensions
+            text_width = len(text_to_render) * font_size // 2
+            text_height = font_size
+        
+        x = box_x + (box_width - text_width) // 2
+        y = box_y + (box_height - text_height) // 2
+        
+        # Draw text with black color (typical for manga)
+        try:
+            draw.multiline_text(
+                (x, y),
+                text_to_render,
+                font=font,
+                fill=(0, 0, 0),  # Black text
+                align="center",
+                stroke_width=0
+            )
+            logger.debug("✏️ Rendered: '%s' at (%d, %d)", text_to_render, x, y)
+        except Exception as e:
+            logger.warning("⚠️ Error rendering text '%s': %s", text_to_render, e)
+    
+    def _draw_runs(self,
+                   draw: ImageDraw.ImageDraw,
+                   text: str,
+                   primary: str,
+                   box: Tuple[int, int, int, int],
+                   font_size: int):
+        """
+        Draw text centered in its box, mixing fonts glyph by glyph
+        
+        Used when no single font covers the text. Lines are wrapped and
+        centered like multiline_text; the runs of a line share one baseline
+        so glyphs from different fonts line up.
+        
+        Args:
+            draw: PIL drawing context of the page
+            text: Translated text
+            primary: Main font; missing glyphs come from the font index
+            box: (x, y, width, height) of the region
+            font_size: Font size for every run
+        """
+        box_x, box_y, box_width, box_height = box
+        fonts = {}
+        
+        def runs(line: str) -> List[Tuple[ImageFont.FreeTypeFont, str]]:
+            parts = []
+            for path, part in self.font_index.fallback_runs(line, primary):
+                if path not in fonts:
+                    fonts[path] = self._get_font(path, font_size)
+                parts.append((fonts[path], part))
+            return parts
+        
+        def measure(line: str) -> float:
+            return sum(draw.textlength(part, font=font) for font, part in runs(line))
+        
+        try:
+            lines = self._wrap_text(text, measure, box_width * 0.9).split("\n")
+            line_runs = [runs(line) for line in lines]
+            metrics = [font.getmetrics() for font in fonts.values()]
+            ascent = max(m[0] for m in metrics)
+            line_height = ascent + max(m[1] for m in metrics)
+            text_height = len(lines) * line_height + (len(lines) - 1) * LINE_SPACING
+            
+            y = box_y + (box_height - text_height) // 2
+            for line, parts in zip(lines, line_runs):
+                x = box_x + (box_width - measure(line)) / 2
+                for font, part in parts:
+                    draw.text((x, y + ascent), part, font=font, fill=(0, 0, 0), anchor="ls")
+                    x += draw.textlength(part, font=font)
+                y += line_height + LINE_SPACING
+            logger.debug("✏️ Rendered with %d fallback fonts: '%s'", len(fonts) - 1, text)
+        except Exception as e:
+            logger.warning("⚠️ Error rendering text '%s': %s", text, e)
+    
     def _calculate_font_size(self, 
                             text: str, 
                             bbox_width: int, 
@@ -156,8 +251,9 @@ class TextRenderer:
             mid = (low + high) // 2
             font = self._get_font(font_path or self.default_font_path, mid)
             
-            # Get text dimensions
-            bbox = draw.textbbox((0, 0), text, font=font)
+            # Get dimensions of the text wrapped to the box width
+            wrapped = self._wrap_text(text, lambda line: draw.textlength(line, font=font), bbox_width * 0.9)
+            bbox = draw.multiline_textbbox((0, 0), wrapped, font=font, align="center")
             text_width = bbox[2] - bbox[0]
             text_height = bbox[3] - bbox[1]
             
@@ -170,9 +266,60 @@ class TextRenderer:
         
         return optimal_size
     
+    def _estimate_font_size(self,
+                            text: str,
+                            bbox_width: int,
+                            bbox_height: int,
+                            min_size: int = 12,
+                            max_size: int = 48) -> int:
+        """
+        Font size from the text length and box size, without measuring any text
+        
+        Assumes an average glyph advance of 0.55 em and a line height of
+        1.2 em, and keeps the longest word on one line. Lands within a few
+        points of _calculate_font_size at a fraction of its cost.
+        
+        Returns:
+            Estimated font size
+        """
+        width, height = bbox_width * 0.9, bbox_height * 0.9
+        longest_word = max((len(word) for word in text.split()), default=1)
+        size = min(
+            (width * height / (max(len(text), 1) * 0.55 * 1.2)) ** 0.5,
+            width / (longest_word * 0.55),
+            height / 1.2
+        )
+        return int(max(min_size, min(max_size, size)))
+    
+    def _wrap_text(self,
+                   text: str,
+                   measure: Callable[[str], float],
+                   max_width: float) -> str:
+        """
+        Greedily break text into lines no wider than max_width
+        
+        Words longer than a line are kept whole (the font size search then
+        shrinks the font until they fit).
+        
+        Returns:
+            Text with newlines inserted
+        """
+        lines = []
+        current = ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if current and measure(candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            lines.append(current)
+        return "\n".join(lines)
+    
     def _get_font(self, font_path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
         """
-        Get font from cache or load it with fallback chain and Turkish character support
+        Get font from cache or load it, falling back to the system font and then PIL's default
         
         Args:
             font_path: Path to font file
@@ -184,62 +331,32 @@ class TextRenderer:
         cache_key = f"{font_path}_{size}"
         
         if cache_key in self.font_cache:
+            CACHE_LOOKUPS.labels(cache="font", result="hit").inc()
             return self.font_cache[cache_key]
+        CACHE_LOOKUPS.labels(cache="font", result="miss").inc()
         
-        # Try fonts in priority order
-        font_candidates = []
-        if font_path and os.path.exists(font_path):
-            font_candidates.append(font_path)
-        if self.system_font:
-            font_candidates.append(self.system_font)
-        font_candidates.extend([f for f in self.fallback_fonts if os.path.exists(f)])
-        
-        # Turkish test characters
-        turkish_chars = "üşçığö ÜŞÇIĞÖ"
-        
+        # Font selection already checked glyph coverage; fall back to the system font if loading fails
         font = None
-        for candidate in font_candidates:
+        for candidate in (font_path, self.system_font):
+            if not candidate:
+                continue
             try:
-                test_font = ImageFont.truetype(candidate, size)
-                # Test if font supports Turkish characters
-                try:
-                    # Try to get bbox for Turkish characters to verify support
-                    test_image = Image.new('RGB', (1, 1))
-                    test_draw = ImageDraw.Draw(test_image)
-                    test_draw.textbbox((0, 0), turkish_chars, font=test_font)
-                    font = test_font
-                    print(f"✅ Using font: {candidate} (Turkish characters supported)")
-                    break
-                except:
-                    # Font doesn't support Turkish characters well, try next
-                    continue
+                font = ImageFont.truetype(candidate, size)
+                break
             except Exception as e:
-                continue
-        
-        # Ultimate fallback: use any working font
-        if font is None:
-            for candidate in font_candidates:
-                try:
-                    font = ImageFont.truetype(candidate, size)
-                    print(f"⚠️ Using font: {candidate} (Turkish support uncertain)")
-                    break
-                except:
-                    continue
+                logger.warning("⚠️ Could not load font %s: %s", candidate, e)
         
         # Last resort: PIL default font
         if font is None:
-            try:
-                font = ImageFont.load_default()
-                print("⚠️ Using PIL default font (limited character support)")
-            except Exception as e:
-                font = ImageFont.load_default()
+            font = ImageFont.load_default()
+            logger.warning("⚠️ Using PIL default font (limited character support)")
         
         self.font_cache[cache_key] = font
         return font
     
     def add_background_box(self,
                           image: np.ndarray,
-                          detected_texts: List[DetectedText],
+                          detected_texts: DetectionBatch,
                           bg_color: Tuple[int, int, int] = (255, 255, 255),
                           opacity: float = 0.9) -> np.ndarray:
         """
@@ -247,7 +364,7 @@ class TextRenderer:
         
         Args:
             image: Input image
-            detected_texts: List of text regions
+            detected_texts: Text regions
             bg_color: Background color (BGR)
             opacity: Background opacity (0-1)
             
@@ -256,12 +373,11 @@ class TextRenderer:
         """
         overlay = image.copy()
         
-        for det_text in detected_texts:
-            bbox = det_text.bbox
+        for x1, y1, x2, y2 in detected_texts.corners().tolist():
             cv2.rectangle(
                 overlay,
-                (bbox.x, bbox.y),
-                (bbox.x + bbox.width, bbox.y + bbox.height),
+                (x1, y1),
+                (x2, y2),
                 bg_color,
                 -1  # Filled rectangle
             )
@@ -1,69 +1,143 @@
-from deep_translator import GoogleTranslator, MyMemoryTranslator, LibreTranslator
-from typing import List, Optional
-from app.models.schemas import DetectedText
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from app.models.detection_batch import DetectionBatch
+from app.services.deadline import CUT_RETRIES, Deadline
+from app.services.translator_clients import GoogleClient, LibreClient, MyMemoryClient
 from app.config import settings
+from app.utils.metrics import TRANSLATOR_OUTCOMES, CACHE_LOOKUPS
+from app.utils.logging_utils import get_logger
+import threading
 import time
 
+logger = get_logger(__name__)
+
+
+class UnsupportedLanguagePair(Exception):
+    """Raised when no translation backend supports a language pair"""
+
 
 class TranslationService:
-    """Service for translating text with multiple fallback options"""
+    """
+    Service for translating text with multiple fallback options
+    
+    Translator clients are bound to a language pair, so they are created on
+    first use of a (backend, source, target) combination and kept in an LRU
+    pool, letting one instance serve many language pairs. The clients are
+    cheap: they all send their requests over one pooled keep-alive HTTP
+    client per process (see translator_clients).
+    """
     
-    def __init__(self):
-        """Initialize translators with fallback chain"""
-        self.translators = []
+    # Fallback chain, tried in order
+    backends = ("Google", "MyMemory", "Libre")
+    
+    def __init__(self, pool_size: Optional[int] = None):
+        """
+        Initialize the translator pool
         
-        # Primary: Google Translator
-        try:
-            self.translators.append((
-                "Google",
-                GoogleTranslator(
-                    source=settings.translation_source_lang,
-                    target=settings.translation_target_lang
-                )
-            ))
-            print("✅ Google Translator initialized")
-        except Exception as e:
-            print(f"⚠️ Google Translator initialization failed: {e}")
+        Args:
+            pool_size: Maximum number of cached translator clients
+                       (default: settings.translator_pool_size)
+        """
+        self.pool_size = pool_size or settings.translator_pool_size
+        # (backend, source, target) -> (client or None if it failed, creation time)
+        self._pool: "OrderedDict[Tuple[str, str, str], Tuple[Optional[object], float]]" = OrderedDict()
+        self._pool_lock = threading.Lock()
         
-        # Fallback 1: MyMemory Translator
-        try:
-            self.translators.append((
-                "MyMemory",
-                MyMemoryTranslator(
-                    source=settings.translation_source_lang,
-                    target=settings.translation_target_lang
-                )
-            ))
-            print("✅ MyMemory Translator initialized as fallback")
-        except Exception as e:
-            print(f"⚠️ MyMemory Translator initialization failed: {e}")
+        # Warm the pool for the default language pair
+        translators = self.get_translators(
+            settings.translation_source_lang,
+            settings.translation_target_lang
+        )
+        if not translators:
+            logger.warning("⚠️ No translators available! Translation will return original text.")
+        
+        logger.info("✅ Translation service initialized with %d translator(s)", len(translators))
+    
+    def _create_translator(self, backend: str, source: str, target: str):
+        """Build a translator client for one backend and language pair"""
+        if backend == "Google":
+            return GoogleClient(source, target, settings.google_translate_url)
+        if backend == "MyMemory":
+            return MyMemoryClient(source, target, settings.mymemory_url)
+        if backend == "Libre":
+            return LibreClient(source, target, settings.libre_translate_url, api_key=settings.libre_api_key)
+        raise ValueError(f"Unknown translation backend: {backend}")
+    
+    def _get_translator(self, backend: str, source: str, target: str):
+        """
+        Get a pooled translator client, creating it on first use
+        
+        Clients that fail to initialize (e.g. unsupported language pair) are
+        cached as None for settings.translator_retry_seconds, so the failure
+        is not retried on every request but does not disable the backend for
+        the life of the process either.
+        """
+        key = (backend, source, target)
+        with self._pool_lock:
+            entry = self._pool.get(key)
+            if entry is not None:
+                translator, created_at = entry
+                if translator is not None or time.monotonic() - created_at < settings.translator_retry_seconds:
+                    self._pool.move_to_end(key)
+                    CACHE_LOOKUPS.labels(cache="translator", result="hit").inc()
+                    return translator
         
-        # Fallback 2: LibreTranslate (if available)
+        CACHE_LOOKUPS.labels(cache="translator", result="miss").inc()
         try:
-            self.translators.append((
-                "Libre",
-                LibreTranslator(
-                    source=settings.translation_source_lang,
-                    target=settings.translation_target_lang,
-                    base_url="https://libretranslate.com"
-                )
-            ))
-            print("✅ LibreTranslate initialized as fallback")
+            translator = self._create_translator(backend, source, target)
+            logger.info("✅ %s Translator initialized (%s → %s)", backend, source, target)
         except Exception as e:
-            print(f"⚠️ LibreTranslate initialization failed: {e}")
+            logger.warning("⚠️ %s Translator initialization failed (%s → %s): %s", backend, source, target, e)
+            translator = None
         
-        if not self.translators:
-            print("⚠️ No translators available! Translation will return original text.")
+        with self._pool_lock:
+            self._pool[key] = (translator, time.monotonic())
+            self._pool.move_to_end(key)
+            while len(self._pool) > self.pool_size:
+                self._pool.popitem(last=False)
+        return translator
+    
+    def get_translators(self, source_lang: str, target_lang: str) -> List[Tuple[str, object]]:
+        """
+        Fallback chain of available translators for a language pair
         
-        print(f"✅ Translation service initialized with {len(self.translators)} translator(s)")
+        Args:
+            source_lang: Source language code
+            target_lang: Target language code
+            
+        Returns:
+            List of (backend name, translator) in fallback order
+        """
+        translators = []
+        for backend in self.backends:
+            translator = self._get_translator(backend, source_lang, target_lang)
+            if translator is not None:
+                translators.append((backend, translator))
+        return translators
     
-    def translate_text(self, text: str, max_retries: int = 3) -> str:
+    def check_language_pair(self, source_lang: str, target_lang: str):
+        """
+        Make sure at least one backend can translate a language pair
+        
+        Raises:
+            UnsupportedLanguagePair: If every backend rejects the pair
+        """
+        if source_lang != target_lang and not self.get_translators(source_lang, target_lang):
+            raise UnsupportedLanguagePair(
+                f"No translation backend supports {source_lang} → {target_lang}"
+            )
+    
+    def translate_text(self, text: str, max_retries: int = 3,
+                       source_lang: Optional[str] = None,
+                       target_lang: Optional[str] = None) -> str:
         """
         Translate a single text string with retry and fallback
         
         Args:
             text: Text to translate
             max_retries: Maximum retry attempts per translator
+            source_lang: Source language code (default: settings)
+            target_lang: Target language code (default: settings)
             
         Returns:
             Translated text
@@ -71,58 +145,89 @@ class TranslationService:
         if not text or not text.strip():
             return ""
         
-        if not self.translators:
-            print("⚠️ No translators available")
+        source_lang = source_lang or settings.translation_source_lang
+        target_lang = target_lang or settings.translation_target_lang
+        if source_lang == target_lang:
+            return text
+        
+        translators = self.get_translators(source_lang, target_lang)
+        if not translators:
+            logger.warning("⚠️ No translators available for %s → %s", source_lang, target_lang)
             return text
         
         # Try each translator in order
-        for translator_name, translator in self.translators:
+        for translator_name, translator in translators:
             for attempt in range(max_retries):
                 try:
                     translated = translator.translate(text)
                     if translated and translated.strip():
+                        TRANSLATOR_OUTCOMES.labels(backend=translator_name, outcome="success").inc()
                         return translated
+                    TRANSLATOR_OUTCOMES.labels(backend=translator_name, outcome="empty").inc()
                 except Exception as e:
+                    TRANSLATOR_OUTCOMES.labels(backend=translator_name, outcome="error").inc()
                     if attempt < max_retries - 1:
                         wait_time = (attempt + 1) * 0.5  # Progressive backoff
-                        print(f"⚠️ {translator_name} error (attempt {attempt + 1}/{max_retries}), retrying in {wait_time}s...")
+                        logger.warning("⚠️ %s error (attempt %d/%d), retrying in %ss...", translator_name, attempt + 1, max_retries, wait_time)
                         time.sleep(wait_time)
                     else:
-                        print(f"⚠️ {translator_name} failed after {max_retries} attempts: {e}")
+                        logger.warning("⚠️ %s failed after %d attempts: %s", translator_name, max_retries, e)
+            TRANSLATOR_OUTCOMES.labels(backend=translator_name, outcome="gave_up").inc()
         
         # All translators failed, return original text
-        print(f"⚠️ All translation services failed for '{text}', returning original")
+        logger.warning("⚠️ All translation services failed for '%s', returning original", text)
         return text
     
-    def translate_detected_texts(self, detected_texts: List[DetectedText]) -> List[DetectedText]:
+    def translate_detected_texts(self, detected_texts: DetectionBatch,
+                                 on_progress: Optional[Callable[[int, int], None]] = None,
+                                 source_lang: Optional[str] = None,
+                                 target_lang: Optional[str] = None,
+                                 deadline: Optional[Deadline] = None) -> DetectionBatch:
         """
-        Translate all detected text objects
+        Translate all detected text regions
         
         Args:
-            detected_texts: List of DetectedText objects
+            detected_texts: Detected text regions
+            on_progress: Optional callback receiving (done, total) after each region
+            source_lang: Source language code (default: settings)
+            target_lang: Target language code (default: settings)
+            deadline: Request deadline; once it runs low, the remaining regions
+                      try each translator only once
             
         Returns:
-            List of DetectedText objects with translated_text filled
+            The same batch with its translations column filled
         """
-        for det_text in detected_texts:
-            translated = self.translate_text(det_text.text)
-            det_text.translated_text = translated
-            print(f"🔄 '{det_text.text}' → '{translated}'")
+        total = len(detected_texts)
+        for index, text in enumerate(detected_texts.texts):
+            retries = 1 if deadline is not None and deadline.degrade(CUT_RETRIES) else 3
+            translated = self.translate_text(
+                text, max_retries=retries, source_lang=source_lang, target_lang=target_lang
+            )
+            detected_texts.translations[index] = translated
+            logger.debug("🔄 '%s' → '%s'", text, translated)
+            if on_progress is not None:
+                on_progress(index + 1, total)
+        if source_lang and source_lang != "auto":
+            detected_texts.languages[:] = source_lang
         
-        print(f"✅ Translated {len(detected_texts)} text regions")
+        logger.info("✅ Translated %d text regions", total)
         return detected_texts
     
-    def batch_translate(self, texts: List[str]) -> List[str]:
+    def batch_translate(self, texts: List[str],
+                        source_lang: Optional[str] = None,
+                        target_lang: Optional[str] = None) -> List[str]:
         """
         Translate multiple texts at once
         
         Args:
             texts: List of text strings to translate
+            source_lang: Source language code (default: settings)
+            target_lang: Target language code (default: settings)
             
         Returns:
             List of translated text strings
         """
         translations = []
         for text in texts:
-            translations.append(self.translate_text(text))
+            translations.append(self.translate_text(text, source_lang=source_lang, target_lang=target_lang))
         return translations
@@ -0,0 +1,223 @@
+import atexit
+import html
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+import httpx
+from deep_translator.constants import (
+    GOOGLE_LANGUAGES_TO_CODES,
+    LIBRE_LANGUAGES_TO_CODES,
+    MY_MEMORY_LANGUAGES_TO_CODES,
+)
+from app.config import settings
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import TRANSLATOR_REQUEST_LATENCY
+
+logger = get_logger(__name__)
+
+# Translation element of Google's mobile page (older layouts use class "t0")
+_GOOGLE_RESULT = re.compile(r'<div[^>]*class="(?:result-container|t0)"[^>]*>(.*?)</div>', re.DOTALL)
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+class TranslatorError(Exception):
+    """Raised when a backend answers without a usable translation"""
+
+
+def http_client() -> httpx.Client:
+    """
+    Process-wide HTTP client shared by all translator backends
+    
+    Connections are pooled and kept alive between requests, so consecutive
+    bubbles (and pages) reuse an open TCP/TLS connection to each provider
+    instead of paying the handshake on every call. The client is
+    thread-safe; pool size and timeouts come from settings.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.translator_max_connections,
+                    max_keepalive_connections=settings.translator_max_keepalive,
+                    keepalive_expiry=settings.translator_keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    settings.translator_timeout,
+                    connect=settings.translator_connect_timeout,
+                    pool=settings.translator_pool_timeout,
+                ),
+                headers={"User-Agent": "Mozilla/5.0 (MangaMa)"},
+                follow_redirects=True,
+            )
+            logger.info("🔌 Translator HTTP pool opened (%d connections, %d keep-alive)",
+                        settings.translator_max_connections, settings.translator_max_keepalive)
+        return _client
+
+
+def close_http_client():
+    """Close the shared client and its pooled connections"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _reset_client_in_child():
+    """
+    Drop the parent's client in a forked child
+    
+    Its pooled sockets are shared with the parent; the child opens its own
+    connections on first use instead of interleaving requests on them.
+    """
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+atexit.register(close_http_client)
+os.register_at_fork(after_in_child=_reset_client_in_child)
+
+
+class HTTPTranslator(ABC):
+    """
+    Translator bound to one backend and language pair, with the deep_translator interface
+    
+    Subclasses only build the request and parse the response; the HTTP
+    client (the shared pool by default) is resolved on every call, so a
+    translator kept in TranslationService's pool survives a fork.
+    """
+    
+    backend = ""
+    languages: Dict[str, str] = {}  # Language name -> code accepted by the backend
+    
+    def __init__(self, source: str, target: str, base_url: str,
+                 client: Optional[httpx.Client] = None):
+        """
+        Args:
+            source: Source language code or name ("auto" to detect)
+            target: Target language code or name
+            base_url: Backend endpoint
+            client: HTTP client to use (default: the shared pool)
+        
+        Raises:
+            ValueError: If the backend does not support a language
+        """
+        self.source = self._language_code(source, allow_auto=True)
+        self.target = self._language_code(target)
+        self.base_url = base_url
+        self.client = client
+    
+    def _language_code(self, language: str, allow_auto: bool = False) -> str:
+        if allow_auto and language == "auto":
+            return language
+        if language in self.languages.values():
+            return language
+        if language.lower() in self.languages:
+            return self.languages[language.lower()]
+        raise ValueError(f"{self.backend} does not support language: {language}")
+    
+    def translate(self, text: str) -> str:
+        """
+        Translate one text
+        
+        Raises:
+            httpx.HTTPError: On connection errors, timeouts and error statuses
+            TranslatorError: If the response holds no translation
+        """
+        text = text.strip()
+        if not text or self.source == self.target:
+            return text
+        
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            translated = self._request(self.client or http_client(), text)
+            outcome = "ok"
+            return translated
+        finally:
+            TRANSLATOR_REQUEST_LATENCY.labels(backend=self.backend, outcome=outcome).observe(
+                time.perf_counter() - start
+            )
+    
+    @abstractmethod
+    def _request(self, client: httpx.Client, text: str) -> str:
+        """Send one translation request and return the translated text"""
+
+
+class GoogleClient(HTTPTranslator):
+    """Google Translate mobile web page (no API key)"""
+    
+    backend = "Google"
+    languages = GOOGLE_LANGUAGES_TO_CODES
+    
+    def _request(self, client: httpx.Client, text: str) -> str:
+        response = client.get(self.base_url, params={"sl": self.source, "tl": self.target, "q": text})
+        response.raise_for_status()
+        match = _GOOGLE_RESULT.search(response.text)
+        if not match:
+            raise TranslatorError(f"No translation in Google response for '{text}'")
+        return html.unescape(re.sub(r"<[^>]+>", "", match.group(1))).strip()
+
+
+class MyMemoryClient(HTTPTranslator):
+    """MyMemory translation memory API"""
+    
+    backend = "MyMemory"
+    languages = MY_MEMORY_LANGUAGES_TO_CODES
+    
+    def _language_code(self, language: str, allow_auto: bool = False) -> str:
+        # The API also takes plain ISO 639-1 codes ("en"), the table only has locales ("en-GB")
+        if any(code.split("-")[0] == language for code in self.languages.values()):
+            return language
+        return super()._language_code(language, allow_auto)
+    
+    def _request(self, client: httpx.Client, text: str) -> str:
+        response = client.get(self.base_url, params={"q": text, "langpair": f"{self.source}|{self.target}"})
+        response.raise_for_status()
+        data = response.json()
+        translated = (data.get("responseData") or {}).get("translatedText")
+        if not translated:
+            matches = data.get("matches") or []
+            translated = matches[0].get("translation") if matches else None
+        if not translated:
+            raise TranslatorError(f"No translation in MyMemory response for '{text}'")
+        return translated
+
+
+class LibreClient(HTTPTranslator):
+    """LibreTranslate API (libretranslate.com or a self-hosted server)"""
+    
+    backend = "Libre"
+    languages = {name.lower(): code for name, code in LIBRE_LANGUAGES_TO_CODES.items()}
+    
+    def __init__(self, source: str, target: str, base_url: str, api_key: str = "",
+                 client: Optional[httpx.Client] = None):
+        """
+        Args:
+            api_key: API key (required by the public libretranslate.com)
+        
+        Raises:
+            ValueError: If a language is unsupported or the public server has no key
+        """
+        if not api_key and httpx.URL(base_url).host == "libretranslate.com":
+            raise ValueError("libretranslate.com requires LIBRE_API_KEY")
+        super().__init__(source, target, base_url, client)
+        self.api_key = api_key
+    
+    def _request(self, client: httpx.Client, text: str) -> str:
+        payload = {"q": text, "source": self.source, "target": self.target, "format": "text"}
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        response = client.post(self.base_url.rstrip("/") + "/translate", json=payload)
+        response.raise_for_status()
+        translated = response.json().get("translatedText")
+        if not translated:
+            raise TranslatorError(f"No translation in Libre response for '{text}'")
+        return translated
@@ -1,74 +1,327 @@
-from PIL import ImageFont
+import json
 import os
-from typing import Optional, List
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fontTools.ttLib import TTFont
+from app.config import settings
+from app.utils.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# System font locations (Linux, macOS, Windows)
+SYSTEM_FONT_DIRS = [
+    "/usr/share/fonts/",
+    "/usr/local/share/fonts/",
+    os.path.expanduser("~/.fonts"),
+    "/System/Library/Fonts/",
+    "/Library/Fonts/",
+    "C:/Windows/Fonts/",
+]
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Preferred faces, best first (good Latin Extended / Turkish coverage); any
+# other indexed font follows, widest coverage first
+PREFERRED_FONTS = [
+    "Arial Unicode.ttf",
+    "Arial.ttf",
+    "arial.ttf",
+    "Verdana.ttf",
+    "verdana.ttf",
+    "Helvetica.ttc",
+    "DejaVuSans.ttf",
+    "LiberationSans-Regular.ttf",
+    "FreeSans.ttf",
+    "Ubuntu-R.ttf",
+    "NotoSans-Regular.ttf",
+    "calibri.ttf",
+    "segoeui.ttf",
+]
+
+INDEX_VERSION = 1
+
+
+def scan_font_files(font_dirs: Sequence[str]) -> List[str]:
+    """
+    Find font files under the given directories (one directory walk)
+
+    Args:
+        font_dirs: Directories to search recursively (missing ones are skipped)
+
+    Returns:
+        Absolute font paths, without duplicates
+    """
+    found = {}
+    for font_dir in font_dirs:
+        if not os.path.isdir(font_dir):
+            continue
+        for root, _, files in os.walk(font_dir):
+            for name in files:
+                if name.lower().endswith(FONT_EXTENSIONS):
+                    path = os.path.abspath(os.path.join(root, name))
+                    found.setdefault(path, None)
+    return list(found)
+
+
+def read_coverage(font_path: str) -> List[List[int]]:
+    """
+    Codepoints mapped by a font's cmap, as sorted [first, last] ranges
+
+    Collections (.ttc) are read from their first face, the one PIL loads by
+    default. Unreadable files have no coverage.
+    """
+    try:
+        with TTFont(font_path, fontNumber=0, lazy=True) as font:
+            codepoints = sorted((font.getBestCmap() or {}).keys())
+    except Exception as e:
+        logger.debug("Skipping unreadable font %s: %s", font_path, e)
+        return []
+
+    ranges: List[List[int]] = []
+    for codepoint in codepoints:
+        if ranges and codepoint == ranges[-1][1] + 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ranges
+
+
+class _Coverage:
+    """Codepoint ranges of one font, for vectorized membership tests"""
+
+    __slots__ = ("starts", "ends", "size")
+
+    def __init__(self, ranges: List[List[int]]):
+        bounds = np.array(ranges, dtype=np.int64).reshape(-1, 2)
+        self.starts = bounds[:, 0]
+        self.ends = bounds[:, 1]
+        self.size = int((self.ends - self.starts + 1).sum())
+
+    def covers(self, codepoints: np.ndarray) -> np.ndarray:
+        """Boolean mask of the codepoints this font has a glyph for"""
+        i = np.searchsorted(self.starts, codepoints, side="right") - 1
+        return (i >= 0) & (codepoints <= self.ends[np.maximum(i, 0)])
+
+
+class FontIndex:
+    """
+    Glyph coverage of the installed fonts, built once and persisted to disk
+
+    On first use the font directories are walked and every font's cmap is
+    read with fontTools; the result is saved to index_path together with
+    each file's size and mtime, so later starts only read new or changed
+    files. Choosing a font for a string is then a coverage lookup: the
+    requested font if it has every glyph, else the best font that does,
+    else a per-glyph fallback split into runs.
+    """
+
+    def __init__(self, index_path: str, font_dirs: Sequence[str]):
+        """
+        Args:
+            index_path: JSON file the index is persisted to
+            font_dirs: Directories to scan for fonts
+        """
+        self.index_path = index_path
+        self.font_dirs = list(font_dirs)
+        self._coverage: Dict[str, _Coverage] = {}
+        self._order: List[str] = []
+        self._glyph_fonts: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self) -> "FontIndex":
+        """Read the persisted index, rescanning only new or changed font files (idempotent)"""
+        with self._lock:
+            if self._loaded:
+                return self
+
+            cached = self._read()
+            entries: Dict[str, Dict] = {}
+            scanned = 0
+            for path in scan_font_files(self.font_dirs):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = cached.get(path)
+                if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                    entry = {"mtime": stat.st_mtime, "size": stat.st_size, "ranges": read_coverage(path)}
+                    scanned += 1
+                entries[path] = entry
+
+            if scanned or entries.keys() != cached.keys():
+                self._write(entries)
+
+            self._coverage = {path: _Coverage(e["ranges"]) for path, e in entries.items() if e["ranges"]}
+            self._order = sorted(self._coverage, key=self._priority)
+            self._glyph_fonts.clear()
+            self._loaded = True
+
+        logger.info("🔤 Font index ready: %d fonts (%d scanned)", len(self._coverage), scanned)
+        return self
+
+    def _priority(self, path: str) -> Tuple[int, int, str]:
+        name = os.path.basename(path)
+        rank = PREFERRED_FONTS.index(name) if name in PREFERRED_FONTS else len(PREFERRED_FONTS)
+        return rank, -self._coverage[path].size, path
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data.get("fonts", {}) if data.get("version") == INDEX_VERSION else {}
+
+    def _write(self, entries: Dict[str, Dict]):
+        # Write then rename so a concurrently starting process never reads a partial file
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "fonts": entries}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning("⚠️ Could not save font index to %s: %s", self.index_path, e)
+
+    def _coverage_of(self, font_path: str) -> Optional[_Coverage]:
+        """Coverage of a font, indexing it on demand if it is outside the scanned directories"""
+        path = os.path.abspath(font_path)
+        coverage = self._coverage.get(path)
+        if coverage is None and os.path.isfile(path):
+            ranges = read_coverage(path)
+            if ranges:
+                coverage = self._coverage[path] = _Coverage(ranges)
+        return coverage
+
+    @property
+    def fonts(self) -> List[str]:
+        """Indexed fonts in preference order"""
+        self.load()
+        return list(self._order)
+
+    def default_font(self) -> Optional[str]:
+        """Most preferred indexed font"""
+        self.load()
+        return self._order[0] if self._order else None
+
+    @staticmethod
+    def _codepoints(text: str) -> np.ndarray:
+        # Whitespace is laid out by the renderer, not drawn as a glyph
+        return np.array(sorted({ord(ch) for ch in text if not ch.isspace()}), dtype=np.int64)
+
+    def covers(self, font_path: str, text: str) -> bool:
+        """Whether a font has a glyph for every character of text"""
+        self.load()
+        coverage = self._coverage_of(font_path)
+        return coverage is not None and bool(coverage.covers(self._codepoints(text)).all())
+
+    def font_for(self, text: str, preferred: Optional[str] = None) -> Optional[str]:
+        """
+        One font able to draw the whole string
+
+        Args:
+            text: Text to draw
+            preferred: Font to use if it covers the text
+
+        Returns:
+            preferred, else the first font in preference order covering every
+            character, else None
+        """
+        self.load()
+        codepoints = self._codepoints(text)
+        candidates = ([preferred] if preferred else []) + self._order
+        for path in candidates:
+            coverage = self._coverage_of(path)
+            if coverage is not None and coverage.covers(codepoints).all():
+                return path
+        return None
+
+    def glyph_font(self, char: str) -> Optional[str]:
+        """First font in preference order with a glyph for char (memoized)"""
+        self.load()
+        if char not in self._glyph_fonts:
+            codepoint = np.array([ord(char)], dtype=np.int64)
+            self._glyph_fonts[char] = next(
+                (path for path in self._order if self._coverage[path].covers(codepoint)[0]), None
+            )
+        return self._glyph_fonts[char]
+
+    def fallback_runs(self, text: str, preferred: str) -> List[Tuple[str, str]]:
+        """
+        Split text into runs that can each be drawn with one font
+
+        Characters the preferred font lacks fall back glyph by glyph to the
+        first indexed font that has them; whitespace and characters no font
+        covers stay with the surrounding run.
+
+        Args:
+            text: Text to draw
+            preferred: Main font
+
+        Returns:
+            List of (font path, text run)
+        """
+        self.load()
+        coverage = self._coverage_of(preferred)
+        chars = list(text)
+        codepoints = np.array([ord(ch) for ch in chars], dtype=np.int64)
+        own = coverage.covers(codepoints) if coverage is not None else np.zeros(len(chars), dtype=bool)
+
+        runs: List[Tuple[str, str]] = []
+        for ch, covered in zip(chars, own.tolist()):
+            font = preferred if covered or ch.isspace() else (self.glyph_font(ch) or preferred)
+            if ch.isspace() and runs:
+                font = runs[-1][0]
+            if runs and runs[-1][0] == font:
+                runs[-1] = (font, runs[-1][1] + ch)
+            else:
+                runs.append((font, ch))
+        return runs
+
+
+# Shared index; built on first use (the text renderer loads it at startup)
+font_index = FontIndex(
+    settings.font_index_path,
+    SYSTEM_FONT_DIRS + [os.path.dirname(settings.default_font_path)] + settings.font_dirs_list
+)
 
 
 def get_available_fonts() -> List[str]:
     """
     Get list of available system fonts
-    
+
     Returns:
-        List of font paths
+        List of font paths (from the font index, preferred fonts first)
     """
-    font_dirs = [
-        "/usr/share/fonts/truetype/",
-        "/System/Library/Fonts/",
-        "C:/Windows/Fonts/",
-    ]
-    
-    available_fonts = []
-    
-    for font_dir in font_dirs:
-        if os.path.exists(font_dir):
-            for root, dirs, files in os.walk(font_dir):
-                for file in files:
-                    if file.endswith(('.ttf', '.otf')):
-                        available_fonts.append(os.path.join(root, file))
-    
-    return available_fonts
+    return font_index.fonts
 
 
-def find_font_with_unicode_support(unicode_ranges: Optional[List[str]] = None) -> Optional[str]:
+def find_font_with_unicode_support(sample_text: Optional[str] = None) -> Optional[str]:
     """
-    Find a system font that supports specified Unicode ranges
-    
+    Find a system font that supports the given characters
+
     Args:
-        unicode_ranges: List of Unicode ranges to check
-        
+        sample_text: Characters the font must cover (default: Turkish letters)
+
     Returns:
         Path to suitable font or None
     """
-    # Common fonts with good Turkish support
-    preferred_fonts = [
-        "DejaVuSans.ttf",
-        "Arial.ttf",
-        "LiberationSans-Regular.ttf",
-        "FreeSans.ttf",
-    ]
-    
-    available_fonts = get_available_fonts()
-    
-    # Check for preferred fonts first
-    for preferred in preferred_fonts:
-        for font_path in available_fonts:
-            if preferred in font_path:
-                return font_path
-    
-    # Return first available font
-    return available_fonts[0] if available_fonts else None
+    return font_index.font_for(sample_text or "üşçığö ÜŞÇIĞÖİ") or font_index.default_font()
 
 
 def get_default_manga_font() -> str:
     """
     Get default font suitable for manga text
-    
+
     Returns:
         Path to default font
     """
     font_path = find_font_with_unicode_support()
-    
+
     if font_path is None:
         # Fallback to PIL default font
         return ""
-    
+
     return font_path
@@ -1,6 +1,6 @@
 import cv2
 import numpy as np
-from typing import Tuple
+from typing import Tuple, Optional
 
 
 def resize_image(image: np.ndarray, max_dimension: int = 2048) -> np.ndarray:
@@ -28,6 +28,33 @@ def resize_image(image: np.ndarray, max_dimension: int = 2048) -> np.ndarray:
     return resized
 
 
+def adaptive_threshold(gray: np.ndarray, block_size: int = 11, c: int = 2,
+                       invert: bool = False) -> np.ndarray:
+    """
+    Binarize a grayscale image with Gaussian adaptive thresholding
+    
+    Args:
+        gray: Grayscale image
+        block_size: Size of the pixel neighborhood (forced to odd, >= 3)
+        c: Constant subtracted from the weighted mean
+        invert: Mark dark pixels (ink) as white instead of light ones
+        
+    Returns:
+        Binary image (0/255)
+    """
+    block_size = max(3, block_size | 1)
+    threshold_type = cv2.THRESH_BINARY_INV if invert else cv2.THRESH_BINARY
+    
+    return cv2.adaptiveThreshold(
+        gray,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        threshold_type,
+        block_size,
+        c
+    )
+
+
 def preprocess_for_ocr(image: np.ndarray) -> np.ndarray:
     """
     Preprocess image for better OCR results
@@ -42,18 +69,52 @@ def preprocess_for_ocr(image: np.ndarray) -> np.ndarray:
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     
     # Apply adaptive thresholding for better text detection
-    processed = cv2.adaptiveThreshold(
-        gray,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY,
-        11,
-        2
-    )
+    processed = adaptive_threshold(gray, block_size=11, c=2)
     
     return processed
 
 
+def extract_ink_mask(gray_region: np.ndarray,
+                     min_coverage: float = 0.01,
+                     max_coverage: float = 0.6) -> Optional[np.ndarray]:
+    """
+    Extract glyph strokes inside a text region
+    
+    Uses the same adaptive thresholding as OCR preprocessing, with the block
+    size scaled to the region so thick strokes are not lost. Polarity is taken
+    from the region border: light borders mean dark ink, dark borders mean
+    light ink.
+    
+    Args:
+        gray_region: Grayscale crop around a single text region
+        min_coverage: Below this ink ratio the result is considered unreliable
+        max_coverage: Above this ink ratio the result is considered unreliable
+        
+    Returns:
+        Binary ink mask (0/255) or None if the strokes could not be isolated
+    """
+    height, width = gray_region.shape[:2]
+    if height < 3 or width < 3:
+        return None
+    
+    border = np.concatenate([
+        gray_region[0, :], gray_region[-1, :],
+        gray_region[:, 0], gray_region[:, -1]
+    ])
+    if float(np.median(border)) < 128:
+        # Light text on dark background: flip so ink is always the dark side
+        gray_region = cv2.bitwise_not(gray_region)
+    
+    block_size = max(11, min(height, width) // 2)
+    ink = adaptive_threshold(gray_region, block_size=block_size, c=8, invert=True)
+    
+    coverage = cv2.countNonZero(ink) / float(height * width)
+    if coverage < min_coverage or coverage > max_coverage:
+        return None
+    
+    return ink
+
+
 def enhance_contrast(image: np.ndarray) -> np.ndarray:
     """
     Enhance image contrast using CLAHE
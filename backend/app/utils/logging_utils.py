@@ -0,0 +1,137 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+
+# Correlation ids propagated through asyncio tasks and worker threads
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+job_id_var: ContextVar[str] = ContextVar("job_id", default="-")
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "job_id"
+}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class ContextFilter(logging.Filter):
+    """Attach the current request and job ids to every record"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.job_id = job_id_var.get()
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "job_id": getattr(record, "job_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s/%(job_id)s] %(name)s: %(message)s"
+
+
+def setup_logging(level: str = "INFO", fmt: str = "text"):
+    """
+    Configure non-blocking application logging
+    
+    Records are formatted and written to stdout by a background QueueListener
+    thread, so request handlers and pipeline loops only pay for enqueueing.
+    Calling this more than once replaces the previous configuration.
+    
+    Args:
+        level: Root log level for the app (DEBUG enables per-region detail)
+        fmt: "text" for human-readable lines or "json" for structured output
+    """
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+    
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    
+    app_logger = logging.getLogger("app")
+    app_logger.handlers = [queue_handler]
+    app_logger.setLevel(level.upper())
+    app_logger.propagate = False
+    
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush and stop the background log writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_logging_in_child():
+    """
+    Give a forked child its own log writer
+    
+    The listener thread does not survive fork(), so records would pile up
+    unwritten; the child gets a fresh queue (records the parent had not
+    written yet stay the parent's) and a new listener over the same output.
+    """
+    global _listener
+    if _listener is None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in logging.getLogger("app").handlers:
+        if isinstance(handler, logging.handlers.QueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+os.register_at_fork(after_in_child=_restart_logging_in_child)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get a logger under the app namespace (use __name__)"""
+    return logging.getLogger(name)
+
+
+@contextmanager
+def job_context(job_id: str):
+    """Tag all log records emitted inside the block with a job id"""
+    token = job_id_var.set(job_id)
+    try:
+        yield
+    finally:
+        job_id_var.reset(token)
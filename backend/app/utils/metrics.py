@@ -0,0 +1,124 @@
+from prometheus_client import Counter, Gauge, Histogram
+from contextlib import contextmanager
+from typing import Dict
+import time
+
+
+# Pipeline stage latency (ocr, grouping, translation, mask, bubble_fill, inpainting, rendering, save, total)
+STAGE_LATENCY = Histogram(
+    "mangama_stage_duration_seconds",
+    "Wall time spent in each pipeline stage",
+    ["stage"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+
+# Pages processed by outcome (success, no_text, error)
+PAGES_PROCESSED = Counter(
+    "mangama_pages_total",
+    "Manga pages processed by the pipeline",
+    ["outcome"]
+)
+
+# Translation attempts per backend (success, empty, error, gave_up)
+TRANSLATOR_OUTCOMES = Counter(
+    "mangama_translator_calls_total",
+    "Translation calls by backend and outcome",
+    ["backend", "outcome"]
+)
+
+# Latency of individual translator HTTP requests by backend and outcome (ok, error)
+TRANSLATOR_REQUEST_LATENCY = Histogram(
+    "mangama_translator_request_seconds",
+    "Latency of translation backend HTTP requests",
+    ["backend", "outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+# Text-presence pre-check verdicts (textless pages skip OCR; unsure and text pages run it)
+TEXT_PRECHECK = Counter(
+    "mangama_text_precheck_total",
+    "Pages by text-presence pre-check verdict",
+    ["verdict"]
+)
+
+# Inpainting backend actually used per page (lama, opencv, lama_fallback_opencv, flat_fill_only)
+INPAINTING_BACKEND = Counter(
+    "mangama_inpainting_total",
+    "Inpainting runs by backend",
+    ["backend"]
+)
+
+# Text regions handled by the bubble flat-fill fast path vs the inpainting model
+BUBBLE_FILL_REGIONS = Counter(
+    "mangama_bubble_fill_regions_total",
+    "Text regions by cleaning path",
+    ["path"]
+)
+
+# Cache lookups (hit ratio = hit / (hit + miss))
+CACHE_LOOKUPS = Counter(
+    "mangama_cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "mangama_requests_in_flight",
+    "Translation requests currently being processed"
+)
+
+BYTES_PROCESSED = Counter(
+    "mangama_bytes_processed_total",
+    "Image bytes received and produced",
+    ["direction"]
+)
+
+# Admission control: estimated page memory admitted, pages waiting, and refusals (queue_full, timeout)
+ADMITTED_MEMORY_BYTES = Gauge(
+    "mangama_admitted_memory_bytes",
+    "Estimated memory of pages currently admitted to the pipeline"
+)
+
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "mangama_admission_queue_depth",
+    "Pages waiting for memory budget"
+)
+
+ADMISSION_REJECTED = Counter(
+    "mangama_admission_rejected_total",
+    "Requests refused with 429 by admission control",
+    ["reason"]
+)
+
+# Quality given up to meet per-request deadlines, by step
+DEADLINE_DEGRADATIONS = Counter(
+    "mangama_deadline_degradations_total",
+    "Requests that degraded a stage to meet their deadline",
+    ["step"]
+)
+
+# Resident memory of a worker process: rss, pss (proportional share), and the
+# shared/private split (weights shared with pre-forked siblings count as shared)
+PROCESS_MEMORY_BYTES = Gauge(
+    "mangama_process_memory_bytes",
+    "Resident memory of this process by kind",
+    ["kind"]
+)
+
+
+class StageTimer:
+    """Collects per-stage wall times for a single job and records them in STAGE_LATENCY"""
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work as the given stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed, 4)
+            STAGE_LATENCY.labels(stage=name).observe(elapsed)
@@ -0,0 +1,136 @@
+import math
+import os
+import cv2
+import numpy as np
+from typing import Dict, List, Tuple
+from app.config import settings
+from app.models.detection_batch import DetectionBatch
+from app.utils.logging_utils import get_logger
+from app.utils.metrics import BYTES_PROCESSED
+
+logger = get_logger(__name__)
+
+Rect = Tuple[int, int, int, int]  # (x1, y1, x2, y2), exclusive end
+
+
+def patch_rects(detected_texts: DetectionBatch,
+                image_shape: Tuple[int, ...],
+                margin: int = 10) -> List[Rect]:
+    """
+    Rectangles covering every pixel the pipeline may have changed
+    
+    Masking, flat fill, inpainting and rendering all stay within a few pixels
+    of each text region, so padded region boxes (merged where they touch)
+    bound the difference between the original and the translated page.
+    
+    Args:
+        detected_texts: Final text regions
+        image_shape: Shape of the page (height, width, ...)
+        margin: Padding around each region; must cover mask padding and dilation
+        
+    Returns:
+        Non-overlapping rectangles, top to bottom
+    """
+    padded = detected_texts.padded_rects(margin, image_shape)
+    padded = padded[(padded[:, 2] > padded[:, 0]) & (padded[:, 3] > padded[:, 1])]
+    rects = [tuple(r) for r in padded.tolist()]
+    
+    # Merge overlapping rectangles until none overlap
+    merged = True
+    while merged:
+        merged = False
+        rects.sort(key=lambda r: (r[1], r[0]))
+        result: List[Rect] = []
+        for rect in rects:
+            for i, other in enumerate(result):
+                if rect[0] < other[2] and other[0] < rect[2] and rect[1] < other[3] and other[1] < rect[3]:
+                    result[i] = (
+                        min(rect[0], other[0]), min(rect[1], other[1]),
+                        max(rect[2], other[2]), max(rect[3], other[3])
+                    )
+                    merged = True
+                    break
+            else:
+                result.append(rect)
+        rects = result
+    return rects
+
+
+def pack_sprite(sizes: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], int, int]:
+    """
+    Pack patches into one sprite sheet with a simple shelf algorithm
+    
+    Patches are placed tallest first, left to right on shelves of a width
+    close to that of a square with the patches' total area.
+    
+    Args:
+        sizes: (width, height) of each patch
+        
+    Returns:
+        Tuple of ((x, y) of each patch in the sprite, sprite width, sprite height)
+    """
+    if not sizes:
+        return [], 0, 0
+    
+    total_area = sum(w * h for w, h in sizes)
+    sprite_width = max(max(w for w, _ in sizes), int(math.ceil(math.sqrt(total_area))))
+    
+    positions: List[Tuple[int, int]] = [(0, 0)] * len(sizes)
+    shelf_y = shelf_height = cursor_x = 0
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True):
+        w, h = sizes[index]
+        if cursor_x + w > sprite_width:
+            shelf_y += shelf_height
+            cursor_x = shelf_height = 0
+        positions[index] = (cursor_x, shelf_y)
+        cursor_x += w
+        shelf_height = max(shelf_height, h)
+    
+    return positions, sprite_width, shelf_y + shelf_height
+
+
+def write_image(path: str, image: np.ndarray, params: Tuple[int, ...] = ()):
+    """Encode an image to disk and count the bytes produced"""
+    if not cv2.imwrite(path, image, list(params)):
+        raise IOError(f"Failed to save image to {path}")
+    BYTES_PROCESSED.labels(direction="out").inc(os.path.getsize(path))
+
+
+def save_patches(image: np.ndarray, detected_texts: DetectionBatch,
+                 prefix: str, sprite: bool) -> Dict:
+    """
+    Save only the regions of the page around the given text, to be drawn over another copy of the page
+    
+    Args:
+        image: Translated page
+        detected_texts: Text regions whose surroundings changed
+        prefix: File name prefix (job id, plus a revision for re-renders)
+        sprite: Pack all patches into one sprite sheet instead of one file each
+        
+    Returns:
+        Dictionary with 'patches' (page position, plus file name or sprite
+        position) and 'sprite_filename'
+    """
+    rects = patch_rects(detected_texts, image.shape)
+    patches = [
+        {'x': x1, 'y': y1, 'width': x2 - x1, 'height': y2 - y1}
+        for x1, y1, x2, y2 in rects
+    ]
+    
+    if not sprite:
+        for index, (patch, (x1, y1, x2, y2)) in enumerate(zip(patches, rects)):
+            patch['filename'] = f"{prefix}_patch_{index}.png"
+            write_image(os.path.join(settings.temp_dir, patch['filename']), image[y1:y2, x1:x2])
+        logger.info("🧩 Saved %d patches", len(patches))
+        return {'translated_filename': None, 'patches': patches, 'sprite_filename': None}
+    
+    positions, sprite_width, sprite_height = pack_sprite([(p['width'], p['height']) for p in patches])
+    sheet = np.zeros((sprite_height, sprite_width, image.shape[2]), dtype=image.dtype)
+    for patch, (x1, y1, x2, y2), (sx, sy) in zip(patches, rects, positions):
+        sheet[sy:sy + patch['height'], sx:sx + patch['width']] = image[y1:y2, x1:x2]
+        patch['sprite_x'], patch['sprite_y'] = sx, sy
+    
+    sprite_filename = f"{prefix}_sprite.png"
+    write_image(os.path.join(settings.temp_dir, sprite_filename), sheet)
+    logger.info("🧩 Packed %d patches into a %dx%d sprite", len(patches), sprite_width, sprite_height)
+    return {'translated_filename': None, 'patches': patches, 'sprite_filename': sprite_filename}
@@ -0,0 +1,135 @@
+import gc
+import os
+import signal
+import time
+from typing import Callable, Dict
+import torch
+from app.utils.logging_utils import get_logger, shutdown_logging
+
+logger = get_logger(__name__)
+
+# Smaps fields summed into each reported kind of memory
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+
+def prepare_for_inference(module: torch.nn.Module) -> torch.nn.Module:
+    """
+    Put a model in inference mode in place so forked processes share its weights
+    
+    Besides eval(), gradients are switched off on every parameter: no worker
+    then allocates .grad buffers or writes to the weight pages, which stay
+    copy-on-write shared with the parent.
+    """
+    module.eval()
+    for parameter in module.parameters():
+        parameter.requires_grad_(False)
+    return module
+
+
+def memory_sharing(pid: str = "self") -> Dict[str, int]:
+    """
+    Resident memory of a process split by sharing, in bytes (Linux only)
+    
+    Returns:
+        Dict with rss, pss (proportional share), shared and private bytes;
+        empty where /proc/<pid>/smaps_rollup is unavailable
+    """
+    totals: Dict[str, int] = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                field, _, value = line.partition(":")
+                kind = _SMAPS_FIELDS.get(field)
+                if kind:
+                    totals[kind] = totals.get(kind, 0) + int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        return {}
+    return totals
+
+
+def freeze_for_fork():
+    """
+    Move every object allocated so far to the GC's permanent generation
+    
+    Collections in forked children then never touch (and so copy) the pages
+    holding the parent's objects. Call right before forking.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def fork_workers(processes: int, run: Callable[[int], None], restart_delay: float = 1.0):
+    """
+    Fork worker processes from the current one and supervise them
+    
+    Everything the parent has loaded (model weights above all) is shared
+    copy-on-write with the children (frozen first, see freeze_for_fork).
+    Workers that exit unexpectedly are forked again from the parent,
+    without reloading anything. SIGTERM/SIGINT are forwarded to the workers, and this returns
+    once all of them have exited.
+    
+    Torch must not have started its OpenMP thread team in the parent
+    (keep torch.set_num_threads(1) until the fork): a child that inherits
+    it deadlocks on its first parallel operation.
+    
+    Args:
+        processes: Number of worker processes
+        run: Worker body, called in the child with the worker index
+        restart_delay: Seconds to wait before replacing a worker that exited
+    """
+    children: Dict[int, int] = {}
+    stopping = False
+    
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            # Child: drop the supervisor's signal handlers before anything else
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run(index)
+            except BaseException:
+                logger.exception("❌ Worker process %d failed", index)
+                code = 1
+            finally:
+                shutdown_logging()
+                os._exit(code)
+        children[pid] = index
+    
+    def stop(signum, _frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    freeze_for_fork()
+    for index in range(processes):
+        spawn(index)
+    logger.info("👷 Forked %d worker processes sharing the loaded models", processes)
+    
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        logger.warning("⚠️ Worker process %d (pid %d) exited with code %d, restarting",
+                       index, pid, os.waitstatus_to_exitcode(status))
+        time.sleep(restart_delay)
+        if not stopping:
+            spawn(index)
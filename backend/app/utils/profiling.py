@@ -0,0 +1,93 @@
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from typing import Optional
+import os
+import threading
+import tracemalloc
+
+# tracemalloc is process-global: one profiled run at a time, or runs would stop
+# each other's tracing and mix their peaks
+_profile_lock = threading.Lock()
+
+
+def current_rss() -> Optional[int]:
+    """Resident memory of this process in bytes, None where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RequestProfiler:
+    """
+    Sampling profiler and peak-memory tracker for a single pipeline run
+    
+    Must be entered on the thread that does the work: the sampler only
+    observes the thread that started it. Profiled runs are serialized (a
+    second one waits in __enter__), but tracemalloc still sees every
+    allocation in the process, so the traced peak, like the RSS growth, is
+    process-wide and includes unprofiled requests running meanwhile.
+    
+    RSS growth is the highest resident size sampled during the run minus the
+    resident size at its start. The process-lifetime peak (ru_maxrss) would
+    mostly reflect whichever earlier request was largest.
+    """
+    
+    def __init__(self, interval: float = 0.001, rss_interval: float = 0.01):
+        """
+        Args:
+            interval: Sampling interval in seconds
+            rss_interval: Resident-size sampling interval in seconds
+        """
+        self.profiler = Profiler(interval=interval)
+        self.rss_interval = rss_interval
+        self.peak_traced_bytes: Optional[int] = None
+        self.peak_rss_growth_bytes: Optional[int] = None
+        self._started_tracemalloc = False
+        self._start_rss: Optional[int] = None
+        self._peak_rss = 0
+        self._rss_stop = threading.Event()
+        self._rss_thread: Optional[threading.Thread] = None
+    
+    def _sample_rss(self):
+        while not self._rss_stop.wait(self.rss_interval):
+            self._peak_rss = max(self._peak_rss, current_rss() or 0)
+    
+    def __enter__(self):
+        _profile_lock.acquire()
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._start_rss = current_rss()
+            if self._start_rss is not None:
+                self._peak_rss = self._start_rss
+                self._rss_thread = threading.Thread(target=self._sample_rss, daemon=True)
+                self._rss_thread.start()
+            self.profiler.start()
+        except BaseException:
+            _profile_lock.release()
+            raise
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.profiler.stop()
+            self.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            if self._rss_thread is not None:
+                self._rss_stop.set()
+                self._rss_thread.join()
+                peak_rss = max(self._peak_rss, current_rss() or 0)
+                self.peak_rss_growth_bytes = peak_rss - self._start_rss
+        finally:
+            _profile_lock.release()
+        return False
+    
+    def save_speedscope(self, path: str):
+        """Write the collected samples as a speedscope JSON profile"""
+        with open(path, "w") as f:
+            f.write(self.profiler.output(renderer=SpeedscopeRenderer()))
@@ -0,0 +1,38 @@
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+
+class GridIndex:
+    """
+    Uniform grid over axis-aligned boxes for neighbourhood queries
+    
+    Each box is registered in every cell it overlaps, so a query only looks
+    at boxes in the cells its window touches. With a cell size close to the
+    typical box size, inserts and queries are O(1) on average.
+    """
+    
+    def __init__(self, cell_size: int):
+        """
+        Args:
+            cell_size: Width and height of a grid cell in pixels
+        """
+        self.cell_size = max(1, int(cell_size))
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    
+    def _cell_range(self, x1: float, y1: float, x2: float, y2: float):
+        size = self.cell_size
+        for cx in range(int(x1 // size), int(x2 // size) + 1):
+            for cy in range(int(y1 // size), int(y2 // size) + 1):
+                yield cx, cy
+    
+    def insert(self, item_id: int, x1: float, y1: float, x2: float, y2: float):
+        """Register a box (x1, y1)-(x2, y2) under item_id"""
+        for cell in self._cell_range(x1, y1, x2, y2):
+            self._cells[cell].append(item_id)
+    
+    def query(self, x1: float, y1: float, x2: float, y2: float) -> Set[int]:
+        """Ids of boxes registered in any cell touched by the window (a superset of the overlaps)"""
+        found: Set[int] = set()
+        for cell in self._cell_range(x1, y1, x2, y2):
+            found.update(self._cells.get(cell, ()))
+        return found
@@ -0,0 +1,190 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple, TypeVar
+import numpy as np
+from app.models.detection_batch import DetectionBatch
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+Tile = Tuple[int, int]  # (y_start, y_end) rows of the page
+
+
+def plan_tiles(height: int, tile_height: int, overlap: int) -> List[Tile]:
+    """
+    Split a tall page into horizontal bands that overlap by at least `overlap` rows
+    
+    The last tile is shifted up to full height instead of leaving a thin
+    sliver, so its overlap with the previous tile may be larger.
+    
+    Args:
+        height: Page height in pixels
+        tile_height: Height of each tile
+        overlap: Minimum number of rows shared by neighbouring tiles
+    
+    Returns:
+        List of (y_start, y_end) tuples covering the page top to bottom
+    
+    Raises:
+        ValueError: If the overlap is not smaller than the tile height
+    """
+    if overlap >= tile_height:
+        raise ValueError(f"Tile overlap ({overlap}) must be smaller than the tile height ({tile_height})")
+    if height <= tile_height:
+        return [(0, height)]
+    
+    step = tile_height - overlap
+    tiles = []
+    y_start = 0
+    while y_start + tile_height < height:
+        tiles.append((y_start, y_start + tile_height))
+        y_start += step
+    tiles.append((height - tile_height, height))
+    return tiles
+
+
+def map_in_order(fn: Callable[[T], R], items: Iterable[T], max_workers: int) -> Iterator[R]:
+    """
+    Apply fn on a thread pool, yielding results in input order
+    
+    At most max_workers items are in flight at once. Items are pulled
+    lazily: once the window is full, the next item is pulled only after the
+    caller has consumed the oldest result, so at most max_workers tiles (plus
+    the result being consumed) exist in memory at a time.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(fn, item))
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _intersections(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Intersection areas of one x1, y1, x2, y2 box with each row of boxes"""
+    ix = np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0])
+    iy = np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1])
+    return np.clip(ix, 0, None).astype(np.int64) * np.clip(iy, 0, None)
+
+
+def _areas(corners: np.ndarray) -> np.ndarray:
+    return (corners[:, 2] - corners[:, 0]).astype(np.int64) * (corners[:, 3] - corners[:, 1])
+
+
+def _union_fragments(fragments: DetectionBatch) -> DetectionBatch:
+    """
+    Join truncated pieces of text that is taller than the tile overlap
+    
+    Fragments that intersect are grouped; each group becomes one detection
+    spanning the union of the boxes, keeping the text of its largest piece.
+    """
+    corners = fragments.corners()
+    groups: List[List[int]] = []
+    for row in np.argsort(corners[:, 1], kind="stable").tolist():
+        for group in groups:
+            if _intersections(corners[row], corners[group]).any():
+                group.append(row)
+                break
+        else:
+            groups.append([row])
+    
+    areas = _areas(corners)
+    merged = fragments.take([max(group, key=lambda i: areas[i]) for group in groups])
+    for index, group in enumerate(groups):
+        x1, y1 = corners[group, :2].min(axis=0)
+        x2, y2 = corners[group, 2:].max(axis=0)
+        merged.boxes[index] = (x1, y1, x2 - x1, y2 - y1)
+        merged.confidences[index] = fragments.confidences[group].min()
+    return merged
+
+
+def merge_tile_detections(tiles: List[Tile],
+                          tile_detections: List[DetectionBatch],
+                          page_height: int,
+                          edge_margin: int = 2,
+                          duplicate_iou: float = 0.5,
+                          covered_ratio: float = 0.5) -> DetectionBatch:
+    """
+    Merge per-tile OCR results (in page coordinates) into one batch for the page
+    
+    Text in an overlap is seen by both neighbouring tiles, and text on a tile's
+    inner edge is cut off there. A box touching an inner tile edge is treated
+    as truncated: it is dropped when the neighbouring tile saw the full line,
+    and only joined with its other pieces when no tile saw it whole (text
+    taller than the overlap). Complete duplicates keep the more confident box.
+    
+    Args:
+        tiles: (y_start, y_end) of each tile
+        tile_detections: Detections found in each tile, in page coordinates
+        page_height: Page height in pixels
+        edge_margin: Distance from an inner tile edge that counts as touching it
+        duplicate_iou: IoU above which two complete boxes are the same text
+        covered_ratio: Share of a truncated box inside a complete one for it to be dropped
+    
+    Returns:
+        Deduplicated detections sorted top to bottom, left to right
+    """
+    detections = DetectionBatch.concat(tile_detections)
+    if not len(detections):
+        return detections
+    
+    # Tile bounds of every row, to flag boxes cut by an inner tile edge
+    tile_of_row = np.repeat(np.arange(len(tiles)), [len(d) for d in tile_detections])
+    starts = np.array([y_start for y_start, _ in tiles])[tile_of_row]
+    ends = np.array([y_end for _, y_end in tiles])[tile_of_row]
+    corners = detections.corners()
+    cut_top = (starts > 0) & (corners[:, 1] <= starts + edge_margin)
+    cut_bottom = (ends < page_height) & (corners[:, 3] >= ends - edge_margin)
+    truncated = cut_top | cut_bottom
+    areas = _areas(corners)
+    
+    # Greedy non-maximum suppression of complete boxes, most confident first
+    complete = np.flatnonzero(~truncated)
+    order = complete[np.argsort(-detections.confidences[complete], kind="stable")]
+    suppressed = np.zeros(len(order), dtype=bool)
+    kept: List[int] = []
+    for k, row in enumerate(order.tolist()):
+        if suppressed[k]:
+            continue
+        kept.append(row)
+        rest = order[k + 1:]
+        intersection = _intersections(corners[row], corners[rest])
+        union = areas[row] + areas[rest] - intersection
+        iou = np.divide(intersection, union, out=np.zeros(len(rest)), where=union > 0)
+        suppressed[k + 1:] |= iou >= duplicate_iou
+    
+    # Truncated boxes mostly inside a kept complete box are duplicates of it
+    fragments = []
+    for row in np.flatnonzero(truncated).tolist():
+        covered = _intersections(corners[row], corners[kept]) / areas[row] if areas[row] > 0 else 0.0
+        if np.all(covered < covered_ratio):
+            fragments.append(row)
+    
+    merged = DetectionBatch.concat([detections.take(kept), _union_fragments(detections.take(fragments))])
+    return merged.take(np.lexsort((merged.boxes[:, 0], merged.boxes[:, 1])))
+
+
+def blend_tile(page: np.ndarray, tile: np.ndarray, y_start: int, overlap_rows: int):
+    """
+    Write a processed tile back into the page in place
+    
+    The first overlap_rows rows (shared with the previous tile, already in the
+    page) are cross-faded linearly so the two inpainting results meet without
+    a visible seam.
+    
+    Args:
+        page: Full page image, modified in place
+        tile: Processed tile covering rows [y_start, y_start + len(tile))
+        y_start: First page row of the tile
+        overlap_rows: Rows at the top of the tile already written by the previous tile
+    """
+    overlap_rows = max(0, min(overlap_rows, tile.shape[0]))
+    if overlap_rows:
+        alpha = np.linspace(0.0, 1.0, overlap_rows + 2, dtype=np.float32)[1:-1]
+        alpha = alpha.reshape((-1,) + (1,) * (tile.ndim - 1))
+        previous = page[y_start:y_start + overlap_rows].astype(np.float32)
+        blended = previous * (1.0 - alpha) + tile[:overlap_rows].astype(np.float32) * alpha
+        page[y_start:y_start + overlap_rows] = np.clip(np.rint(blended), 0, 255).astype(page.dtype)
+    page[y_start + overlap_rows:y_start + tile.shape[0]] = tile[overlap_rows:]
@@ -0,0 +1,225 @@
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from typing import Optional, Tuple
+import aiofiles
+import os
+import struct
+
+
+CHUNK_SIZE = 64 * 1024
+
+# Give up on finding JPEG dimensions if the header is larger than this
+MAX_HEADER_BYTES = 1024 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SIGNATURE = b"\xff\xd8\xff"
+
+# JPEG start-of-frame markers carrying the image dimensions (DHT/JPG/DAC excluded)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+FORMAT_EXTENSIONS = {"png": ".png", "jpeg": ".jpg"}
+
+# File names of the formats sniff_image_header accepts (anything else gets 415)
+UPLOAD_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+class UploadRejected(Exception):
+    """Raised when an upload fails validation; carries the HTTP status to return"""
+    
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_image_header(data: bytes) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+    """
+    Identify the image format and dimensions from the leading bytes of a file
+    
+    Args:
+        data: First bytes of the file
+        
+    Returns:
+        Tuple of (format or None, (width, height) or None if not yet known)
+    """
+    if data.startswith(PNG_SIGNATURE):
+        # IHDR is always the first chunk: length(4) type(4) width(4) height(4)
+        if len(data) < 24:
+            return "png", None
+        if data[12:16] != b"IHDR":
+            raise UploadRejected(400, "Corrupt PNG header")
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", (width, height)
+    
+    if data.startswith(JPEG_SIGNATURE):
+        return "jpeg", _jpeg_dimensions(data)
+    
+    return None, None
+
+
+def _jpeg_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """Walk JPEG marker segments until a start-of-frame marker is found"""
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            raise UploadRejected(400, "Corrupt JPEG header")
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            # Fill byte
+            offset += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            # Standalone markers without a length field
+            offset += 2
+            continue
+        segment_length = struct.unpack(">H", data[offset + 2:offset + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+            return width, height
+        if marker == 0xDA:
+            raise UploadRejected(400, "JPEG has no frame header")
+        offset += 2 + segment_length
+    return None
+
+
+def read_image_size(path: str) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) of a stored JPG/PNG from its header without decoding it
+    
+    Returns:
+        (width, height), or None if the header cannot be parsed
+    """
+    with open(path, "rb") as f:
+        header = f.read(MAX_HEADER_BYTES)
+    try:
+        _, dimensions = sniff_image_header(header)
+    except UploadRejected:
+        return None
+    return dimensions
+
+
+async def save_upload(file: UploadFile, dest_dir: str, file_id: str,
+                      max_bytes: int, max_pixels: int) -> Tuple[str, str, Tuple[int, int], int]:
+    """
+    Stream an upload to disk in chunks, validating it as the bytes arrive
+    
+    The format is taken from magic bytes (the client's content type and file
+    name are ignored), dimensions are read from the header before anything is
+    decoded, and the transfer stops as soon as a limit is exceeded, so memory
+    stays bounded by the chunk size.
+    
+    Args:
+        file: Incoming upload
+        dest_dir: Directory to write the file to
+        file_id: Unique identifier used in the stored file name
+        max_bytes: Maximum file size in bytes
+        max_pixels: Maximum width * height (decompression bomb guard)
+        
+    Returns:
+        Tuple of (stored filename, format, (width, height), size in bytes)
+        
+    Raises:
+        UploadRejected: If the upload is too large, not a JPG/PNG or too many pixels
+    """
+    header = b""
+    image_format = None
+    dimensions = None
+    size = 0
+    path = None
+    out = None
+    
+    try:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(413, f"File size exceeds maximum allowed size ({max_bytes} bytes)")
+            
+            if out is None:
+                # Still inspecting the header: nothing is written until it checks out
+                header += chunk
+                image_format, dimensions = sniff_image_header(header)
+                if image_format is None and len(header) >= len(PNG_SIGNATURE):
+                    raise UploadRejected(415, "Only JPG/PNG images are supported")
+                if dimensions is None:
+                    if len(header) > MAX_HEADER_BYTES:
+                        raise UploadRejected(400, "Could not read image dimensions")
+                    continue
+                
+                width, height = dimensions
+                if width == 0 or height == 0:
+                    raise UploadRejected(400, "Image has no pixels")
+                if width * height > max_pixels:
+                    raise UploadRejected(
+                        413,
+                        f"Image dimensions {width}x{height} exceed the maximum of {max_pixels} pixels"
+                    )
+                
+                filename = f"{file_id}_original{FORMAT_EXTENSIONS[image_format]}"
+                path = os.path.join(dest_dir, filename)
+                out = await aiofiles.open(path, "wb")
+                await out.write(header)
+                header = b""
+            else:
+                await out.write(chunk)
+        
+        if out is None:
+            if image_format is None:
+                raise UploadRejected(415, "Only JPG/PNG images are supported")
+            raise UploadRejected(400, "Truncated image header")
+    except BaseException:
+        if out is not None:
+            await out.close()
+            out = None
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        if out is not None:
+            await out.close()
+    
+    return filename, image_format, dimensions, size
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject oversized request bodies before they are parsed or spooled
+    
+    Checks Content-Length up front and counts streamed bytes for requests
+    without one, so an oversized multipart upload is cut off early instead
+    of being buffered in full.
+    """
+    
+    def __init__(self, app, max_body_size: int, paths: Tuple[str, ...]):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = paths
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+        
+        detail = f"Request body exceeds maximum allowed size ({self.max_body_size} bytes)"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            response = JSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
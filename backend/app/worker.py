@@ -0,0 +1,193 @@
+"""
+Pipeline worker: takes page jobs from the shared job queue and processes them
+
+Run one or more of these next to stateless API replicas
+(JOB_QUEUE_BACKEND=sqlite or redis); capacity scales with the number of
+worker processes/containers:
+
+    python -m app.worker
+
+With WORKER_PROCESSES > 1 the models are loaded once and the worker
+processes are forked from that parent, sharing the weights copy-on-write,
+so the number of processes per host is bounded by cores rather than RAM.
+"""
+import os
+import signal
+import threading
+from typing import Dict, List, Optional
+import torch
+from prometheus_client import start_http_server
+from app.config import settings
+from app.models.schemas import TranslationRequest
+from app.services.deadline import Deadline
+from app.services.job_queue import JobQueue, job_queue
+from app.services.pipeline import TranslationPipeline
+from app.services.progress import ProgressCallback
+from app.utils.logging_utils import setup_logging, get_logger
+from app.utils.metrics import PROCESS_MEMORY_BYTES
+from app.utils.prefork import fork_workers, memory_sharing
+
+logger = get_logger(__name__)
+
+
+def execute_job(pipeline: TranslationPipeline, job: Dict, report: ProgressCallback) -> Dict:
+    """
+    Run one queued page through the pipeline
+    
+    Args:
+        pipeline: Translation pipeline
+        job: Job dict as enqueued by the API
+        report: Progress callback
+    
+    Returns:
+        JSON-serializable pipeline result
+    """
+    result = pipeline.process_image_sync(
+        image_path=os.path.join(settings.temp_dir, job["image_filename"]),
+        file_id=job["job_id"],
+        use_gpu=job["use_gpu"],
+        profile=job["profile"],
+        progress=report,
+        languages=TranslationRequest(source_lang=job["source_lang"], target_lang=job["target_lang"]),
+        output_mode=job["output_mode"],
+        mode=job.get("mode", "full"),
+        deadline=Deadline(job["deadline"], job["deadline_started_at"]) if job.get("deadline") else None
+    )
+    result["detected_texts"] = result["detected_texts"].to_dicts()
+    return result
+
+
+class JobWorker:
+    """Threads taking jobs from a queue and storing their outcome"""
+    
+    def __init__(self, queue: JobQueue, pipeline: TranslationPipeline,
+                 concurrency: int = 1, poll_timeout: float = 5.0):
+        """
+        Args:
+            queue: Job queue to consume
+            pipeline: Pipeline shared by the worker threads
+            concurrency: Number of pages processed in parallel
+            poll_timeout: Seconds each dequeue waits before checking for shutdown
+        """
+        self.queue = queue
+        self.pipeline = pipeline
+        self.concurrency = max(1, concurrency)
+        self.poll_timeout = poll_timeout
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    def start(self):
+        """Start the worker threads (daemon threads; returns immediately)"""
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("👷 Job worker started (%d threads)", self.concurrency)
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Stop taking jobs and wait for the pages in progress to finish"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.dequeue(timeout=self.poll_timeout)
+            except Exception as e:
+                # Queue backend unavailable; back off and retry
+                logger.error("❌ Failed to take a job: %s", e)
+                self._stop.wait(self.poll_timeout)
+                continue
+            if job is not None:
+                self._process(job)
+    
+    def _process(self, job: Dict):
+        job_id = job["job_id"]
+        # Keep the job leased while the page takes longer than the lease
+        done = threading.Event()
+        threading.Thread(target=self._renew_lease, args=(job_id, done),
+                         name=f"lease-{job_id[:8]}", daemon=True).start()
+        try:
+            report = self.queue.reporter(job.get("progress_id", job_id))
+            outcome = {"ok": True, "result": execute_job(self.pipeline, job, report)}
+        except Exception as e:
+            # The pipeline already logged the failure and reported the "error" stage
+            outcome = {"ok": False, "error": str(e)}
+        finally:
+            done.set()
+        try:
+            self.queue.complete(job_id, outcome)
+        except Exception as e:
+            logger.error("❌ Failed to store result of job %s: %s", job_id, e)
+        for kind, value in memory_sharing().items():
+            PROCESS_MEMORY_BYTES.labels(kind=kind).set(value)
+    
+    def _renew_lease(self, job_id: str, done: threading.Event):
+        """Renew a job's lease every third of lease_seconds until it is done"""
+        while not done.wait(self.queue.lease_seconds / 3):
+            try:
+                self.queue.renew(job_id)
+            except Exception as e:
+                logger.warning("⚠️ Failed to renew lease of job %s: %s", job_id, e)
+
+
+def serve(pipeline: TranslationPipeline, metrics_port: int):
+    """Process jobs until SIGTERM/SIGINT, then finish the pages in progress"""
+    if metrics_port:
+        start_http_server(metrics_port)
+    
+    worker = JobWorker(job_queue, pipeline, concurrency=settings.worker_concurrency)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    
+    worker.start()
+    stopping.wait()
+    logger.info("🛑 Worker shutting down, finishing pages in progress...")
+    worker.stop()
+
+
+def serve_forked(processes: int):
+    """
+    Load the models once, then fork `processes` workers that share them
+    
+    On CUDA hosts the models are loaded by each worker instead: a forked
+    process cannot use CUDA state initialized in its parent.
+    """
+    threads = settings.worker_torch_threads or max(1, (os.cpu_count() or 1) // processes)
+    
+    def run(index: int, pipeline: Optional[TranslationPipeline]):
+        torch.set_num_threads(threads)
+        memory = memory_sharing()
+        if memory:
+            logger.info("🧠 Worker process %d: %d MB resident, %d MB shared with its siblings",
+                        index, memory["rss"] >> 20, memory["shared"] >> 20)
+        metrics_port = settings.worker_metrics_port + index if settings.worker_metrics_port else 0
+        serve(pipeline or TranslationPipeline(), metrics_port)
+    
+    if torch.cuda.is_available():
+        logger.warning("⚠️ CUDA available: each worker process loads its own copy of the models")
+        fork_workers(processes, lambda index: run(index, None))
+        return
+    
+    # Load single-threaded: children inheriting torch's OpenMP thread team deadlock
+    torch.set_num_threads(1)
+    pipeline = TranslationPipeline()
+    pipeline.preload_models(use_gpu=False)
+    fork_workers(processes, lambda index: run(index, pipeline))
+
+
+def main():
+    setup_logging(settings.log_level, settings.log_format)
+    if job_queue is None or job_queue.in_process:
+        raise SystemExit("Set JOB_QUEUE_BACKEND=sqlite or redis to run separate workers")
+    
+    if settings.worker_processes > 1:
+        serve_forked(settings.worker_processes)
+    else:
+        serve(TranslationPipeline(), settings.worker_metrics_port)
+
+
+if __name__ == "__main__":
+    main()
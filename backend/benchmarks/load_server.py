@@ -0,0 +1,120 @@
+"""
+MangaMa API with stub model backends, for load tests
+
+Serves the real FastAPI app (routing, upload validation, admission control,
+job queue, pipeline, static files) under uvicorn, with OCR, inpainting and
+translation replaced by the offline stubs unless real backends are asked
+for. The stub OCR recognizes uploaded sample pages by the SHA-1 of their
+bytes, using a manifest written by benchmarks.load_test. With
+--translator mock, the real HTTP translator clients talk to an in-process
+benchmarks.mock_translator server instead.
+
+Usage (from backend/):
+    python -m benchmarks.load_server --manifest pages.json --port 8765
+    python -m benchmarks.load_server --ocr easyocr --inpaint lama --translator real
+    python -m benchmarks.load_server --manifest pages.json --translator mock --translator-failure-rate 0.1
+"""
+import argparse
+import hashlib
+import json
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.models.detection_batch import DetectionBatch
+from benchmarks.mock_translator import MockTranslationServer
+from benchmarks.stubs import (
+    StubInpaintingService,
+    StubOCRService,
+    StubTranslationService,
+)
+
+
+def file_digest(path: str) -> str:
+    """SHA-1 of a file's bytes"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ManifestOCRService(StubOCRService):
+    """
+    Stub OCR that recognizes sample pages by content
+    
+    Uploads are saved under a fresh file id, so ground truth cannot be
+    registered by path; it is looked up by the hash of the saved file
+    instead. Nothing is cached per path, so the server's memory does not
+    grow with the number of requests served.
+    """
+    
+    def __init__(self, pages: Dict[str, DetectionBatch], latency: float = 0.0):
+        super().__init__(latency)
+        self.pages = pages
+    
+    def lookup(self, image_path: str) -> DetectionBatch:
+        return self.pages.get(file_digest(image_path), DetectionBatch.empty())
+
+
+def load_manifest(path: Optional[str]) -> Dict[str, DetectionBatch]:
+    """Read {sha1: [DetectedText dicts]} written by benchmarks.load_test"""
+    if not path:
+        return {}
+    with open(path) as f:
+        return {digest: DetectionBatch.from_dicts(records) for digest, records in json.load(f).items()}
+
+
+def install_backends(args):
+    """
+    Point the pipeline module at the requested backends
+    
+    Must run before app.main is imported: the router builds its pipeline
+    (and the in-process job worker) at import time.
+    """
+    import app.services.pipeline as pipeline_module
+    
+    if args.ocr == "stub":
+        pages = load_manifest(args.manifest)
+        pipeline_module.OCRService = lambda: ManifestOCRService(pages, latency=args.ocr_latency)
+    if args.translator == "stub":
+        pipeline_module.TranslationService = lambda: StubTranslationService(
+            latency=args.translator_latency, failure_rate=args.translator_failure_rate
+        )
+    elif args.translator == "mock":
+        MockTranslationServer(latency=args.translator_latency,
+                              failure_rate=args.translator_failure_rate).start().point_settings()
+    if args.inpaint != "lama":
+        use_opencv = args.inpaint == "opencv"
+        pipeline_module.InpaintingService = lambda: StubInpaintingService(use_opencv=use_opencv)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MangaMa API with stub backends for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--manifest", help="JSON {sha1: detected_texts} of the sample pages (stub OCR)")
+    parser.add_argument("--ocr", choices=["stub", "easyocr"], default="stub")
+    parser.add_argument("--ocr-latency", type=float, default=0.0,
+                        help="Simulated per-call latency of the stub OCR (seconds)")
+    parser.add_argument("--inpaint", choices=["stub", "opencv", "lama"], default="opencv")
+    parser.add_argument("--translator", choices=["stub", "mock", "real"], default="stub",
+                        help="In-process stub, real HTTP clients against a local mock server, or the real services")
+    parser.add_argument("--translator-latency", type=float, default=0.0,
+                        help="Simulated per-call latency of the stub/mock translator (seconds)")
+    parser.add_argument("--translator-failure-rate", type=float, default=0.0,
+                        help="Share of stub/mock translator calls that fail")
+    args = parser.parse_args()
+    
+    install_backends(args)
+    from app.main import app  # after install_backends (builds the pipeline on import)
+    from app.routers import translation
+    
+    if translation.pipeline is None:
+        parser.error("stub backends only apply in-process; use JOB_QUEUE_BACKEND=inline or local")
+    
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+End-to-end load test of the HTTP API
+
+Starts benchmarks.load_server (the real app under uvicorn with stub OCR,
+inpainting and translation unless real backends are asked for) and drives
+POST /api/translate with a set of sample pages, either closed-loop at each
+of several concurrency levels or open-loop at Poisson arrival rates. Every
+level reports latency percentiles, throughput, errors by status and the
+server's resident memory over time; the level where throughput stops
+growing is reported as the saturation point. With a baseline file, levels
+whose latency, throughput or error rate got worse beyond the threshold fail
+the run (exit 1).
+
+Server settings (admission limits, worker concurrency, tiling, ...) come
+from the environment and .env as usual, so capacity can be compared across
+configurations.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1,2,4,8 --duration 30 --output load.json
+    python -m benchmarks.load_test --rate 0.5,1,2 --duration 60 --translator-latency 0.2
+    python -m benchmarks.load_test --baseline load.json --threshold 0.25
+    python -m benchmarks.load_test --url http://localhost:8000 --pages ./samples --server-pid 1234
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import mimetypes
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import httpx
+import numpy as np
+
+from app.utils.upload_utils import UPLOAD_EXTENSIONS
+from benchmarks.synthetic import generate_page, parse_cases
+
+DEFAULT_CASES = "1200x1800:12,1200x1800:40,800x2400:20"
+PERCENTILES = (50, 90, 95, 99)
+SATURATION_GAIN = 0.1  # Throughput gain below which a level counts as saturated
+
+Page = Tuple[str, bytes]  # (file name, encoded image)
+Record = Tuple[float, float, str]  # (start offset, latency, HTTP status or error name)
+
+
+def make_pages(cases: List[Tuple[int, int, int]], work_dir: str) -> Tuple[List[Page], str]:
+    """
+    Encode synthetic pages and write the stub OCR manifest for them
+    
+    Returns:
+        (pages, manifest path); the manifest maps each page's SHA-1 to its
+        ground-truth detected_texts
+    """
+    pages, manifest = [], {}
+    for width, height, regions in cases:
+        image, ground_truth = generate_page(width, height, regions, seed=width * 31 + regions)
+        data = cv2.imencode(".png", image)[1].tobytes()
+        pages.append((f"page_{width}x{height}_{regions}.png", data))
+        manifest[hashlib.sha1(data).hexdigest()] = [det.model_dump() for det in ground_truth]
+    
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    return pages, manifest_path
+
+
+def read_pages(pages_dir: str) -> List[Page]:
+    """Load every image file the upload endpoint accepts from a directory (sorted by name)"""
+    pages = []
+    for name in sorted(os.listdir(pages_dir)):
+        if name.lower().endswith(UPLOAD_EXTENSIONS):
+            with open(os.path.join(pages_dir, name), "rb") as f:
+                pages.append((name, f.read()))
+    if not pages:
+        raise SystemExit(f"No images found in {pages_dir}")
+    return pages
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, manifest_path: Optional[str], work_dir: str, port: int) -> subprocess.Popen:
+    """Launch benchmarks.load_server with its files kept under work_dir"""
+    env = dict(os.environ)
+    env.setdefault("LOG_LEVEL", "WARNING")
+    env["TEMP_DIR"] = os.path.join(work_dir, "temp")
+    env["PROFILE_DIR"] = os.path.join(work_dir, "profiles")
+    env["RENDER_CACHE_DIR"] = os.path.join(work_dir, "render_cache")
+    
+    command = [
+        sys.executable, "-m", "benchmarks.load_server",
+        "--port", str(port),
+        "--ocr", args.ocr,
+        "--ocr-latency", str(args.ocr_latency),
+        "--inpaint", args.inpaint,
+        "--translator", args.translator,
+        "--translator-latency", str(args.translator_latency),
+        "--translator-failure-rate", str(args.translator_failure_rate),
+    ]
+    if manifest_path:
+        command += ["--manifest", manifest_path]
+    return subprocess.Popen(command, env=env)
+
+
+def wait_until_ready(url: str, server: Optional[subprocess.Popen], timeout: float):
+    """Poll /health until the server answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"Load server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} not ready after {timeout:.0f}s")
+
+
+def read_rss(pid: int) -> Optional[int]:
+    """Resident set size of a process in bytes (/proc on Linux, else ps)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        out = subprocess.run(["ps", "-o", "rss=", "-p", str(pid)],
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+        return int(out) * 1024 if out else None
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+class LevelRun:
+    """Request outcomes and server samples of one load level"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.records: List[Record] = []
+        self.samples: List[List[float]] = []  # [seconds, rss bytes, requests in flight]
+        self.in_flight = 0
+        self.dropped = 0
+
+
+class LoadGenerator:
+    """Sends translate requests for the sample pages over one HTTP client"""
+    
+    def __init__(self, client: httpx.AsyncClient, url: str, pages: List[Page], form: Dict[str, str]):
+        self.client = client
+        self.url = f"{url}/api/translate"
+        self.pages = pages
+        self.form = form
+        self._next_page = itertools.count()
+    
+    async def send(self, run: Optional[LevelRun] = None):
+        """POST one page (round-robin), recording the outcome in run"""
+        name, data = self.pages[next(self._next_page) % len(self.pages)]
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        start = time.perf_counter()
+        if run is not None:
+            run.in_flight += 1
+        try:
+            response = await self.client.post(self.url, files={"file": (name, data, content_type)}, data=self.form)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if run is not None:
+            run.in_flight -= 1
+            run.records.append((start - run.start, time.perf_counter() - start, status))
+    
+    async def closed_loop(self, run: LevelRun, concurrency: int, duration: float, requests: Optional[int]):
+        """`concurrency` clients each send their next request as soon as the last one is answered"""
+        deadline = run.start + duration
+        sent = itertools.count()
+        
+        async def client_loop():
+            while (next(sent) < requests) if requests else (time.perf_counter() < deadline):
+                await self.send(run)
+        
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    
+    async def open_loop(self, run: LevelRun, rate: float, duration: float, requests: Optional[int],
+                        max_in_flight: int, rng: random.Random):
+        """
+        Send requests at Poisson arrival times, independent of response times
+        
+        Arrivals while max_in_flight requests are outstanding are counted as
+        dropped instead of opening ever more connections.
+        """
+        deadline = run.start + duration
+        tasks = set()
+        arrival = run.start
+        for index in itertools.count():
+            if (index >= requests) if requests else (arrival >= deadline):
+                break
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if run.in_flight >= max_in_flight:
+                run.dropped += 1
+            else:
+                task = asyncio.create_task(self.send(run))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            arrival += rng.expovariate(rate)
+        await asyncio.gather(*list(tasks))
+
+
+async def sample_server(run: LevelRun, pid: Optional[int], interval: float):
+    """Record server RSS and in-flight requests until cancelled"""
+    while True:
+        rss = read_rss(pid) if pid else None
+        run.samples.append([round(time.perf_counter() - run.start, 3), rss, run.in_flight])
+        await asyncio.sleep(interval)
+
+
+def summarize(run: LevelRun, duration: float) -> Dict:
+    """Latency percentiles, throughput, errors and RSS of one level"""
+    latencies = np.array([latency for _, latency, status in run.records if status == "200"])
+    errors = Counter(status for _, _, status in run.records if status != "200")
+    total = len(run.records)
+    latency = {}
+    if len(latencies):
+        latency = {f"p{p}": float(np.percentile(latencies, p)) for p in PERCENTILES}
+        latency.update(mean=float(latencies.mean()), max=float(latencies.max()))
+    
+    rss = [sample[1] for sample in run.samples if sample[1] is not None]
+    return {
+        "requests": total,
+        "ok": len(latencies),
+        "errors": dict(errors),
+        "error_rate": (total - len(latencies)) / total if total else 0.0,
+        "dropped": run.dropped,
+        "duration": duration,
+        "throughput": len(latencies) / duration if duration > 0 else 0.0,
+        "latency": latency,
+        "rss": {
+            "start": rss[0] if rss else None,
+            "peak": max(rss) if rss else None,
+            "end": rss[-1] if rss else None,
+            "samples": run.samples,
+        },
+        "requests_log": [list(record) for record in run.records],
+    }
+
+
+async def run_levels(args, url: str, pages: List[Page], pid: Optional[int]) -> Dict[str, Dict]:
+    """Warm up, then run every load level in turn"""
+    form = {"mode": args.mode, "output_mode": args.output_mode}
+    levels = ([("rate", float(r)) for r in args.rate.split(",")] if args.rate
+              else [("concurrency", int(c)) for c in args.concurrency.split(",")])
+    max_connections = max(args.max_in_flight if args.rate else max(v for _, v in levels), 1)
+    limits = httpx.Limits(max_connections=int(max_connections), max_keepalive_connections=int(max_connections))
+    rng = random.Random(args.seed)
+    
+    results = {}
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        generator = LoadGenerator(client, url, pages, form)
+        # Warm-up (model init, font index, allocator); not recorded
+        for _ in range(args.warmup):
+            await generator.send()
+        
+        for kind, value in levels:
+            key = f"{kind}={value:g}"
+            print(f"▶ {key} for {f'{args.requests} requests' if args.requests else f'{args.duration:g}s'}")
+            run = LevelRun()
+            sampler = asyncio.create_task(sample_server(run, pid, args.rss_interval))
+            if kind == "rate":
+                await generator.open_loop(run, value, args.duration, args.requests, args.max_in_flight, rng)
+            else:
+                await generator.closed_loop(run, value, args.duration, args.requests)
+            duration = time.perf_counter() - run.start
+            sampler.cancel()
+            run.samples.append([round(duration, 3), read_rss(pid) if pid else None, 0])
+            results[key] = summarize(run, duration)
+    return results
+
+
+def saturation_level(results: Dict[str, Dict]) -> Optional[str]:
+    """First level whose throughput grew less than SATURATION_GAIN over the previous one"""
+    previous = None
+    for key, level in results.items():
+        if previous is not None and level["throughput"] < previous * (1 + SATURATION_GAIN):
+            return key
+        previous = level["throughput"]
+    return None
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float, min_delta: float) -> List[str]:
+    """Return a description of every level that regressed beyond the threshold"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for name in ("p50", "p99"):
+            now, before = current["latency"].get(name), previous["latency"].get(name)
+            if now is None or before is None:
+                continue
+            delta = now - before
+            if delta > min_delta and now > before * (1 + threshold):
+                regressions.append(
+                    f"{key} {name}: {before * 1000:.0f}ms -> {now * 1000:.0f}ms (+{delta / before * 100:.0f}%)"
+                )
+        if current["throughput"] < previous["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{key} throughput: {previous['throughput']:.2f}/s -> {current['throughput']:.2f}/s"
+            )
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(
+                f"{key} error rate: {previous['error_rate'] * 100:.1f}% -> {current['error_rate'] * 100:.1f}%"
+            )
+    return regressions
+
+
+def _mb(value: Optional[int]) -> str:
+    return f"{value / 2**20:.0f}MB" if value is not None else "-"
+
+
+def print_table(results: Dict[str, Dict]):
+    columns = ["req", "err%", "req/s"] + [f"p{p}" for p in PERCENTILES] + ["max", "rss", "rss peak"]
+    print(f"\n{'level':<18}" + "".join(f"{c:>10}" for c in columns))
+    for key, level in results.items():
+        latency = level["latency"]
+        times = [latency.get(f"p{p}") for p in PERCENTILES] + [latency.get("max")]
+        cells = [str(level["requests"]), f"{level['error_rate'] * 100:.1f}", f"{level['throughput']:.2f}"]
+        cells += [f"{t * 1000:.0f}ms" if t is not None else "-" for t in times]
+        cells += [_mb(level["rss"]["end"]), _mb(level["rss"]["peak"])]
+        print(f"{key:<18}" + "".join(f"{c:>10}" for c in cells))
+        if level["errors"] or level["dropped"]:
+            print(f"{'':<18}errors: {level['errors']}, dropped: {level['dropped']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end MangaMa API load test")
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID to sample RSS from when using --url")
+    parser.add_argument("--pages", help="Directory of sample pages (default: synthetic pages from --cases)")
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="Comma-separated WxH:regions list")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Closed-loop client counts, one level each")
+    parser.add_argument("--rate", help="Open-loop Poisson arrival rates (requests/s), one level each")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--requests", type=int, help="Requests per level (instead of --duration)")
+    parser.add_argument("--warmup", type=int, default=2, help="Unrecorded requests before the first level")
+    parser.add_argument("--max-in-flight", type=int, default=256,
+                        help="Open-loop arrivals beyond this many outstanding requests are dropped")
+    parser.add_argument("--mode", default="full", help="Pipeline mode form field")
+    parser.add_argument("--output-mode", default="page", help="Output mode form field")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout (seconds)")
+    parser.add_argument("--rss-interval", type=float, default=0.5, help="Seconds between RSS samples")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the open-loop arrival times")
+    parser.add_argument("--ocr", choices=["stub", "easyocr"], default="stub")
+    parser.add_argument("--ocr-latency", type=float, default=0.0,
+                        help="Simulated per-call latency of the stub OCR (seconds)")
+    parser.add_argument("--inpaint", choices=["stub", "opencv", "lama"], default="opencv")
+    parser.add_argument("--translator", choices=["stub", "mock", "real"], default="stub",
+                        help="In-process stub, real HTTP clients against a local mock server, or the real services")
+    parser.add_argument("--translator-latency", type=float, default=0.0,
+                        help="Simulated per-call latency of the stub/mock translator (seconds)")
+    parser.add_argument("--translator-failure-rate", type=float, default=0.0,
+                        help="Share of stub/mock translator calls that fail")
+    parser.add_argument("--startup-timeout", type=float, default=120.0,
+                        help="Seconds to wait for the server to come up")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown (latency) or loss (throughput) per level")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="Ignore latency increases smaller than this many seconds")
+    args = parser.parse_args()
+    
+    work_dir = tempfile.mkdtemp(prefix="mangama-load-")
+    server = None
+    try:
+        if args.pages:
+            pages, manifest_path = read_pages(args.pages), None
+        else:
+            pages, manifest_path = make_pages(parse_cases(args.cases), work_dir)
+        
+        if args.url:
+            url, pid = args.url.rstrip("/"), args.server_pid
+        else:
+            port = free_port()
+            server = start_server(args, manifest_path, work_dir, port)
+            url, pid = f"http://127.0.0.1:{port}", server.pid
+        wait_until_ready(url, server, args.startup_timeout)
+        
+        results = asyncio.run(run_levels(args, url, pages, pid))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print_table(results)
+    saturated = saturation_level(results)
+    if saturated:
+        print(f"\n📈 Throughput stops scaling at {saturated}")
+    
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "backends": {"ocr": args.ocr, "inpaint": args.inpaint, "translator": args.translator},
+            "server": args.url or "load_server",
+            "mode": args.mode,
+            "output_mode": args.output_mode,
+            "pages": [name for name, _ in pages],
+            "saturation": saturated,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline.get("results", {}), args.threshold, args.min_delta)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
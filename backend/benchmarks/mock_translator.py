@@ -0,0 +1,304 @@
+"""
+Local mock of the translation backends, for offline latency and failure tests
+
+Speaks just enough of each provider's protocol for the clients in
+app.services.translator_clients: Google's mobile page (GET /m), MyMemory
+(GET /get) and LibreTranslate (POST /translate). Responses take a
+configurable latency, a share of them fail with a configurable status, and
+every new connection pays a simulated handshake cost, so the effect of
+connection reuse shows up locally as it would against a remote TLS host.
+Single backends can be made to always fail, or to answer 200 with a body
+that holds no translation (a changed page layout, an HTML error page).
+
+Usage (from backend/):
+    python -m benchmarks.mock_translator --port 8790 --latency 0.05 --failure-rate 0.1
+    GOOGLE_TRANSLATE_URL=http://127.0.0.1:8790/m MYMEMORY_URL=http://127.0.0.1:8790/get \\
+        LIBRE_TRANSLATE_URL=http://127.0.0.1:8790 uvicorn app.main:app
+
+    # Pooled keep-alive vs a new connection per call, and fallback under failures
+    python -m benchmarks.mock_translator --bench --handshake 0.03 --latency 0.01
+
+The clients and TranslationService's fallback chain are tested against it
+in tests/test_translator_clients.py.
+"""
+import argparse
+import html
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from app.config import settings
+
+
+def mock_translation(text: str, target: str) -> str:
+    """Deterministic stand-in translation"""
+    return f"[{target}] {text.lower()}"
+
+
+# 200 responses without a translation, per backend
+MALFORMED_BODIES = {
+    "google": ("text/html; charset=utf-8", b'<html><body><form action="https://consent.google.com/save">'
+                                           b'Before you continue</form></body></html>'),
+    "mymemory": ("text/html; charset=utf-8", b"<html><body>502 Bad Gateway</body></html>"),
+    "libre": ("application/json", b'{"error": "Invalid request"}'),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections open between requests
+    server: "MockTranslationServer"
+    
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith("/m"):
+            self._answer("google", lambda: self._google(params))
+        elif url.path.endswith("/get"):
+            self._answer("mymemory", lambda: self._mymemory(params))
+        else:
+            self._send(404, "text/plain", b"not found")
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if urlparse(self.path).path.endswith("/translate"):
+            self._answer("libre", lambda: self._libre(json.loads(body or b"{}")))
+        else:
+            self._send(404, "text/plain", b"not found")
+    
+    def _answer(self, backend: str, build):
+        self.server.count("requests")
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if backend in self.server.failing or self.server.fails():
+            self.server.count("failures")
+            self._send(self.server.failure_status, "text/plain", b"mock failure")
+            return
+        if backend in self.server.malformed:
+            self._send(200, *MALFORMED_BODIES[backend])
+            return
+        self._send(200, *build())
+    
+    def _google(self, params: Dict[str, str]):
+        translated = html.escape(mock_translation(params.get("q", ""), params.get("tl", "")))
+        page = f'<html><body><div class="result-container">{translated}</div></body></html>'
+        return "text/html; charset=utf-8", page.encode()
+    
+    def _mymemory(self, params: Dict[str, str]):
+        target = params.get("langpair", "|").split("|")[-1]
+        data = {"responseData": {"translatedText": mock_translation(params.get("q", ""), target)}, "matches": []}
+        return "application/json", json.dumps(data).encode()
+    
+    def _libre(self, payload: Dict):
+        data = {"translatedText": mock_translation(payload.get("q", ""), payload.get("target", ""))}
+        return "application/json", json.dumps(data).encode()
+    
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MockTranslationServer(ThreadingHTTPServer):
+    """
+    Threaded mock of Google, MyMemory and LibreTranslate
+    
+    Counts connections, requests and failures served, so callers can check
+    how many connections their requests needed.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 handshake: float = 0.0, failure_rate: float = 0.0,
+                 failure_status: int = 503, seed: int = 0,
+                 failing: Iterable[str] = (), malformed: Iterable[str] = ()):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0: any free port)
+            latency: Seconds each request takes
+            handshake: Seconds each new connection takes to set up (TCP + TLS stand-in)
+            failure_rate: Share of requests answered with failure_status
+            failure_status: HTTP status of failed requests
+            seed: Seed of the failure draws
+            failing: Backends ("google", "mymemory", "libre") whose requests all fail
+            malformed: Backends that answer 200 with a body holding no translation
+        """
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.handshake = handshake
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.failing = set(failing)
+        self.malformed = set(malformed)
+        self.stats = {"connections": 0, "requests": 0, "failures": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def fails(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+    
+    def handle_error(self, request, client_address):
+        # Clients that timed out hang up before the (slow) answer is written
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+    
+    def start(self) -> "MockTranslationServer":
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+    
+    def __enter__(self) -> "MockTranslationServer":
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def point_settings(self):
+        """Make the translation backends in this process use the mock"""
+        settings.google_translate_url = f"{self.url}/m"
+        settings.mymemory_url = f"{self.url}/get"
+        settings.libre_translate_url = self.url
+
+
+def _latency_summary(latencies: List[float]) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+    }
+
+
+def bench_connections(args) -> Dict[str, Dict]:
+    """Time translations over the shared keep-alive pool vs a new connection per call"""
+    from app.services.translator_clients import GoogleClient, close_http_client
+    
+    texts = [f"Line {index} of the speech bubble!" for index in range(args.calls)]
+    results = {}
+    for mode in ("new_connection", "pooled"):
+        with MockTranslationServer(latency=args.latency, handshake=args.handshake) as server:
+            def translate(text: str) -> float:
+                start = time.perf_counter()
+                if mode == "pooled":
+                    GoogleClient("en", "tr", f"{server.url}/m").translate(text)
+                else:
+                    with httpx.Client() as client:
+                        GoogleClient("en", "tr", f"{server.url}/m", client=client).translate(text)
+                return time.perf_counter() - start
+            
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.concurrency) as executor:
+                latencies = list(executor.map(translate, texts))
+            elapsed = time.perf_counter() - start
+            close_http_client()
+            results[mode] = {
+                "calls": args.calls,
+                "connections": server.stats["connections"],
+                "throughput": round(args.calls / elapsed, 1),
+                **_latency_summary(latencies),
+            }
+    return results
+
+
+def bench_failures(args) -> Dict:
+    """Translate through TranslationService's fallback chain with failing backends"""
+    from app.services.translation_service import TranslationService
+    from app.services.translator_clients import close_http_client
+    
+    with MockTranslationServer(latency=args.latency, handshake=args.handshake,
+                               failure_rate=args.failure_rate) as server:
+        server.point_settings()
+        service = TranslationService()
+        latencies = []
+        untranslated = 0
+        for index in range(args.calls):
+            text = f"Line {index} of the speech bubble!"
+            start = time.perf_counter()
+            if service.translate_text(text, max_retries=args.retries) == text:
+                untranslated += 1
+            latencies.append(time.perf_counter() - start)
+        close_http_client()
+        return {
+            "calls": args.calls,
+            "failure_rate": args.failure_rate,
+            "untranslated": untranslated,
+            "requests": server.stats["requests"],
+            "connections": server.stats["connections"],
+            **_latency_summary(latencies),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock translation backends for offline tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--handshake", type=float, default=0.0,
+                        help="Seconds to set up each new connection (TCP + TLS stand-in)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503)
+    parser.add_argument("--failing", default="", help="Comma-separated backends that always fail")
+    parser.add_argument("--malformed", default="",
+                        help="Comma-separated backends that answer without a translation")
+    parser.add_argument("--bench", action="store_true",
+                        help="Run the connection reuse and failure benchmarks instead of serving")
+    parser.add_argument("--calls", type=int, default=100, help="Translations per benchmark")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads translating at once (--bench)")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per backend (--bench)")
+    args = parser.parse_args()
+    
+    if args.bench:
+        print(json.dumps({"connections": bench_connections(args), "failures": bench_failures(args)}, indent=2))
+        return
+    
+    server = MockTranslationServer(args.host, args.port, latency=args.latency, handshake=args.handshake,
+                                   failure_rate=args.failure_rate, failure_status=args.failure_status,
+                                   failing=filter(None, args.failing.split(",")),
+                                   malformed=filter(None, args.malformed.split(",")))
+    print(f"Mock translation backends on {server.url} (/m, /get, /translate)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Accuracy/latency comparison of fp32 vs dynamically quantized EasyOCR
+
+Both readers report how many of their layers are quantized, so a baseline
+that is not really fp32 shows up in the results.
+
+Usage (from backend/):
+    python -m benchmarks.ocr_quantization --pages ./samples --repeats 3 --output quant.json
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.models.detection_batch import DetectionBatch
+from app.services.ocr_service import OCRService
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def list_pages(pages_dir: str) -> List[str]:
+    """Return sorted image paths inside a directory"""
+    return sorted(
+        os.path.join(pages_dir, name)
+        for name in os.listdir(pages_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def page_text(detected_texts: DetectionBatch) -> str:
+    """Concatenate detections in top-to-bottom, left-to-right order"""
+    boxes = detected_texts.boxes
+    ordered = np.lexsort((boxes[:, 0], boxes[:, 1]))
+    return " ".join(detected_texts.texts[ordered])
+
+
+def quantized_layers(service: OCRService) -> int:
+    """Number of dynamically quantized layers in a loaded reader (the recognizer's; CRAFT has none)"""
+    networks = (service.reader.detector, service.reader.recognizer)
+    return sum(
+        1 for network in networks for module in network.modules()
+        if type(module).__module__.startswith("torch.ao.nn.quantized")
+    )
+
+
+def time_detection(service: OCRService, image_path: str, repeats: int) -> Dict:
+    """Run detection several times and keep the last result"""
+    timings = []
+    detected_texts = DetectionBatch.empty()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        detected_texts = service.detect_text(image_path)
+        timings.append(time.perf_counter() - start)
+    return {"timings": timings, "detected_texts": detected_texts}
+
+
+def compare(pages: List[str], repeats: int) -> Dict:
+    """Compare fp32 and int8 readers on the given pages"""
+    baseline = OCRService()
+    baseline._initialize_reader(use_gpu=False, quantize=False)
+    quantized = OCRService()
+    quantized._initialize_reader(use_gpu=False, quantize=True)
+    layers = {"fp32": quantized_layers(baseline), "int8": quantized_layers(quantized)}
+    if layers["fp32"] or not layers["int8"]:
+        raise RuntimeError(f"Readers are not fp32 vs int8 (quantized layers: {layers})")
+    
+    # Warm up both readers so the first page does not pay one-off costs
+    if pages:
+        baseline.detect_text(pages[0])
+        quantized.detect_text(pages[0])
+    
+    rows = []
+    for image_path in pages:
+        fp32 = time_detection(baseline, image_path, repeats)
+        int8 = time_detection(quantized, image_path, repeats)
+        fp32_text = page_text(fp32["detected_texts"])
+        int8_text = page_text(int8["detected_texts"])
+        rows.append({
+            "page": os.path.basename(image_path),
+            "fp32_seconds": statistics.median(fp32["timings"]),
+            "int8_seconds": statistics.median(int8["timings"]),
+            "fp32_regions": len(fp32["detected_texts"]),
+            "int8_regions": len(int8["detected_texts"]),
+            "text_similarity": round(difflib.SequenceMatcher(None, fp32_text, int8_text).ratio(), 4),
+        })
+    
+    summary = {}
+    if rows:
+        fp32_total = sum(r["fp32_seconds"] for r in rows)
+        int8_total = sum(r["int8_seconds"] for r in rows)
+        summary = {
+            "pages": len(rows),
+            "fp32_total_seconds": round(fp32_total, 4),
+            "int8_total_seconds": round(int8_total, 4),
+            "speedup": round(fp32_total / int8_total, 3) if int8_total else None,
+            "mean_text_similarity": round(statistics.mean(r["text_similarity"] for r in rows), 4),
+        }
+    return {"pages": rows, "summary": summary, "quantized_layers": layers}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fp32 and int8 EasyOCR on a page set")
+    parser.add_argument("--pages", required=True, help="Directory with sample manga pages")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per page")
+    parser.add_argument("--output", help="Optional path for JSON results")
+    args = parser.parse_args()
+    
+    report = compare(list_pages(args.pages), args.repeats)
+    
+    print(f"{'page':<32}{'fp32 s':>10}{'int8 s':>10}{'regions':>12}{'similarity':>12}")
+    for row in report["pages"]:
+        regions = f"{row['fp32_regions']}/{row['int8_regions']}"
+        print(f"{row['page']:<32}{row['fp32_seconds']:>10.3f}{row['int8_seconds']:>10.3f}"
+              f"{regions:>12}{row['text_similarity']:>12.3f}")
+    print(json.dumps(report["summary"], indent=2))
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
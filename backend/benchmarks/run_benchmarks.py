@@ -0,0 +1,210 @@
+"""
+Per-stage pipeline benchmarks on synthetic manga pages
+
+Times OCR, translation, masking, bubble fill, inpainting, rendering and the
+full TranslationPipeline.process_image for a set of page sizes and text
+densities. Results are written as JSON; when a baseline file is given, any
+stage whose median got slower than the threshold fails the run (exit 1).
+
+Usage (from backend/):
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --threshold 0.2
+    python -m benchmarks.run_benchmarks --ocr easyocr --inpaint lama --cases 1200x1800:20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import cv2
+
+from app.config import settings
+from app.services.pipeline import TranslationPipeline
+from app.utils.logging_utils import setup_logging
+from benchmarks.stubs import (
+    StubInpaintingService,
+    StubOCRService,
+    StubTranslationService,
+)
+from benchmarks.synthetic import generate_page, parse_cases
+
+DEFAULT_CASES = "1200x1800:12,1200x1800:40,2400x3600:40"
+STAGES = ["ocr", "translate", "mask", "bubble_fill", "inpaint", "render", "pipeline"]
+
+
+def build_pipeline(args) -> TranslationPipeline:
+    """Build a pipeline with the requested real or stub backends"""
+    ocr_service = StubOCRService() if args.ocr == "stub" else None
+    translation_service = (
+        StubTranslationService(latency=args.translator_latency) if args.translator == "stub" else None
+    )
+    if args.inpaint == "lama":
+        inpainting_service = None
+    else:
+        inpainting_service = StubInpaintingService(use_opencv=args.inpaint == "opencv")
+    
+    return TranslationPipeline(
+        ocr_service=ocr_service,
+        translation_service=translation_service,
+        inpainting_service=inpainting_service,
+    )
+
+
+def measure(fn: Callable, repeats: int) -> Dict:
+    """Time a callable; returns median/min seconds and the last result"""
+    runs = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "runs": runs,
+        "result": result,
+    }
+
+
+def bench_case(pipeline: TranslationPipeline, width: int, height: int, regions: int,
+               repeats: int, work_dir: str) -> Dict[str, Dict]:
+    """Benchmark every stage for one synthetic page"""
+    image, ground_truth = generate_page(width, height, regions, seed=width * 31 + regions)
+    image_path = os.path.join(work_dir, f"page_{width}x{height}_{regions}.png")
+    cv2.imwrite(image_path, image)
+    if isinstance(pipeline.ocr_service, StubOCRService):
+        pipeline.ocr_service.register(image_path, ground_truth)
+    
+    # Warm-up run (model init, font cache, allocator)
+    pipeline.ocr_service.detect_text(image_path)
+    
+    stats = {}
+    ocr = measure(lambda: pipeline.ocr_service.detect_text(image_path), repeats)
+    detected_texts = ocr["result"]
+    stats["ocr"] = ocr
+    
+    stats["translate"] = measure(
+        lambda: pipeline.translation_service.translate_detected_texts(
+            detected_texts.copy()
+        ),
+        repeats
+    )
+    translated = stats["translate"]["result"]
+    
+    if settings.mask_refinement:
+        mask_fn = lambda: pipeline.ocr_service.get_refined_text_mask(image, translated, padding=5, dilation_size=5)
+    else:
+        mask_fn = lambda: pipeline.inpainting_service.enhance_mask(
+            pipeline.ocr_service.get_text_mask(image.shape, translated, padding=5), dilation_size=5
+        )
+    stats["mask"] = measure(mask_fn, repeats)
+    mask = stats["mask"]["result"]
+    
+    stats["bubble_fill"] = measure(
+        lambda: pipeline.bubble_service.fill_flat_regions(image, mask, translated, padding=5),
+        repeats
+    )
+    base_image, remaining_mask, _ = stats["bubble_fill"]["result"]
+    
+    stats["inpaint"] = measure(lambda: pipeline.inpainting_service.inpaint(base_image, remaining_mask), repeats)
+    cleaned = stats["inpaint"]["result"]
+    
+    stats["render"] = measure(lambda: pipeline.text_renderer.render_text(cleaned, translated), repeats)
+    
+    def run_pipeline():
+        file_id = f"bench-{uuid.uuid4()}"
+        asyncio.run(pipeline.process_image(image_path=image_path, file_id=file_id))
+        pipeline.cleanup(file_id)
+    
+    stats["pipeline"] = measure(run_pipeline, repeats)
+    
+    for stage in stats.values():
+        stage.pop("result", None)
+    return stats
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float, min_delta: float) -> List[str]:
+    """Return a description of every stage that regressed beyond the threshold"""
+    regressions = []
+    for case, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(case, {}).get(stage)
+            if previous is None:
+                continue
+            delta = current["median"] - previous["median"]
+            if delta > min_delta and current["median"] > previous["median"] * (1 + threshold):
+                regressions.append(
+                    f"{case} {stage}: {previous['median'] * 1000:.1f}ms -> {current['median'] * 1000:.1f}ms "
+                    f"(+{delta / previous['median'] * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage MangaMa pipeline benchmarks")
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="Comma-separated WxH:regions list")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--ocr", choices=["stub", "easyocr"], default="stub")
+    parser.add_argument("--inpaint", choices=["stub", "opencv", "lama"], default="opencv")
+    parser.add_argument("--translator", choices=["stub", "real"], default="stub")
+    parser.add_argument("--translator-latency", type=float, default=0.0,
+                        help="Simulated per-call latency of the stub translator (seconds)")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--baseline", help="Previous JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative slowdown per stage before failing")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="Ignore slowdowns smaller than this many seconds (timer noise)")
+    args = parser.parse_args()
+    
+    setup_logging(settings.log_level, settings.log_format)
+    pipeline = build_pipeline(args)
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="mangama-bench-")
+    try:
+        for width, height, regions in parse_cases(args.cases):
+            key = f"{width}x{height}:{regions}"
+            results[key] = bench_case(pipeline, width, height, regions, args.repeats, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"\n{'case':<20}" + "".join(f"{stage:>13}" for stage in STAGES))
+    for key, stages in results.items():
+        print(f"{key:<20}" + "".join(f"{stages[s]['median'] * 1000:>11.1f}ms" for s in STAGES))
+    
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "backends": {"ocr": args.ocr, "inpaint": args.inpaint, "translator": args.translator},
+            "repeats": args.repeats,
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline.get("results", {}), args.threshold, args.min_delta)
+        if regressions:
+            print("\n❌ Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
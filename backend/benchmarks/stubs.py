@@ -0,0 +1,95 @@
+"""
+Offline stand-ins for the model- and network-backed services
+
+Each stub subclasses the real service and only replaces the part that needs
+model weights or network access, so the surrounding pipeline code (masking,
+bubble fill, rendering, fallback loops) is still exercised as in production.
+"""
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.models.detection_batch import DetectionBatch
+from app.models.schemas import DetectedText
+from app.services.inpainting_service import InpaintingService
+from app.services.ocr_service import OCRService
+from app.services.translation_service import TranslationService
+
+
+class StubOCRService(OCRService):
+    """OCR service returning registered ground-truth detections"""
+    
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.ground_truth: Dict[str, DetectionBatch] = {}
+    
+    def register(self, image_path: str, detected_texts: List[DetectedText]):
+        """Register the detections to return for an image path"""
+        self.ground_truth[image_path] = DetectionBatch.from_models(detected_texts)
+    
+    def lookup(self, image_path: str) -> DetectionBatch:
+        """Ground truth of an image (empty if none was registered)"""
+        return self.ground_truth.get(image_path, DetectionBatch.empty())
+    
+    def detect_text(self, image_path: str, use_gpu: bool = False,
+                    image: Optional[np.ndarray] = None, y_offset: int = 0) -> DetectionBatch:
+        if self.latency:
+            time.sleep(self.latency)
+        detections = self.lookup(image_path).copy()
+        if image is None:
+            return detections
+        
+        # Tile of a long strip: return what the tile sees, cut off at its edges
+        y_end = y_offset + image.shape[0]
+        top = np.maximum(detections.boxes[:, 1], y_offset)
+        bottom = np.minimum(detections.boxes[:, 1] + detections.boxes[:, 3], y_end)
+        detections.boxes[:, 1] = top
+        detections.boxes[:, 3] = bottom - top
+        return detections.take(bottom - top >= 10)
+
+
+class StubInpaintingService(InpaintingService):
+    """Inpainting service that skips the model entirely"""
+    
+    def __init__(self, use_opencv: bool = False):
+        self.lama_model = None
+        self.use_opencv = use_opencv
+    
+    def inpaint(self, image: np.ndarray, mask: np.ndarray, use_model: bool = True) -> np.ndarray:
+        if self.use_opencv or not use_model:
+            return self._inpaint_with_opencv(image, mask)
+        result = image.copy()
+        result[mask > 0] = 255
+        return result
+
+
+class StubTranslator:
+    """Translator with the deep_translator interface and configurable latency"""
+    
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = np.random.default_rng(seed)
+    
+    def translate(self, text: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise ConnectionError("stub translator failure")
+        return text.lower()
+
+
+class StubTranslationService(TranslationService):
+    """Translation service whose only backend is an in-process stub translator"""
+    
+    backends = ("Stub",)
+    
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        super().__init__()
+    
+    def _create_translator(self, backend: str, source: str, target: str):
+        return StubTranslator(self.latency, self.failure_rate)
@@ -0,0 +1,49 @@
+import time
+import pytest
+from app.services.job_queue import JobQueue, LocalJobQueue, SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.3, poll_interval=0.05)
+
+
+def test_job_queue_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_jobs_are_taken_in_order(queue):
+    for index in range(3):
+        queue.enqueue({"job_id": f"job-{index}"})
+    assert [queue.dequeue(timeout=0)["job_id"] for _ in range(3)] == ["job-0", "job-1", "job-2"]
+    assert queue.dequeue(timeout=0) is None
+
+
+def test_expired_lease_requeues_job(queue):
+    queue.enqueue({"job_id": "job-0"})
+    assert queue.dequeue(timeout=0)["job_id"] == "job-0"
+    assert queue.dequeue(timeout=0) is None
+    time.sleep(0.4)
+    assert queue.dequeue(timeout=0)["job_id"] == "job-0"
+
+
+def test_renewed_lease_keeps_job(queue):
+    queue.enqueue({"job_id": "job-0"})
+    queue.dequeue(timeout=0)
+    for _ in range(4):
+        time.sleep(0.15)
+        queue.renew("job-0")
+        assert queue.dequeue(timeout=0) is None
+    queue.complete("job-0", {"ok": True, "result": {}})
+    assert queue.take_result("job-0") == {"ok": True, "result": {}}
+
+
+def test_local_queue_round_trip():
+    queue = LocalJobQueue()
+    queue.enqueue({"job_id": "job-0"})
+    job = queue.dequeue(timeout=1)
+    queue.renew(job["job_id"])
+    queue.complete(job["job_id"], {"ok": False, "error": "boom"})
+    assert queue.take_result("job-0") == {"ok": False, "error": "boom"}
+    assert queue.take_result("job-0") is None
@@ -0,0 +1,40 @@
+import pytest
+from app.config import settings
+from app.services import ocr_service
+from app.services.ocr_service import OCRService
+
+
+class FakeReader:
+    """Records the arguments EasyOCR's Reader was built with"""
+    calls = []
+    
+    def __init__(self, lang_list, **kwargs):
+        FakeReader.calls.append(kwargs)
+
+
+@pytest.fixture(autouse=True)
+def fake_reader(monkeypatch):
+    FakeReader.calls = []
+    monkeypatch.setattr(ocr_service.easyocr, "Reader", FakeReader)
+
+
+@pytest.mark.parametrize("flag", [False, True])
+def test_reader_follows_quantize_setting(monkeypatch, flag):
+    monkeypatch.setattr(settings, "ocr_quantize", flag)
+    OCRService()._initialize_reader(use_gpu=False)
+    # EasyOCR quantizes unless told not to, so the flag must always be passed
+    assert FakeReader.calls[-1]["quantize"] is flag
+
+
+def test_gpu_reader_is_never_quantized(monkeypatch):
+    monkeypatch.setattr(settings, "ocr_quantize", True)
+    OCRService()._initialize_reader(use_gpu=True)
+    assert FakeReader.calls[-1]["quantize"] is False
+
+
+def test_mode_change_rebuilds_reader():
+    service = OCRService()
+    service._initialize_reader(use_gpu=False, quantize=True)
+    service._initialize_reader(use_gpu=False, quantize=True)
+    service._initialize_reader(use_gpu=False, quantize=False)
+    assert [call["quantize"] for call in FakeReader.calls] == [True, False]
@@ -0,0 +1,42 @@
+import threading
+import time
+import tracemalloc
+from app.utils.profiling import RequestProfiler
+
+
+def test_concurrent_profiles_are_serialized():
+    events = []
+    
+    def run(name):
+        with RequestProfiler() as profiler:
+            events.append(("start", name))
+            assert tracemalloc.is_tracing()
+            time.sleep(0.1)
+            buffer = bytearray(8_000_000)
+            events.append(("end", name))
+        del buffer
+        events.append(("peak", profiler.peak_traced_bytes >= 8_000_000))
+    
+    threads = [threading.Thread(target=run, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    starts = [index for index, (kind, _) in enumerate(events) if kind == "start"]
+    ends = [index for index, (kind, _) in enumerate(events) if kind == "end"]
+    assert ends[0] < starts[1]
+    assert [ok for kind, ok in events if kind == "peak"] == [True, True]
+    assert not tracemalloc.is_tracing()
+
+
+def test_rss_growth_covers_only_the_profiled_run():
+    with RequestProfiler() as large:
+        buffer = b"\x01" * 64_000_000
+        time.sleep(0.05)
+        del buffer
+    # A quiet run after a large one must not report the earlier peak
+    with RequestProfiler() as quiet:
+        time.sleep(0.05)
+    assert large.peak_rss_growth_bytes >= 48_000_000
+    assert quiet.peak_rss_growth_bytes < 16_000_000
@@ -0,0 +1,75 @@
+import asyncio
+from app.services.progress import ProgressBroker
+
+
+def broker(**options) -> ProgressBroker:
+    options.setdefault("keepalive_seconds", 0.01)
+    return ProgressBroker(**options)
+
+
+async def delivered():
+    """Let updates reported through call_soon_threadsafe reach the broker"""
+    await asyncio.sleep(0.001)
+
+
+async def first_update(broker: ProgressBroker, job_id: str):
+    """What a client connecting now receives first: the latest status, or None (keep-alive)"""
+    updates = broker.subscribe(job_id)
+    try:
+        return await updates.__anext__()
+    finally:
+        await updates.aclose()
+
+
+def test_finished_jobs_expire_after_retention():
+    progress = broker(retention_seconds=0.05, stale_seconds=10)
+    
+    async def run():
+        done, other = progress.reporter("done"), progress.reporter("other")
+        done("complete", 1.0)
+        await delivered()
+        assert (await first_update(progress, "done")).stage == "complete"
+        await asyncio.sleep(0.1)
+        other("ocr")
+        await delivered()
+        assert await first_update(progress, "done") is None
+    
+    asyncio.run(run())
+
+
+def test_abandoned_jobs_expire_after_stale_seconds():
+    # A job whose client left before it finished never reaches a terminal stage
+    progress = broker(retention_seconds=0.05, stale_seconds=0.3)
+    
+    async def run():
+        abandoned, other = progress.reporter("abandoned"), progress.reporter("other")
+        abandoned("uploading")
+        await asyncio.sleep(0.1)
+        other("ocr")
+        await delivered()
+        assert (await first_update(progress, "abandoned")).stage == "uploading"
+        await asyncio.sleep(0.3)
+        other("translating")
+        await delivered()
+        assert await first_update(progress, "abandoned") is None
+        assert (await first_update(progress, "other")).stage == "translating"
+    
+    asyncio.run(run())
+
+
+def test_subscribed_jobs_are_kept():
+    progress = broker(retention_seconds=0.05, stale_seconds=0.1)
+    
+    async def run():
+        watched, other = progress.reporter("watched"), progress.reporter("other")
+        watched("ocr")
+        await delivered()
+        updates = progress.subscribe("watched")
+        assert (await updates.__anext__()).stage == "ocr"
+        await asyncio.sleep(0.2)
+        other("ocr")
+        await delivered()
+        assert (await first_update(progress, "watched")).stage == "ocr"
+        await updates.aclose()
+    
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+import os
+import time
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from app.config import settings
+from app.models.detection_batch import DetectionBatch
+from app.services.rerender_service import RerenderService, RenderNotFound
+
+FILE_IDS = [f"00000000-0000-0000-0000-00000000000{index}" for index in range(3)]
+
+
+@pytest.fixture(autouse=True)
+def render_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "render_cache_dir", str(tmp_path))
+    return tmp_path
+
+
+def save(service, file_id, size=64):
+    page = np.full((size, size, 3), 255, np.uint8)
+    service.save_plate(file_id, page, page, DetectionBatch.empty(), f"{file_id}_original.png")
+
+
+def age(render_cache, file_id, seconds):
+    past = time.time() - seconds
+    for suffix in ("_clean.png", "_state.json"):
+        os.utime(render_cache / f"{file_id}{suffix}", (past, past))
+
+
+def bytes_out() -> float:
+    return REGISTRY.get_sample_value("mangama_bytes_processed_total", {"direction": "out"}) or 0.0
+
+
+def test_plate_is_not_counted_as_output_bytes():
+    before = bytes_out()
+    save(RerenderService(text_renderer=None), FILE_IDS[0])
+    assert bytes_out() == before
+
+
+def test_discard_removes_plate_files(render_cache):
+    service = RerenderService(text_renderer=None)
+    save(service, FILE_IDS[0])
+    assert sorted(service.discard(FILE_IDS[0])) == [f"{FILE_IDS[0]}_clean.png", f"{FILE_IDS[0]}_state.json"]
+    assert not list(render_cache.iterdir())
+    with pytest.raises(RenderNotFound):
+        service._load(FILE_IDS[0])
+
+
+def test_evict_expired_plates(render_cache):
+    service = RerenderService(text_renderer=None, ttl=3600)
+    for file_id in FILE_IDS:
+        save(service, file_id)
+    age(render_cache, FILE_IDS[0], 7200)
+    assert service.evict() == 1
+    assert sorted(path.name.split("_")[0] for path in render_cache.iterdir()) == sorted(FILE_IDS[1:] * 2)
+
+
+def test_evict_least_recently_edited_beyond_budget(render_cache):
+    service = RerenderService(text_renderer=None)
+    for seconds, file_id in zip((300, 200, 100), FILE_IDS):
+        save(service, file_id)
+        age(render_cache, file_id, seconds)
+    one_job = sum(path.stat().st_size for path in render_cache.glob(f"{FILE_IDS[0]}_*"))
+    service.max_disk_bytes = int(one_job * 2.5)
+    assert service.evict() == 1
+    assert not list(render_cache.glob(f"{FILE_IDS[0]}_*"))
+    assert len(list(render_cache.iterdir())) == 4
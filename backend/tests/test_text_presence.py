@@ -0,0 +1,64 @@
+import cv2
+import numpy as np
+import pytest
+from app.services.text_presence import TextPresenceService, TEXTLESS, UNSURE, TEXT
+
+
+@pytest.fixture
+def service():
+    return TextPresenceService()
+
+
+def blank_page(width=800, height=1200):
+    return np.full((height, width, 3), 255, np.uint8)
+
+
+def with_bubble(page, center=(400, 590), axes=(90, 60)):
+    cv2.ellipse(page, center, axes, 0, 0, 360, (0, 0, 0), 3)
+    return page
+
+
+def test_blank_page_is_textless(service):
+    verdict, glyphs, _ = service.classify(blank_page())
+    assert verdict == TEXTLESS
+    assert glyphs == 0
+
+
+def test_panel_borders_are_textless(service):
+    page = blank_page()
+    cv2.rectangle(page, (40, 40), (760, 580), (0, 0, 0), 2)
+    cv2.rectangle(page, (40, 620), (760, 1160), (0, 0, 0), 2)
+    assert service.classify(page)[0] == TEXTLESS
+
+
+def test_dialogue_line_is_text(service):
+    page = with_bubble(blank_page(), axes=(160, 60))
+    cv2.putText(page, "WAIT FOR ME", (290, 600), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 0), 2)
+    assert service.classify(page)[0] == TEXT
+
+
+@pytest.mark.parametrize("text", ["WHAT?!", "BOOM", "I"])
+@pytest.mark.parametrize("scale", [3, 4, 6])
+def test_large_lettering_is_never_textless(service, text, scale):
+    # Shouts and SFX taller than the glyph band must still go to OCR
+    page = blank_page()
+    cv2.putText(page, text, (60, 600), cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), scale * 2)
+    assert service.classify(page)[0] != TEXTLESS
+
+
+@pytest.mark.parametrize("text", ["...!?", "I", "!", "?!"])
+@pytest.mark.parametrize("bubble", [False, True])
+def test_sparse_punctuation_is_never_textless(service, text, bubble):
+    page = with_bubble(blank_page()) if bubble else blank_page()
+    cv2.putText(page, text, (380, 605), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    assert service.classify(page)[0] != TEXTLESS
+
+
+def test_busy_page_is_unsure(service):
+    # Dense hatching: too much ink to rule out lettering hidden in it
+    page = blank_page()
+    rng = np.random.default_rng(0)
+    for _ in range(400):
+        x, y = rng.integers(0, 800), rng.integers(0, 1200)
+        cv2.line(page, (int(x), int(y)), (int(x) + 300, int(y) + 40), (0, 0, 0), 2)
+    assert service.classify(page)[0] in (UNSURE, TEXT)
@@ -0,0 +1,56 @@
+import threading
+import pytest
+from pydantic import ValidationError
+from app.config import Settings
+from app.utils.tiling_utils import map_in_order, plan_tiles
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_map_in_order_keeps_input_order(workers):
+    assert list(map_in_order(lambda x: x * 2, range(10), workers)) == [x * 2 for x in range(10)]
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+def test_next_tile_is_cut_after_oldest_result_is_consumed(workers):
+    events = []
+    
+    def tiles():
+        for index in range(6):
+            events.append(("cut", index))
+            yield index
+    
+    for index in map_in_order(lambda x: x, tiles(), workers):
+        events.append(("stitch", index))
+    for index in range(6 - workers):
+        assert events.index(("stitch", index)) < events.index(("cut", index + workers))
+
+
+def test_at_most_max_workers_in_flight():
+    lock = threading.Lock()
+    running = [0, 0]  # current, peak
+    
+    def work(x):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        with lock:
+            running[0] -= 1
+        return x
+    
+    list(map_in_order(work, range(20), 2))
+    assert running[1] <= 2
+
+
+@pytest.mark.parametrize("overlap", [2048, 4096])
+def test_overlap_not_below_tile_height_is_rejected(overlap):
+    with pytest.raises(ValidationError, match="TILE_OVERLAP"):
+        Settings(tile_height=2048, tile_overlap=overlap)
+    with pytest.raises(ValueError):
+        plan_tiles(10000, 2048, overlap)
+
+
+def test_tiles_cover_page_with_overlap():
+    tiles = plan_tiles(5000, 2048, 256)
+    assert tiles[0][0] == 0 and tiles[-1][1] == 5000
+    assert all(end - start == 2048 for start, end in tiles)
+    assert all(prev_end - start >= 256 for (_, prev_end), (start, _) in zip(tiles, tiles[1:]))
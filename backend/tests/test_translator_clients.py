@@ -0,0 +1,161 @@
+import httpx
+import pytest
+from app.config import settings
+from app.services.translation_service import TranslationService, UnsupportedLanguagePair
+from app.services.translator_clients import (
+    GoogleClient,
+    HTTPTranslator,
+    LibreClient,
+    MyMemoryClient,
+    TranslatorError,
+    close_http_client,
+)
+from benchmarks.mock_translator import MockTranslationServer, mock_translation
+
+TEXT = "Where Are You Going?"
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_client():
+    close_http_client()
+    yield
+    close_http_client()
+
+
+def serve(**options) -> MockTranslationServer:
+    return MockTranslationServer(**options).start()
+
+
+def clients(server: MockTranslationServer):
+    return {
+        "google": GoogleClient("en", "tr", f"{server.url}/m"),
+        "mymemory": MyMemoryClient("en", "tr", f"{server.url}/get"),
+        "libre": LibreClient("en", "tr", server.url),
+    }
+
+
+@pytest.fixture
+def mock_settings(monkeypatch):
+    """Point TranslationService's backends at a mock server"""
+    def point(server: MockTranslationServer):
+        monkeypatch.setattr(settings, "google_translate_url", f"{server.url}/m")
+        monkeypatch.setattr(settings, "mymemory_url", f"{server.url}/get")
+        monkeypatch.setattr(settings, "libre_translate_url", server.url)
+    return point
+
+
+def test_http_translator_is_abstract():
+    with pytest.raises(TypeError):
+        HTTPTranslator("en", "tr", "http://localhost")
+
+
+@pytest.mark.parametrize("backend", ["google", "mymemory", "libre"])
+def test_client_translates(backend):
+    with serve() as server:
+        assert clients(server)[backend].translate(TEXT) == mock_translation(TEXT, "tr")
+        assert server.stats["requests"] == 1
+
+
+def test_google_result_markup_is_pinned():
+    # The client scrapes Google's mobile page; these are the layouts it understands
+    class Pinned(httpx.MockTransport):
+        def __init__(self, page: str):
+            super().__init__(lambda request: httpx.Response(200, text=page))
+
+    current = '<div class="frame"><div class="result-container">Nereye gidiyorsun?</div></div>'
+    older = '<div dir="ltr" class="t0">Tom &amp; Jerry</div>'
+    for page, expected in ((current, "Nereye gidiyorsun?"), (older, "Tom & Jerry")):
+        client = httpx.Client(transport=Pinned(page))
+        assert GoogleClient("en", "tr", "https://translate.google.com/m", client=client).translate(TEXT) == expected
+
+
+@pytest.mark.parametrize("backend", ["google", "mymemory", "libre"])
+def test_malformed_body_raises(backend):
+    # A page or payload without a translation must fail, never pass the source text through
+    with serve(malformed={backend}) as server:
+        with pytest.raises((TranslatorError, ValueError)):
+            clients(server)[backend].translate(TEXT)
+
+
+def test_google_layout_change_raises_translator_error():
+    with serve(malformed={"google"}) as server:
+        with pytest.raises(TranslatorError, match="No translation in Google response"):
+            clients(server)["google"].translate(TEXT)
+
+
+@pytest.mark.parametrize("backend", ["google", "mymemory", "libre"])
+@pytest.mark.parametrize("status", [500, 502, 503])
+def test_server_error_raises(backend, status):
+    with serve(failing={backend}, failure_status=status) as server:
+        with pytest.raises(httpx.HTTPStatusError):
+            clients(server)[backend].translate(TEXT)
+
+
+def test_timeout_raises(monkeypatch):
+    monkeypatch.setattr(settings, "translator_timeout", 0.1)
+    with serve(latency=0.5) as server:
+        with pytest.raises(httpx.TimeoutException):
+            clients(server)["google"].translate(TEXT)
+
+
+def test_connections_are_reused():
+    with serve() as server:
+        translator = clients(server)["google"]
+        for index in range(5):
+            translator.translate(f"{TEXT} {index}")
+        assert server.stats["connections"] == 1
+
+
+def test_service_falls_back_past_failing_backends(mock_settings):
+    with serve(failing={"google"}, malformed={"mymemory"}) as server:
+        mock_settings(server)
+        service = TranslationService()
+        assert service.translate_text(TEXT, max_retries=1, target_lang="tr") == mock_translation(TEXT, "tr")
+        # Google failed, MyMemory answered without a translation, Libre translated
+        assert server.stats["requests"] == 3
+
+
+def test_service_falls_back_past_timeouts(mock_settings, monkeypatch):
+    monkeypatch.setattr(settings, "translator_timeout", 0.1)
+    with serve(latency=0.3) as server:
+        mock_settings(server)
+        # Only the slow backend times out: a second mock answers MyMemory at once
+        with serve() as fast:
+            monkeypatch.setattr(settings, "mymemory_url", f"{fast.url}/get")
+            service = TranslationService()
+            assert service.translate_text(TEXT, max_retries=1, target_lang="tr") == mock_translation(TEXT, "tr")
+            assert fast.stats["requests"] == 1
+
+
+def test_service_returns_source_when_every_backend_fails(mock_settings):
+    with serve(failing={"google", "mymemory", "libre"}) as server:
+        mock_settings(server)
+        service = TranslationService()
+        assert service.translate_text(TEXT, max_retries=1, target_lang="tr") == TEXT
+        assert server.stats["failures"] == 3
+
+
+def test_unsupported_pair_is_rejected():
+    with pytest.raises(UnsupportedLanguagePair):
+        TranslationService().check_language_pair("en", "zz")
+
+
+@pytest.mark.parametrize("retry_seconds,expected_attempts", [(3600, 1), (0, 2)])
+def test_failed_client_is_retried_after_retry_seconds(monkeypatch, retry_seconds, expected_attempts):
+    monkeypatch.setattr(settings, "translator_retry_seconds", retry_seconds)
+    service = TranslationService()
+    attempts = []
+    
+    def flaky(backend, source, target):
+        attempts.append(backend)
+        if len(attempts) == 1:
+            raise OSError("backend unreachable")
+        return object()
+    
+    monkeypatch.setattr(service, "backends", ("Google",))
+    monkeypatch.setattr(service, "_create_translator", flaky)
+    assert service.get_translators("en", "ja") == []
+    recovered = service.get_translators("en", "ja")
+    assert len(attempts) == expected_attempts
+    assert len(recovered) == expected_attempts - 1
+
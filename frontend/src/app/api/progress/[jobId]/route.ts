@@ -0,0 +1,40 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://backend:8000';
+
+// Server-sent events must not be cached or buffered
+export const dynamic = 'force-dynamic';
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: { jobId: string } }
+) {
+  try {
+    const response = await fetch(`${BACKEND_URL}/api/progress/${params.jobId}`, {
+      method: 'GET',
+      cache: 'no-store',
+      signal: request.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      const error = await response.json();
+      return NextResponse.json(error, { status: response.status });
+    }
+
+    // Pipe the event stream through unchanged
+    return new Response(response.body, {
+      status: 200,
+      headers: {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache, no-transform',
+        Connection: 'keep-alive',
+      },
+    });
+  } catch (error) {
+    console.error('Progress stream failed:', error);
+    return NextResponse.json(
+      { detail: 'İlerleme bilgisi alınamadı' },
+      { status: 502 }
+    );
+  }
+}
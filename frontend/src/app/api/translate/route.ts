@@ -13,7 +13,11 @@ export async function POST(request: NextRequest) {
 
     if (!response.ok) {
       const error = await response.json();
-      return NextResponse.json(error, { status: response.status });
+      const retryAfter = response.headers.get('Retry-After');
+      return NextResponse.json(error, {
+        status: response.status,
+        headers: retryAfter ? { 'Retry-After': retryAfter } : undefined,
+      });
     }
 
     const data = await response.json();
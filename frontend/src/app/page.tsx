@@ -4,7 +4,14 @@ import { useState, useEffect } from 'react';
 import ImageUploader from '@/components/ImageUploader';
 import BeforeAfterViewer from '@/components/BeforeAfterViewer';
 import ProcessingStatus from '@/components/ProcessingStatus';
-import { translateMangaPage, TranslationResponse, checkHealth } from '@/lib/api';
+import {
+  translateMangaPage,
+  TranslationResponse,
+  checkHealth,
+  createJobId,
+  subscribeToProgress,
+  ProcessingStatusEvent,
+} from '@/lib/api';
 
 interface BatchResult {
   file: File;
@@ -20,6 +27,7 @@ export default function Home() {
   const [error, setError] = useState<string | null>(null);
   const [apiStatus, setApiStatus] = useState<'checking' | 'online' | 'offline'>('checking');
   const [useGPU, setUseGPU] = useState(false);
+  const [liveStatus, setLiveStatus] = useState<ProcessingStatusEvent | null>(null);
 
   // Load GPU preference from localStorage on mount
   useEffect(() => {
@@ -79,8 +87,14 @@ export default function Home() {
         prev.map((r, idx) => idx === i ? { ...r, status: 'processing' } : r)
       );
 
+      // Follow live progress for this page
+      const jobId = createJobId();
+      setLiveStatus(null);
+      const unsubscribe = subscribeToProgress(jobId, setLiveStatus);
+
       try {
-        const response = await translateMangaPage(files[i], useGPU);
+        // Only the changed regions are downloaded; the viewer draws them over the original
+        const response = await translateMangaPage(files[i], useGPU, 2, jobId, undefined, 'sprite');
         
         // Update with result
         setBatchResults(prev =>
@@ -99,6 +113,8 @@ export default function Home() {
             status: 'failed'
           } : r)
         );
+      } finally {
+        unsubscribe();
       }
     }
 
@@ -248,7 +264,7 @@ export default function Home() {
                 </div>
               </div>
             </div>
-            <ProcessingStatus />
+            <ProcessingStatus status={liveStatus} />
           </div>
         )}
 
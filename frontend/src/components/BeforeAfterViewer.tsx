@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { TranslationResponse, getImageUrl } from '@/lib/api';
+import { composeTranslatedImage } from '@/lib/overlay';
 import { FiRotateCw, FiDownload } from 'react-icons/fi';
 
 interface BeforeAfterViewerProps {
@@ -15,10 +16,46 @@ export default function BeforeAfterViewer({ result, onReset }: BeforeAfterViewer
   const [imagesLoaded, setImagesLoaded] = useState(false);
 
   const originalUrl = getImageUrl(result.original_image_url);
-  const translatedUrl = getImageUrl(result.translated_image_url);
+  // Patch/sprite results are composed over the original in the browser
+  const [translatedUrl, setTranslatedUrl] = useState<string | null>(
+    result.patches ? null : getImageUrl(result.translated_image_url || '')
+  );
+
+  useEffect(() => {
+    if (!result.patches) {
+      return;
+    }
+    let mounted = true;
+    let objectUrl: string | null = null;
+    composeTranslatedImage(result)
+      .then((url) => {
+        objectUrl = url;
+        if (mounted) {
+          setTranslatedUrl(url);
+        } else {
+          URL.revokeObjectURL(url);
+        }
+      })
+      .catch(() => {
+        if (mounted) {
+          setImageError('Görsel yüklenemedi. Lütfen tekrar deneyin.');
+          setImagesLoaded(true);
+        }
+      });
+
+    return () => {
+      mounted = false;
+      if (objectUrl) {
+        URL.revokeObjectURL(objectUrl);
+      }
+    };
+  }, [result]);
 
   // Preload both images when component mounts
   useEffect(() => {
+    if (!translatedUrl) {
+      return;
+    }
     let mounted = true;
     const loadImages = async () => {
       try {
@@ -56,6 +93,9 @@ export default function BeforeAfterViewer({ result, onReset }: BeforeAfterViewer
   };
 
   const handleDownload = async () => {
+    if (!translatedUrl) {
+      return;
+    }
     try {
       // Fetch the image as blob to bypass CORS restrictions
       const response = await fetch(translatedUrl);
@@ -169,7 +209,7 @@ export default function BeforeAfterViewer({ result, onReset }: BeforeAfterViewer
             )}
             {imagesLoaded && !imageError && (
               <img
-                src={showBefore ? originalUrl : translatedUrl}
+                src={showBefore ? originalUrl : translatedUrl ?? undefined}
                 alt={showBefore ? 'Original' : 'Translated'}
                 className="w-full h-auto rounded-lg shadow-md"
                 onError={handleImageError}
@@ -1,30 +1,47 @@
 'use client';
 
 import { useEffect, useState } from 'react';
+import type { ProcessingStatusEvent } from '@/lib/api';
 
 const stages = [
-  { id: 1, name: 'Görsel Yükleniyor', icon: '📤', duration: 1000 },
-  { id: 2, name: 'Metin Tespit Ediliyor (OCR)', icon: '🔍', duration: 3000 },
-  { id: 3, name: 'Metin Çevriliyor', icon: '🌐', duration: 2000 },
-  { id: 4, name: 'Orijinal Metin Temizleniyor', icon: '🎨', duration: 4000 },
-  { id: 5, name: 'Türkçe Metin Ekleniyor', icon: '✏️', duration: 2000 },
+  { id: 1, key: 'uploading', name: 'Görsel Yükleniyor', icon: '📤', duration: 1000 },
+  { id: 2, key: 'ocr', name: 'Metin Tespit Ediliyor (OCR)', icon: '🔍', duration: 3000 },
+  { id: 3, key: 'translating', name: 'Metin Çevriliyor', icon: '🌐', duration: 2000 },
+  { id: 4, key: 'inpainting', name: 'Orijinal Metin Temizleniyor', icon: '🎨', duration: 4000 },
+  { id: 5, key: 'rendering', name: 'Türkçe Metin Ekleniyor', icon: '✏️', duration: 2000 },
 ];
 
-export default function ProcessingStatus() {
-  const [currentStage, setCurrentStage] = useState(0);
+interface ProcessingStatusProps {
+  // Live status from the backend; falls back to a timed estimate when absent
+  status?: ProcessingStatusEvent | null;
+}
+
+export default function ProcessingStatus({ status }: ProcessingStatusProps) {
+  const [estimatedStage, setEstimatedStage] = useState(0);
   const [progress, setProgress] = useState(0);
 
+  const isLive = !!status && status.stage !== 'error';
+  const liveStage = status
+    ? status.stage === 'complete'
+      ? stages.length
+      : Math.max(0, stages.findIndex((s) => s.key === status.stage))
+    : 0;
+  const currentStage = isLive ? liveStage : estimatedStage;
+  const overallProgress = isLive
+    ? status!.progress
+    : Math.min(100, (estimatedStage * 100 + progress) / stages.length);
+
   useEffect(() => {
     let timer: NodeJS.Timeout;
     
-    if (currentStage < stages.length) {
-      const duration = stages[currentStage].duration;
+    if (!isLive && estimatedStage < stages.length) {
+      const duration = stages[estimatedStage].duration;
       const increment = 100 / (duration / 100);
       
       timer = setInterval(() => {
         setProgress((prev) => {
           if (prev >= 100) {
-            setCurrentStage((s) => s + 1);
+            setEstimatedStage((s) => s + 1);
             return 0;
           }
           return prev + increment;
@@ -33,7 +50,7 @@ export default function ProcessingStatus() {
     }
 
     return () => clearInterval(timer);
-  }, [currentStage]);
+  }, [estimatedStage, isLive]);
 
   return (
     <div className="bg-white rounded-lg shadow-lg border p-8">
@@ -53,6 +70,9 @@ export default function ProcessingStatus() {
             ? `Adım ${currentStage + 1} / ${stages.length}`
             : 'Sonuçlarınız hazırlanıyor...'}
         </p>
+        {isLive && status!.message && (
+          <p className="text-sm text-gray-500 mt-1">{status!.message}</p>
+        )}
       </div>
 
       {/* Progress Bar */}
@@ -61,14 +81,12 @@ export default function ProcessingStatus() {
           <div
             className="bg-gradient-to-r from-blue-500 to-purple-500 h-full transition-all duration-300 ease-out"
             style={{
-              width: `${
-                ((currentStage * 100 + progress) / stages.length).toFixed(0)
-              }%`,
+              width: `${overallProgress.toFixed(0)}%`,
             }}
           />
         </div>
         <p className="text-center text-sm text-gray-500 mt-2">
-          {((currentStage * 100 + progress) / stages.length).toFixed(0)}%
+          {overallProgress.toFixed(0)}%
         </p>
       </div>
 
@@ -26,30 +26,131 @@ export interface DetectedText {
   translated_text?: string;
 }
 
+export type OutputMode = 'page' | 'patches' | 'sprite';
+
+export interface ImagePatch {
+  x: number;
+  y: number;
+  width: number;
+  height: number;
+  url?: string | null; // 'patches' mode
+  sprite_x?: number | null; // 'sprite' mode
+  sprite_y?: number | null;
+}
+
 export interface TranslationResponse {
+  file_id: string; // For rerender, cleanup and profiles (not the progress job id)
   original_image_url: string;
-  translated_image_url: string;
+  translated_image_url?: string | null; // 'page' mode only
+  mode?: 'detect' | 'detect_translate' | 'no_inpaint' | 'full';
+  output_mode?: OutputMode;
+  image_width?: number | null;
+  image_height?: number | null;
+  patches?: ImagePatch[] | null;
+  sprite_url?: string | null;
   detected_texts: DetectedText[];
   processing_time: number;
   timestamp: string;
   total_text_regions: number;
+  source_lang?: string;
+  target_lang?: string;
+}
+
+export interface LanguagePair {
+  sourceLang?: string; // e.g. 'en', or 'auto' to detect
+  targetLang?: string; // e.g. 'tr', 'de', 'zh-CN'
 }
 
 export interface ApiError {
   detail: string;
 }
 
+export type ProcessingStage =
+  | 'uploading'
+  | 'ocr'
+  | 'translating'
+  | 'inpainting'
+  | 'rendering'
+  | 'complete'
+  | 'error';
+
+export interface ProcessingStatusEvent {
+  job_id?: string;
+  stage: ProcessingStage;
+  progress: number;
+  message: string;
+}
+
+/**
+ * Create a job id the backend accepts for progress streaming
+ */
+export function createJobId(): string {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  // randomUUID only exists in secure contexts (HTTPS/localhost); build a v4 UUID by hand
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
+/**
+ * Follow live pipeline progress for a job over server-sent events.
+ * Returns a function that closes the stream.
+ */
+export function subscribeToProgress(
+  jobId: string,
+  onStatus: (status: ProcessingStatusEvent) => void
+): () => void {
+  const source = new EventSource(`${API_BASE_URL}/progress/${jobId}`);
+
+  source.addEventListener('progress', (event) => {
+    try {
+      const status = JSON.parse((event as MessageEvent).data) as ProcessingStatusEvent;
+      onStatus(status);
+      if (status.stage === 'complete' || status.stage === 'error') {
+        source.close();
+      }
+    } catch (error) {
+      logger.warn('Invalid progress event', error);
+    }
+  });
+
+  source.onerror = () => {
+    // Progress is best-effort; the translate request still returns the result
+    logger.debug('Progress stream closed', { jobId });
+    source.close();
+  };
+
+  return () => source.close();
+}
+
 /**
  * Upload and translate a manga page
  */
 export async function translateMangaPage(
   file: File, 
   useGPU: boolean = false,
-  retries: number = 2
+  retries: number = 2,
+  jobId?: string,
+  languages?: LanguagePair,
+  outputMode: OutputMode = 'page'
 ): Promise<TranslationResponse> {
   const formData = new FormData();
   formData.append('file', file);
   formData.append('use_gpu', useGPU.toString());
+  formData.append('output_mode', outputMode);
+  if (jobId) {
+    formData.append('job_id', jobId);
+  }
+  if (languages?.sourceLang) {
+    formData.append('source_lang', languages.sourceLang);
+  }
+  if (languages?.targetLang) {
+    formData.append('target_lang', languages.targetLang);
+  }
 
   let lastError: Error | null = null;
 
@@ -72,7 +173,8 @@ export async function translateMangaPage(
       });
       
       // Validate response has required fields
-      if (!response.data.translated_image_url || !response.data.original_image_url) {
+      const hasOutput = response.data.translated_image_url || response.data.patches;
+      if (!hasOutput || !response.data.original_image_url) {
         throw new Error('Sunucu geçersiz yanıt döndürdü');
       }
       
@@ -84,6 +186,17 @@ export async function translateMangaPage(
       if (axios.isAxiosError(error)) {
         const apiError = error.response?.data as ApiError;
         
+        // Server busy (admission queue full) - wait as instructed and retry
+        if (error.response && error.response.status === 429) {
+          const retryAfter = Math.min(Number(error.response.headers['retry-after']) || 5, 60);
+          if (attempt < retries) {
+            logger.info(`Server busy, retrying in ${retryAfter} seconds...`);
+            await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            continue;
+          }
+          throw new Error('Sunucu şu anda yoğun. Lütfen biraz sonra tekrar deneyin.');
+        }
+
         // Don't retry on client errors (4xx)
         if (error.response && error.response.status >= 400 && error.response.status < 500) {
           logger.warn('Client error', { status: error.response.status, detail: apiError?.detail });
@@ -0,0 +1,61 @@
+import { TranslationResponse, getImageUrl } from './api';
+import { logger } from './logger';
+
+function loadImage(url: string): Promise<HTMLImageElement> {
+  return new Promise((resolve, reject) => {
+    const img = new Image();
+    // Needed to read the canvas back; the backend sends CORS headers for /static
+    img.crossOrigin = 'anonymous';
+    img.onload = () => resolve(img);
+    img.onerror = () => reject(new Error(`Failed to load ${url}`));
+    img.src = url;
+  });
+}
+
+/**
+ * Build the translated page in the browser by drawing the changed patches
+ * (or sprite regions) over the original image.
+ * Returns an object URL; revoke it with URL.revokeObjectURL when done.
+ */
+export async function composeTranslatedImage(result: TranslationResponse): Promise<string> {
+  const original = await loadImage(getImageUrl(result.original_image_url));
+
+  const canvas = document.createElement('canvas');
+  canvas.width = result.image_width || original.naturalWidth;
+  canvas.height = result.image_height || original.naturalHeight;
+  const context = canvas.getContext('2d');
+  if (!context) {
+    throw new Error('Canvas is not supported');
+  }
+  context.drawImage(original, 0, 0);
+
+  const patches = result.patches || [];
+  if (result.sprite_url) {
+    const sprite = await loadImage(getImageUrl(result.sprite_url));
+    for (const patch of patches) {
+      context.drawImage(
+        sprite,
+        patch.sprite_x ?? 0, patch.sprite_y ?? 0, patch.width, patch.height,
+        patch.x, patch.y, patch.width, patch.height
+      );
+    }
+  } else {
+    const images = await Promise.all(
+      patches.map((patch) => (patch.url ? loadImage(getImageUrl(patch.url)) : Promise.resolve(null)))
+    );
+    patches.forEach((patch, index) => {
+      const image = images[index];
+      if (image) {
+        context.drawImage(image, patch.x, patch.y);
+      }
+    });
+  }
+
+  logger.debug('Composed translated page', { patches: patches.length, sprite: !!result.sprite_url });
+
+  const blob = await new Promise<Blob | null>((resolve) => canvas.toBlob(resolve, 'image/png'));
+  if (!blob) {
+    throw new Error('Failed to encode composed image');
+  }
+  return URL.createObjectURL(blob);
+}